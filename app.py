@@ -1,23 +1,46 @@
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
 from flask_cors import CORS
-from flasgger import Swagger
 from datetime import datetime
 import os
 
 # Initialize extensions without app
 db = SQLAlchemy()
-migrate = Migrate()
 
-def create_app():
+def create_app(config=None):
     app = Flask(__name__)
     
     # Configuration
-    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///biblioteca_familiar.db'
+    app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///biblioteca_familiar.db')
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
     app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'dev-biblioteca-familiar-2024')
     
+    # Background jobs (overdue-loan sweeper, ...)
+    app.config['AGENDADOR_ATIVO'] = os.environ.get('AGENDADOR_ATIVO', '1') == '1'
+    app.config['INTERVALO_ATRASOS_SEGUNDOS'] = int(os.environ.get('INTERVALO_ATRASOS_SEGUNDOS', 60))
+    app.config['INTERVALO_ESTATISTICAS_SEGUNDOS'] = int(os.environ.get('INTERVALO_ESTATISTICAS_SEGUNDOS', 300))
+    app.config['INTERVALO_PONTOS_SEGUNDOS'] = int(os.environ.get('INTERVALO_PONTOS_SEGUNDOS', 30))
+    app.config['INTERVALO_RECOMENDACOES_SEGUNDOS'] = int(os.environ.get('INTERVALO_RECOMENDACOES_SEGUNDOS', 600))
+    app.config['INTERVALO_SIMILARES_SEGUNDOS'] = int(os.environ.get('INTERVALO_SIMILARES_SEGUNDOS', 300))
+    # Similar-books overlay rows (books changed since the last rebuild) before the index is rebuilt
+    app.config['LIMITE_CAMADA_SIMILARES'] = int(os.environ.get('LIMITE_CAMADA_SIMILARES', 500))
+    
+    # In-process cache of rendered GET responses (0 disables it)
+    app.config['CACHE_RESPOSTAS_BYTES'] = int(os.environ.get('CACHE_RESPOSTAS_BYTES', 32 * 1024 * 1024))
+    
+    # Per-request SQL instrumentation (Server-Timing, N+1 warnings); /api/debug/consultas only when DEBUG_CONSULTAS=1
+    app.config['INSTRUMENTACAO_SQL'] = os.environ.get('INSTRUMENTACAO_SQL', '1') == '1'
+    app.config['DEBUG_CONSULTAS'] = os.environ.get('DEBUG_CONSULTAS', '0') == '1'
+    app.config['LIMITE_CONSULTAS_REPETIDAS'] = int(os.environ.get('LIMITE_CONSULTAS_REPETIDAS', 5))
+    app.config['HISTORICO_CONSULTAS'] = int(os.environ.get('HISTORICO_CONSULTAS', 200))
+    
+    # Production boot: schema only from migrations (flask db upgrade), no Flasgger on the boot
+    # path; the OpenAPI spec is served from the file written at build time by flask gerar-openapi
+    app.config['MODO_PRODUCAO'] = os.environ.get('MODO_PRODUCAO', '0') == '1'
+    app.config['ARQUIVO_OPENAPI'] = os.environ.get('ARQUIVO_OPENAPI', os.path.join(app.root_path, 'openapi.json'))
+    # The spec only changes on deploy; clients revalidate with the content-hash ETag after this
+    app.config['OPENAPI_MAX_AGE'] = int(os.environ.get('OPENAPI_MAX_AGE', 86400))
+    
     # Swagger configuration
     app.config['SWAGGER'] = {
         'title': 'Biblioteca Familiar API',
@@ -30,18 +53,44 @@ def create_app():
         }
     }
     
+    # Overrides (benchmarks, scripts)
+    if config:
+        app.config.update(config)
+    
+    # Database profile: SQLite pragmas (WAL, busy_timeout, ...) and pool settings
+    from utils.banco import configurar_perfil, init_banco
+    configurar_perfil(app)
+    
     # Initialize extensions with app
     db.init_app(app)
-    migrate.init_app(app, db)
-    CORS(app, origins=['http://localhost:*', 'http://127.0.0.1:*'])
-    Swagger(app)
+    init_banco(app, db)
+    from utils.instrumentacao import init_instrumentacao
+    init_instrumentacao(app, db)
+    if not app.config['MODO_PRODUCAO'] or os.environ.get('FLASK_RUN_FROM_CLI'):
+        # Flask-Migrate (and Alembic) is only needed by the flask db commands
+        from flask_migrate import Migrate
+        Migrate(app, db)
+    CORS(app, origins=['http://localhost:*', 'http://127.0.0.1:*'], expose_headers=['X-Proximo-Cursor', 'Server-Timing', 'X-Consultas-Repetidas'])
+    
+    # Swagger UI + spec (Flasgger) in development; prebuilt spec file in production
+    from utils.documentacao import init_documentacao
+    init_documentacao(app)
     
     with app.app_context():
         # Import models here to avoid circular imports
-        from models import membro, livro, emprestimo, avaliacao, wishlist
+        from models import membro, livro, emprestimo, avaliacao, wishlist, estatistica, cache_versao, tag, recomendacao, similar, pontos
+        
+        if not app.config['MODO_PRODUCAO']:
+            # Create tables if they don't exist
+            db.create_all()
+            
+            # Full-text search index (FTS5 virtual table + sync triggers)
+            from models.busca import criar_indice_busca
+            criar_indice_busca()
         
-        # Create tables if they don't exist
-        db.create_all()
+        # HTTP response cache (ETag + write-driven invalidation)
+        from utils.cache import init_cache
+        init_cache(app)
         
         # Import and register blueprints
         from routes.membros import membros_bp
@@ -50,6 +99,9 @@ def create_app():
         from routes.estatisticas import estatisticas_bp
         from routes.avaliacoes import avaliacoes_bp
         from routes.wishlist import wishlist_bp
+        from routes.exportacao import exportacao_bp
+        from routes.tags import tags_bp
+        from routes.ranking import ranking_bp
         
         app.register_blueprint(membros_bp, url_prefix='/api')
         app.register_blueprint(livros_bp, url_prefix='/api')
@@ -57,6 +109,51 @@ def create_app():
         app.register_blueprint(estatisticas_bp, url_prefix='/api')
         app.register_blueprint(avaliacoes_bp, url_prefix='/api')
         app.register_blueprint(wishlist_bp, url_prefix='/api')
+        app.register_blueprint(exportacao_bp, url_prefix='/api')
+        app.register_blueprint(tags_bp, url_prefix='/api')
+        app.register_blueprint(ranking_bp, url_prefix='/api')
+        
+        if app.config['DEBUG_CONSULTAS'] or app.debug:
+            from routes.debug import debug_bp
+            app.register_blueprint(debug_bp, url_prefix='/api')
+    
+    # Request body validators compiled from the @swag_from schemas (needs the blueprints above)
+    from utils.validacao import init_validacao
+    init_validacao(app)
+    
+    # Comandos de manutenção (flask recalcular-avaliacoes, ...)
+    from commands import registrar_comandos
+    registrar_comandos(app)
+    
+    # Tarefas periódicas em segundo plano
+    from services.agendador import Agendador
+    from models.emprestimo import Emprestimo
+    from models.estatistica import EstatisticasSnapshot
+    from models.pontos import LancamentoPontos
+    
+    def salvar_recomendacoes():
+        # Import tardio: numpy/scipy só entram no processo quando a tarefa roda
+        from services.recomendacao import salvar_modelo
+        salvar_modelo()
+    
+    def manter_similares():
+        from models.similar import VizinhancaLivro
+        if not VizinhancaLivro.precisa_reconstruir(app.instance_path, app.config['LIMITE_CAMADA_SIMILARES']):
+            return
+        # Import tardio: numpy/scipy só entram no processo quando há o que reconstruir
+        from services.similares import reconstruir_indice
+        reconstruir_indice()
+    
+    agendador = Agendador(app)
+    agendador.registrar('marcar_atrasados', app.config['INTERVALO_ATRASOS_SEGUNDOS'], Emprestimo.marcar_atrasados)
+    agendador.registrar('recalcular_estatisticas', app.config['INTERVALO_ESTATISTICAS_SEGUNDOS'], EstatisticasSnapshot.recalcular, imediato=False)
+    agendador.registrar('consolidar_pontos', app.config['INTERVALO_PONTOS_SEGUNDOS'], LancamentoPontos.consolidar)
+    agendador.registrar('salvar_recomendacoes', app.config['INTERVALO_RECOMENDACOES_SEGUNDOS'], salvar_recomendacoes, imediato=False)
+    agendador.registrar('manter_similares', app.config['INTERVALO_SIMILARES_SEGUNDOS'], manter_similares)
+    app.extensions['agendador'] = agendador
+    if app.config['AGENDADOR_ATIVO']:
+        # Starts with the first request, so CLI commands don't spawn the thread
+        app.before_request(agendador.iniciar)
     
     return app
 
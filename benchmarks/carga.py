@@ -0,0 +1,405 @@
+"""Teste de carga com clientes simultâneos contra um servidor WSGI de verdade.
+
+Sobe N processos trabalhadores (servidor do Werkzeug, com threads) aceitando
+conexões no mesmo socket, como um servidor pre-fork, sobre uma cópia do banco
+(ou um banco gerado com benchmarks.gerador). C clientes HTTP repetem uma
+mistura configurável de ações:
+
+    navegar       GET /api/livros?limit=20 seguido de GET /api/livros/<id>
+    emprestar     POST /api/emprestimos e, se conseguiu, PUT /api/emprestimos/<id>/devolver
+    avaliar       POST /api/avaliacoes (409 de avaliação repetida é resposta esperada)
+    estatisticas  GET /api/estatisticas
+
+A cada intervalo imprime vazão, percentis de latência e as taxas de erro e de
+banco travado ("database is locked"); no fim, o resumo por operação. Sai com
+código 1 se algum SLO (--slo) foi violado e 2 se o servidor não subiu.
+
+    python -m benchmarks.carga --trabalhadores 4 --clientes 32 --segundos 60
+    python -m benchmarks.carga --banco /tmp/bench_medio.db --mix navegar=50,emprestar=30,avaliar=10,estatisticas=10
+    python -m benchmarks.carga --slo 'p99<=500' --slo 'emprestar.p95<=300' --slo 'erros<=0.5' --slo 'vazao>=100'
+
+SLOs: [operação.]métrica<=valor ou >=valor, com métricas p50, p95, p99 e max
+(ms), erros e bloqueios (% das requisições) e vazao (requisições/s). Entre
+aspas no shell, por causa do < e do >.
+"""
+import argparse
+import http.client
+import json
+import logging
+import os
+import random
+import re
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+from urllib.parse import quote
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.executar import copiar_banco, percentil  # noqa: E402
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MIX_PADRAO = 'navegar=60,emprestar=15,avaliar=10,estatisticas=15'
+SLO_PADRAO = ['p99<=1000', 'erros<=1', 'bloqueios<=1']
+_SLO = re.compile(r'^(?:(?P<operacao>\w+)\.)?(?P<metrica>\w+)\s*(?P<operador><=|>=)\s*(?P<valor>[\d.]+)$')
+METRICAS = ('p50', 'p95', 'p99', 'max', 'erros', 'bloqueios', 'vazao')
+
+
+# Servidor ------------------------------------------------------------------------
+
+def servir(fd, caminho, cache, agendador, instancia):
+    """Processo trabalhador: serve o app com threads no socket herdado do processo pai."""
+    from werkzeug.serving import make_server
+
+    from app import create_app
+
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{caminho}',
+        'AGENDADOR_ATIVO': agendador,
+        'CACHE_RESPOSTAS_BYTES': (32 * 1024 * 1024) if cache else 0,
+    })
+    app.instance_path = instancia
+    app.logger.setLevel(logging.ERROR)
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    make_server('127.0.0.1', 0, app, threaded=True, fd=fd).serve_forever()
+
+
+def subir_servidor(caminho, trabalhadores, cache, agendador, instancia):
+    """Abre o socket, inicia os trabalhadores e espera o primeiro responder. Retorna (porta, processos)."""
+    ouvinte = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    ouvinte.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    ouvinte.bind(('127.0.0.1', 0))
+    ouvinte.listen(128)
+    porta = ouvinte.getsockname()[1]
+    comando = [
+        sys.executable, '-m', 'benchmarks.carga', '--servir', str(ouvinte.fileno()),
+        '--banco', caminho, '--instancia', instancia
+    ]
+    if not cache:
+        comando.append('--sem-cache')
+    if agendador:
+        comando.append('--com-agendador')
+    processos = [
+        subprocess.Popen(comando, cwd=RAIZ, pass_fds=[ouvinte.fileno()])
+        for _ in range(trabalhadores)
+    ]
+    # Os trabalhadores já herdaram o socket
+    ouvinte.close()
+
+    prazo = time.monotonic() + 60
+    while time.monotonic() < prazo:
+        if any(processo.poll() is not None for processo in processos):
+            break
+        try:
+            conexao = http.client.HTTPConnection('127.0.0.1', porta, timeout=5)
+            conexao.request('GET', '/api/estatisticas')
+            if conexao.getresponse().status == 200:
+                return porta, processos
+        except OSError:
+            time.sleep(0.2)
+    parar_servidor(processos)
+    return None, []
+
+
+def parar_servidor(processos):
+    for processo in processos:
+        processo.terminate()
+    for processo in processos:
+        try:
+            processo.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            processo.kill()
+
+
+# Clientes ------------------------------------------------------------------------
+
+class Cliente:
+    """Conexão HTTP/1.1 persistente de um cliente; reconecta depois de erro de rede."""
+
+    def __init__(self, porta, timeout, registros, inicio):
+        self.porta = porta
+        self.timeout = timeout
+        self.registros = registros
+        self.inicio = inicio
+        self.conexao = None
+
+    def chamar(self, operacao, metodo, caminho, corpo=None, esperados=()):
+        """Faz a requisição e registra (instante, operação, ms, resultado). Retorna (status, json)."""
+        cabecalhos = {}
+        if corpo is not None:
+            corpo = json.dumps(corpo)
+            cabecalhos['Content-Type'] = 'application/json'
+        comeco = time.perf_counter()
+        try:
+            if self.conexao is None:
+                self.conexao = http.client.HTTPConnection('127.0.0.1', self.porta, timeout=self.timeout)
+            self.conexao.request(metodo, caminho, body=corpo, headers=cabecalhos)
+            resposta = self.conexao.getresponse()
+            bruto = resposta.read()
+            status = resposta.status
+        except (OSError, http.client.HTTPException):
+            self.conexao.close()
+            self.conexao = None
+            self.registros.append((time.monotonic() - self.inicio, operacao, (time.perf_counter() - comeco) * 1000, 'erro'))
+            return None, None
+        duracao = (time.perf_counter() - comeco) * 1000
+
+        try:
+            dados = json.loads(bruto) if bruto else None
+        except ValueError:
+            dados = None
+        if status < 400 or status in esperados:
+            resultado = 'ok'
+        elif 'locked' in str((dados or {}).get('erro', '') if isinstance(dados, dict) else ''):
+            resultado = 'bloqueio'
+        else:
+            resultado = 'erro'
+        self.registros.append((time.monotonic() - self.inicio, operacao, duracao, resultado))
+        return status, dados
+
+
+def navegar(cliente, aleatorio, ids):
+    cliente.chamar('navegar', 'GET', f'/api/livros?limit=20&genero={quote(aleatorio.choice(ids["generos"]))}')
+    cliente.chamar('navegar', 'GET', f'/api/livros/{aleatorio.choice(ids["livros"])}')
+
+
+def emprestar(cliente, aleatorio, ids):
+    # 400 "Livro não disponível" é o esperado quando outro cliente pegou o livro antes
+    status, dados = cliente.chamar('emprestar', 'POST', '/api/emprestimos', {
+        'id_livro': aleatorio.choice(ids['livros']),
+        'id_membro': aleatorio.choice(ids['membros'])
+    }, esperados=(400,))
+    if status == 201:
+        cliente.chamar('emprestar', 'PUT', f'/api/emprestimos/{dados["id_emprestimo"]}/devolver')
+
+
+def avaliar(cliente, aleatorio, ids):
+    cliente.chamar('avaliar', 'POST', '/api/avaliacoes', {
+        'id_livro': aleatorio.choice(ids['livros']),
+        'id_membro': aleatorio.choice(ids['membros']),
+        'nota': aleatorio.randint(1, 5),
+        'comentario': 'Avaliação do teste de carga'
+    }, esperados=(409,))
+
+
+def estatisticas(cliente, aleatorio, ids):
+    cliente.chamar('estatisticas', 'GET', '/api/estatisticas')
+
+
+ACOES = {'navegar': navegar, 'emprestar': emprestar, 'avaliar': avaliar, 'estatisticas': estatisticas}
+
+
+def rodar_cliente(porta, mix, ids, prazo, timeout, registros, inicio, semente):
+    aleatorio = random.Random(semente)
+    cliente = Cliente(porta, timeout, registros, inicio)
+    acoes, pesos = zip(*mix.items())
+    while time.monotonic() < prazo:
+        ACOES[aleatorio.choices(acoes, pesos)[0]](cliente, aleatorio, ids)
+
+
+# Relatório -----------------------------------------------------------------------
+
+def resumir(registros, segundos):
+    """Métricas de um conjunto de registros (latências em ms, taxas em %)."""
+    if not registros:
+        return None
+    tempos = [duracao for _, _, duracao, _ in registros]
+    resultados = Counter(resultado for _, _, _, resultado in registros)
+    return {
+        'requisicoes': len(registros),
+        'vazao': len(registros) / segundos if segundos else 0,
+        'p50': percentil(tempos, 50),
+        'p95': percentil(tempos, 95),
+        'p99': percentil(tempos, 99),
+        'max': max(tempos),
+        'erros': resultados['erro'] * 100 / len(registros),
+        'bloqueios': resultados['bloqueio'] * 100 / len(registros),
+    }
+
+
+def linha(rotulo, metricas):
+    return (
+        f'{rotulo:<14} {metricas["requisicoes"]:>7} {metricas["vazao"]:>8.1f} {metricas["p50"]:>8.1f} '
+        f'{metricas["p95"]:>8.1f} {metricas["p99"]:>8.1f} {metricas["max"]:>8.1f} '
+        f'{metricas["erros"]:>6.2f}% {metricas["bloqueios"]:>6.2f}%'
+    )
+
+
+CABECALHO = f'{"":<14} {"req":>7} {"req/s":>8} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8} {"max ms":>8} {"erros":>7} {"travado":>7}'
+
+
+def relatar_periodicamente(registros, intervalo, aquecimento, parar):
+    """Imprime uma linha por intervalo com as requisições que terminaram nele."""
+    lidos = 0
+    momento = 0.0
+    while not parar.wait(intervalo):
+        momento += intervalo
+        novos = registros[lidos:]
+        lidos += len(novos)
+        metricas = resumir(novos, intervalo)
+        rotulo = f't={momento:.0f}s' + (' (aq.)' if momento <= aquecimento else '')
+        print(linha(rotulo, metricas) if metricas else f'{rotulo:<14} {0:>7}', flush=True)
+
+
+def ler_slos(textos):
+    slos = []
+    for texto in textos:
+        encontrado = _SLO.match(texto.replace(' ', ''))
+        if not encontrado or encontrado['metrica'] not in METRICAS or (
+                encontrado['operacao'] and encontrado['operacao'] not in ACOES):
+            raise ValueError(f'SLO inválido: {texto} (ex.: p99<=500, emprestar.p95<=300, erros<=1, vazao>=50)')
+        slos.append((texto, encontrado['operacao'], encontrado['metrica'], encontrado['operador'], float(encontrado['valor'])))
+    return slos
+
+
+def ler_mix(texto):
+    mix = {}
+    for parte in texto.split(','):
+        nome, _, peso = parte.partition('=')
+        if nome.strip() not in ACOES:
+            raise ValueError(f'Ação desconhecida no mix: {nome} (disponíveis: {", ".join(ACOES)})')
+        mix[nome.strip()] = float(peso or 1)
+    return mix
+
+
+def carregar_ids(caminho):
+    conexao = sqlite3.connect(f'file:{caminho}?mode=ro', uri=True)
+    try:
+        ids = {
+            'livros': [linha[0] for linha in conexao.execute('SELECT id_livro FROM livros')],
+            'membros': [linha[0] for linha in conexao.execute('SELECT id_membro FROM membros_familia WHERE ativo')],
+            'generos': [linha[0] for linha in conexao.execute('SELECT DISTINCT genero FROM livros WHERE genero IS NOT NULL')],
+        }
+    finally:
+        conexao.close()
+    return ids
+
+
+def preparar_banco(args, caminho):
+    if args.banco:
+        copiar_banco(os.path.abspath(args.banco), caminho)
+        return
+    from app import create_app
+    from benchmarks.gerador import gerar
+    print(f'gerando banco (preset {args.preset})...')
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{caminho}',
+        'AGENDADOR_ATIVO': False,
+        'CACHE_RESPOSTAS_BYTES': 0,
+        'INSTRUMENTACAO_SQL': False,
+    })
+    gerar(app, args.preset, args.semente, saida=lambda texto: None)
+    with app.app_context():
+        from app import db
+        db.engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--banco', help='banco gerado por benchmarks.gerador (é copiado); padrão: gera --preset')
+    parser.add_argument('--preset', default='pequeno', help='preset do gerador quando --banco não é informado')
+    parser.add_argument('--trabalhadores', type=int, default=4, help='processos do servidor')
+    parser.add_argument('--clientes', type=int, default=32, help='clientes simultâneos')
+    parser.add_argument('--segundos', type=float, default=30)
+    parser.add_argument('--aquecimento', type=float, default=5, help='segundos iniciais fora do resumo')
+    parser.add_argument('--intervalo', type=float, default=5, help='segundos por linha do relatório')
+    parser.add_argument('--mix', default=MIX_PADRAO, help='pesos das ações (ação=peso,...)')
+    parser.add_argument('--slo', action='append', help=f'repetível; padrão: {" ".join(SLO_PADRAO)}')
+    parser.add_argument('--timeout', type=float, default=30, help='timeout de cada requisição (s)')
+    parser.add_argument('--sem-cache', action='store_true', help='desliga o cache de respostas nos trabalhadores')
+    parser.add_argument('--com-agendador', action='store_true', help='liga as tarefas periódicas nos trabalhadores')
+    parser.add_argument('--semente', type=int, default=42)
+    # Uso interno: processo trabalhador do servidor
+    parser.add_argument('--servir', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--instancia', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.servir is not None:
+        servir(args.servir, args.banco, not args.sem_cache, args.com_agendador, args.instancia)
+        return 0
+
+    try:
+        mix = ler_mix(args.mix)
+        slos = ler_slos(args.slo or SLO_PADRAO)
+    except ValueError as e:
+        parser.error(str(e))
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        caminho = os.path.join(diretorio, 'carga.db')
+        preparar_banco(args, caminho)
+        ids = carregar_ids(caminho)
+
+        porta, processos = subir_servidor(
+            caminho, args.trabalhadores, not args.sem_cache, args.com_agendador, os.path.join(diretorio, 'instance')
+        )
+        if porta is None:
+            print('ERRO: o servidor não respondeu', file=sys.stderr)
+            return 2
+        print(f'trabalhadores={args.trabalhadores} clientes={args.clientes} segundos={args.segundos:g} mix={args.mix}')
+        print(CABECALHO)
+
+        registros = []
+        parar = threading.Event()
+        inicio = time.monotonic()
+        prazo = inicio + args.aquecimento + args.segundos
+        relator = threading.Thread(
+            target=relatar_periodicamente, args=(registros, args.intervalo, args.aquecimento, parar), daemon=True
+        )
+        clientes = [
+            threading.Thread(
+                target=rodar_cliente,
+                args=(porta, mix, ids, prazo, args.timeout, registros, inicio, args.semente + i),
+                daemon=True
+            )
+            for i in range(args.clientes)
+        ]
+        relator.start()
+        for cliente in clientes:
+            cliente.start()
+        try:
+            for cliente in clientes:
+                cliente.join()
+        finally:
+            parar.set()
+            parar_servidor(processos)
+
+    medidos = [registro for registro in registros if registro[0] >= args.aquecimento]
+    duracao = max(time.monotonic() - inicio - args.aquecimento, 1e-9)
+    por_operacao = defaultdict(list)
+    for registro in medidos:
+        por_operacao[registro[1]].append(registro)
+
+    print('\nresumo (sem aquecimento)')
+    print(CABECALHO)
+    resumo = {None: resumir(medidos, duracao)}
+    for operacao in mix:
+        resumo[operacao] = resumir(por_operacao[operacao], duracao)
+        if resumo[operacao]:
+            print(linha(operacao, resumo[operacao]))
+    if resumo[None]:
+        print(linha('total', resumo[None]))
+
+    violados = []
+    for texto, operacao, metrica, operador, limite in slos:
+        metricas = resumo.get(operacao)
+        if metricas is None:
+            violados.append(f'{texto} (sem requisições)')
+            continue
+        valor = metricas[metrica]
+        if (operador == '<=' and valor > limite) or (operador == '>=' and valor < limite):
+            violados.append(f'{texto} (medido {valor:.2f})')
+    for violado in violados:
+        print(f'SLO VIOLADO: {violado}', file=sys.stderr)
+    if not violados:
+        print(f'SLOs atendidos: {", ".join(texto for texto, *_ in slos)}')
+    return 1 if violados else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,119 @@
+"""Benchmark de contenção no empréstimo/devolução.
+
+Várias threads disputam os mesmos livros via POST /api/emprestimos e
+PUT /api/emprestimos/<id>/devolver. Ao final verifica que nenhum livro
+ficou com dois empréstimos abertos e que `disponivel` bate com os
+empréstimos em aberto. Mede empréstimos por segundo.
+
+    python -m benchmarks.contencao_emprestimos --threads 16 --livros 5 --segundos 10
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app, db  # noqa: E402
+
+
+def preparar(app, membros, livros):
+    from models.membro import Membro
+    from models.livro import Livro
+    with app.app_context():
+        for i in range(membros):
+            db.session.add(Membro(nome=f'Membro {i}', email=f'membro{i}@bench.local', idade=30))
+        for i in range(livros):
+            db.session.add(Livro(titulo=f'Livro disputado {i}', autor='Autor', num_paginas=200))
+        db.session.commit()
+
+
+def trabalhador(app, id_membro, livros, prazo, resultados, semente):
+    aleatorio = random.Random(semente)
+    cliente = app.test_client()
+    meus_emprestimos = []
+    contagem = Counter()
+    while time.monotonic() < prazo:
+        if meus_emprestimos and aleatorio.random() < 0.5:
+            id_emprestimo = meus_emprestimos.pop(aleatorio.randrange(len(meus_emprestimos)))
+            resposta = cliente.put(f'/api/emprestimos/{id_emprestimo}/devolver')
+            contagem['devolucao_' + str(resposta.status_code)] += 1
+            continue
+        resposta = cliente.post('/api/emprestimos', json={
+            'id_livro': aleatorio.randint(1, livros),
+            'id_membro': id_membro
+        })
+        if resposta.status_code == 201:
+            meus_emprestimos.append(resposta.get_json()['id_emprestimo'])
+            contagem['emprestimo_ok'] += 1
+        elif resposta.status_code == 400:
+            contagem['emprestimo_indisponivel'] += 1
+        else:
+            erro = (resposta.get_json() or {}).get('erro', '')
+            contagem['banco_bloqueado' if 'locked' in erro else 'emprestimo_' + str(resposta.status_code)] += 1
+    resultados.append(contagem)
+
+
+def verificar(app):
+    """Retorna (livros com mais de um empréstimo aberto, livros com `disponivel` inconsistente)."""
+    from models.livro import Livro
+    from models.emprestimo import Emprestimo
+    with app.app_context():
+        abertos = dict(db.session.query(Emprestimo.id_livro, db.func.count()).filter(
+            Emprestimo.status.in_(['ativo', 'atrasado'])
+        ).group_by(Emprestimo.id_livro).all())
+        duplos = {id_livro: total for id_livro, total in abertos.items() if total > 1}
+        inconsistentes = [
+            livro.id_livro for livro in Livro.query.all()
+            if livro.disponivel == (livro.id_livro in abertos)
+        ]
+    return duplos, inconsistentes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--livros', type=int, default=5, help='poucos livros = mais disputa')
+    parser.add_argument('--segundos', type=float, default=10)
+    parser.add_argument('--semente', type=int, default=42)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        app = create_app({
+            'SQLALCHEMY_DATABASE_URI': f'sqlite:///{os.path.join(diretorio, "contencao.db")}',
+            'AGENDADOR_ATIVO': False,
+            'CACHE_RESPOSTAS_BYTES': 0
+        })
+        preparar(app, args.threads, args.livros)
+
+        resultados = []
+        prazo = time.monotonic() + args.segundos
+        threads = [
+            threading.Thread(target=trabalhador, args=(app, i + 1, args.livros, prazo, resultados, args.semente + i))
+            for i in range(args.threads)
+        ]
+        inicio = time.monotonic()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        duracao = time.monotonic() - inicio
+
+        total = sum(resultados, Counter())
+        duplos, inconsistentes = verificar(app)
+
+    print(f'threads={args.threads} livros={args.livros} duração={duracao:.1f}s')
+    for chave, valor in sorted(total.items()):
+        print(f'  {chave:<28} {valor}')
+    print(f'  empréstimos/s                {total["emprestimo_ok"] / duracao:.1f}')
+    print(f'  livros com empréstimo duplo  {len(duplos)}')
+    print(f'  livros com disponivel errado {len(inconsistentes)}')
+    return 1 if duplos or inconsistentes else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
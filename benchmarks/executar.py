@@ -0,0 +1,475 @@
+"""Benchmark de todas as rotas da API sobre um banco gerado por benchmarks.gerador.
+
+Roda cada cenário pelo test client do Flask numa cópia do banco (as escritas
+não alteram o arquivo original) e mede, por cenário: latência p50/p99,
+instruções SQL por requisição e pico de memória alocada (tracemalloc, numa
+passada separada para não distorcer a latência). Avisa quando alguma rota
+registrada não tem cenário.
+
+Com --salvar-base grava o resultado em JSON; com --base compara contra um
+arquivo salvo e sai com código 1 se algum cenário regrediu além da
+tolerância (latência e memória) ou passou a fazer mais consultas.
+
+    python -m benchmarks.gerador --preset medio --banco /tmp/bench_medio.db
+    python -m benchmarks.executar --banco /tmp/bench_medio.db --salvar-base benchmarks/base_medio.json
+    python -m benchmarks.executar --banco /tmp/bench_medio.db --base benchmarks/base_medio.json
+    python -m benchmarks.executar --banco /tmp/bench_medio.db --filtro emprestimos --repeticoes 100
+"""
+import argparse
+import io
+import json
+import logging
+import math
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app, db  # noqa: E402
+from utils.instrumentacao import contar_consultas  # noqa: E402
+
+# Diferenças abaixo disso são ruído, qualquer que seja a tolerância relativa
+FOLGA_LATENCIA_MS = 2.0
+FOLGA_MEMORIA_KB = 256
+
+
+class Cenario:
+    """Uma chamada a uma rota. `montar(contexto, i)` devolve (caminho, kwargs do test client).
+
+    Cenários `pesados` (listagens completas, exportações) rodam menos vezes.
+    """
+
+    def __init__(self, nome, endpoint, metodo, montar, pesado=False):
+        self.nome = nome
+        self.endpoint = endpoint
+        self.metodo = metodo
+        self.montar = montar
+        self.pesado = pesado
+
+
+def get(nome, endpoint, caminho, pesado=False):
+    """Leitura: `caminho` pode usar {livro}, {membro}, {avaliacao}, {wishlist} e {emprestimo}."""
+    def montar(contexto, i):
+        return caminho.format(**contexto.sortear()), {}
+    return Cenario(nome, endpoint, 'GET', montar, pesado)
+
+
+class Contexto:
+    """Ids do banco sorteados pelos cenários e filas que ligam escritas dependentes.
+
+    Ex.: emprestar põe o id do empréstimo criado em `filas['emprestimos']` e
+    devolver consome dessa fila.
+    """
+
+    def __init__(self, semente):
+        self.aleatorio = random.Random(semente)
+        self.ids = {}
+        self.livros_disponiveis = []
+        self.filas = {'emprestimos': [], 'livros': [], 'avaliacoes': [], 'wishlist': []}
+        self.sequencia = 0
+
+    def carregar(self, app):
+        from models.avaliacao import Avaliacao
+        from models.emprestimo import Emprestimo
+        from models.livro import Livro
+        from models.membro import Membro
+        from models.wishlist import Wishlist
+
+        def amostra(coluna, *filtros, quantidade=1000):
+            # Sorteio em Python (o random() do SQLite não aceita semente): mesmos ids a cada execução
+            ids = list(db.session.execute(db.select(coluna).where(*filtros).order_by(coluna)).scalars())
+            return self.aleatorio.sample(ids, min(quantidade, len(ids)))
+
+        with app.app_context():
+            self.ids = {
+                'livro': amostra(Livro.id_livro),
+                'membro': amostra(Membro.id_membro, Membro.ativo.is_(True)),
+                'avaliacao': amostra(Avaliacao.id_avaliacao),
+                'wishlist': amostra(Wishlist.id_wishlist),
+                'emprestimo': amostra(Emprestimo.id_emprestimo),
+            }
+            self.livros_disponiveis = amostra(Livro.id_livro, Livro.disponivel.is_(True), quantidade=5000)
+        vazios = [nome for nome, ids in self.ids.items() if not ids]
+        if vazios:
+            raise SystemExit(f'Banco sem dados em: {", ".join(vazios)} (gere com benchmarks.gerador)')
+
+    def sortear(self):
+        return {nome: self.aleatorio.choice(ids) for nome, ids in self.ids.items()}
+
+    def proximo(self):
+        self.sequencia += 1
+        return self.sequencia
+
+
+# Escritas -----------------------------------------------------------------------
+# Cada cenário de escrita cria o que o seguinte consome; a ordem do catálogo importa.
+
+def emprestar(contexto, i):
+    return '/api/emprestimos', {'json': {
+        'id_livro': contexto.livros_disponiveis.pop(),
+        'id_membro': contexto.sortear()['membro']
+    }}
+
+
+def devolver(contexto, i):
+    return f'/api/emprestimos/{contexto.filas["emprestimos"].pop()}/devolver', {}
+
+
+def criar_livro(contexto, i):
+    n = contexto.proximo()
+    return '/api/livros', {'json': {
+        'titulo': f'Livro de benchmark {n}',
+        'autor': 'Autora de Benchmark',
+        'isbn': f'979{n:010d}',
+        'genero': 'Mistério',
+        'num_paginas': 240,
+        'sinopse': 'Uma investigação conduzida por uma detetive aposentada reabre um caso esquecido.'
+    }}
+
+
+def atualizar_livro(contexto, i):
+    return f'/api/livros/{contexto.sortear()["livro"]}', {'json': {
+        'localizacao': f'Estante B, Prateleira {i % 6 + 1}',
+        'sinopse': f'Nova edição revista ({i}). Um mistério que atravessa gerações.'
+    }}
+
+
+def importar(contexto, i):
+    saida = io.StringIO()
+    saida.write('titulo,autor,isbn,genero,num_paginas\n')
+    for _ in range(20):
+        n = contexto.proximo()
+        saida.write(f'Importado {n},Autor Importado,979{n:010d},Romance,180\n')
+    return '/api/livros/import?formato=csv', {'data': saida.getvalue().encode(), 'content_type': 'text/csv'}
+
+
+def avaliar(contexto, i):
+    # Livros recém-criados ainda não têm avaliação: o par (membro, livro) é sempre novo
+    return '/api/avaliacoes', {'json': {
+        'id_livro': contexto.filas['livros'][i % len(contexto.filas['livros'])],
+        'id_membro': contexto.ids['membro'][i // len(contexto.filas['livros']) % len(contexto.ids['membro'])],
+        'nota': i % 5 + 1,
+        'comentario': 'Leitura leve, ótima para as férias.',
+        'tags': 'benchmark,leitura rapida'
+    }}
+
+
+def atualizar_avaliacao(contexto, i):
+    fila = contexto.filas['avaliacoes']
+    return f'/api/avaliacoes/{fila[i % len(fila)]}', {'json': {'nota': (i + 2) % 5 + 1, 'tags': 'benchmark,releitura'}}
+
+
+def deletar_avaliacao(contexto, i):
+    return f'/api/avaliacoes/{contexto.filas["avaliacoes"].pop()}', {}
+
+
+def deletar_livro(contexto, i):
+    return f'/api/livros/{contexto.filas["livros"].pop()}', {}
+
+
+def desejar(contexto, i):
+    n = contexto.proximo()
+    return '/api/wishlist', {'json': {
+        'id_membro': contexto.sortear()['membro'],
+        'titulo_desejado': f'Desejo de benchmark {n}',
+        'autor_desejado': 'Autor Desejado',
+        'prioridade': 'alta'
+    }}
+
+
+def atualizar_desejo(contexto, i):
+    fila = contexto.filas['wishlist']
+    return f'/api/wishlist/{fila[i % len(fila)]}', {'json': {'prioridade': 'baixa', 'notas': f'Atualizado {i}'}}
+
+
+def comprar(contexto, i):
+    return f'/api/wishlist/{contexto.filas["wishlist"].pop()}/comprar', {'json': {'num_paginas': 200}}
+
+
+def deletar_desejo(contexto, i):
+    # Os criados por desejar já foram comprados; remove itens do próprio banco (as leituras já rodaram)
+    return f'/api/wishlist/{contexto.ids["wishlist"].pop()}', {}
+
+
+# O que cada escrita bem-sucedida põe numa fila (fila, função que lê o id da resposta)
+PRODUZ = {
+    'emprestimos.realizar_emprestimo': ('emprestimos', lambda r: r['id_emprestimo']),
+    'livros.criar_livro': ('livros', lambda r: r['id_livro']),
+    'avaliacoes.criar_avaliacao': ('avaliacoes', lambda r: r['id_avaliacao']),
+    'wishlist.adicionar_wishlist': ('wishlist', lambda r: r['id_wishlist']),
+}
+
+CENARIOS = [
+    # Livros
+    get('livros', 'livros.listar_livros', '/api/livros?limit=50'),
+    get('livros filtrados', 'livros.listar_livros', '/api/livros?genero=Romance&disponivel=true&limit=50'),
+    get('livros campos', 'livros.listar_livros', '/api/livros?limit=50&fields=id_livro,titulo,autor,capa_url'),
+    get('livros completo', 'livros.listar_livros', '/api/livros', pesado=True),
+    get('livro', 'livros.buscar_livro', '/api/livros/{livro}'),
+    get('livros similares', 'livros.livros_similares', '/api/livros/{livro}/similares'),
+    get('busca', 'livros.buscar_livros_texto', '/api/livros/busca?q=segredo'),
+    get('busca prefixo', 'livros.buscar_livros_texto', '/api/livros/busca?q=mem'),
+    get('facetas', 'livros.facetas_livros', '/api/livros/facetas'),
+    # Membros e pontos
+    get('membros', 'membros.listar_membros', '/api/membros?limit=50'),
+    get('recomendacoes', 'membros.recomendacoes_membro', '/api/membros/{membro}/recomendacoes'),
+    get('extrato pontos', 'membros.extrato_pontos', '/api/membros/{membro}/pontos'),
+    get('ranking membro', 'membros.ranking_membro', '/api/membros/{membro}/ranking'),
+    get('ranking', 'ranking.listar_ranking', '/api/ranking?limit=20'),
+    get('ranking semana', 'ranking.listar_ranking', '/api/ranking?periodo=semana&limit=20'),
+    # Empréstimos
+    get('emprestimos', 'emprestimos.listar_emprestimos', '/api/emprestimos?limit=50'),
+    get('emprestimos atrasados', 'emprestimos.listar_emprestimos', '/api/emprestimos?status=atrasado&limit=50'),
+    get('emprestimos completo', 'emprestimos.listar_emprestimos', '/api/emprestimos', pesado=True),
+    get('emprestimos membro', 'emprestimos.listar_emprestimos_membro', '/api/emprestimos/membro/{membro}?limit=50'),
+    # Avaliações e tags
+    get('avaliacao', 'avaliacoes.buscar_avaliacao', '/api/avaliacoes/{avaliacao}'),
+    get('avaliacoes livro', 'avaliacoes.listar_avaliacoes_livro', '/api/avaliacoes/livro/{livro}'),
+    get('avaliacoes membro', 'avaliacoes.listar_avaliacoes_membro', '/api/avaliacoes/membro/{membro}?limit=50'),
+    get('avaliacoes top', 'avaliacoes.livros_mais_bem_avaliados', '/api/avaliacoes/top'),
+    get('tags', 'tags.listar_tags', '/api/tags'),
+    get('tags prefixo', 'tags.listar_tags', '/api/tags?q=a'),
+    # Lista de desejos
+    get('wishlist', 'wishlist.listar_wishlist', '/api/wishlist?limit=50'),
+    get('wishlist item', 'wishlist.buscar_wishlist_item', '/api/wishlist/{wishlist}'),
+    get('wishlist sugestoes', 'wishlist.livros_mais_desejados', '/api/wishlist/sugestoes'),
+    # Estatísticas e exportação
+    get('estatisticas', 'estatisticas.obter_estatisticas', '/api/estatisticas'),
+    get('estatisticas fresh', 'estatisticas.obter_estatisticas', '/api/estatisticas?fresh=true', pesado=True),
+    get('export livros', 'exportacao.exportar', '/api/export/livros', pesado=True),
+    get('export emprestimos', 'exportacao.exportar', '/api/export/emprestimos', pesado=True),
+    get('export avaliacoes gzip', 'exportacao.exportar', '/api/export/avaliacoes?formato=csv&gzip=true', pesado=True),
+    get('debug consultas', 'debug.listar_consultas', '/api/debug/consultas'),
+    # Escritas
+    Cenario('emprestar', 'emprestimos.realizar_emprestimo', 'POST', emprestar),
+    Cenario('devolver', 'emprestimos.devolver_livro', 'PUT', devolver),
+    Cenario('criar livro', 'livros.criar_livro', 'POST', criar_livro),
+    Cenario('atualizar livro', 'livros.atualizar_livro', 'PUT', atualizar_livro),
+    Cenario('importar csv', 'livros.importar_catalogo', 'POST', importar),
+    Cenario('avaliar', 'avaliacoes.criar_avaliacao', 'POST', avaliar),
+    Cenario('atualizar avaliacao', 'avaliacoes.atualizar_avaliacao', 'PUT', atualizar_avaliacao),
+    Cenario('deletar avaliacao', 'avaliacoes.deletar_avaliacao', 'DELETE', deletar_avaliacao),
+    Cenario('deletar livro', 'livros.deletar_livro', 'DELETE', deletar_livro),
+    Cenario('desejar', 'wishlist.adicionar_wishlist', 'POST', desejar),
+    Cenario('atualizar desejo', 'wishlist.atualizar_wishlist', 'PUT', atualizar_desejo),
+    Cenario('comprar desejo', 'wishlist.marcar_como_comprado', 'POST', comprar),
+    Cenario('deletar desejo', 'wishlist.deletar_wishlist', 'DELETE', deletar_desejo),
+]
+
+
+def percentil(valores, p):
+    """Percentil pelo método do posto mais próximo."""
+    ordenados = sorted(valores)
+    return ordenados[max(math.ceil(p / 100 * len(ordenados)) - 1, 0)]
+
+
+def chamar(cliente, cenario, contexto, i):
+    caminho, kwargs = cenario.montar(contexto, i)
+    resposta = getattr(cliente, cenario.metodo.lower())(caminho, **kwargs)
+    # Consome o corpo (streaming das exportações) dentro da medição
+    corpo = resposta.get_data()
+    if cenario.endpoint in PRODUZ and resposta.status_code in (200, 201):
+        fila, ler_id = PRODUZ[cenario.endpoint]
+        contexto.filas[fila].append(ler_id(json.loads(corpo)))
+    return resposta.status_code
+
+
+def medir(cliente, cenario, contexto, repeticoes, repeticoes_memoria):
+    """Aquece com uma chamada, mede latência e consultas e, à parte, o pico de memória."""
+    chamar(cliente, cenario, contexto, 0)
+
+    tempos, consultas, erros = [], [], 0
+    for i in range(1, repeticoes + 1):
+        with contar_consultas() as coletor:
+            inicio = time.perf_counter()
+            status = chamar(cliente, cenario, contexto, i)
+            tempos.append((time.perf_counter() - inicio) * 1000)
+        consultas.append(coletor.total)
+        erros += status >= 400
+
+    picos = []
+    tracemalloc.start()
+    try:
+        for i in range(repeticoes + 1, repeticoes + 1 + repeticoes_memoria):
+            tracemalloc.reset_peak()
+            base, _ = tracemalloc.get_traced_memory()
+            erros += chamar(cliente, cenario, contexto, i) >= 400
+            picos.append(tracemalloc.get_traced_memory()[1] - base)
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'p50_ms': round(percentil(tempos, 50), 3),
+        'p99_ms': round(percentil(tempos, 99), 3),
+        'consultas': round(statistics.median(consultas), 1),
+        'pico_kb': round(max(picos) / 1024, 1) if picos else None,
+        'repeticoes': repeticoes,
+        'erros': erros,
+    }
+
+
+def calibrar():
+    """Tempo (ms) de uma carga fixa de CPU, para descontar máquina mais lenta ou ocupada na comparação."""
+    tempos = []
+    for _ in range(7):
+        inicio = time.perf_counter()
+        dados = [{'id': i, 'titulo': f'Livro {i}', 'nota': i % 5} for i in range(20_000)]
+        json.dumps(sorted(dados, key=lambda d: (d['nota'], -d['id'])))
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    # O mínimo é o que menos sofre com interferência de outros processos
+    return round(min(tempos), 3)
+
+
+def copiar_banco(origem, destino):
+    """Cópia consistente (API de backup do SQLite), inclusive com WAL pendente."""
+    fonte = sqlite3.connect(f'file:{origem}?mode=ro', uri=True)
+    alvo = sqlite3.connect(destino)
+    try:
+        fonte.backup(alvo)
+    finally:
+        fonte.close()
+        alvo.close()
+
+
+def comparar(atual, base, tolerancia, fator=1.0):
+    """Lista de (cenário, descrição) das regressões em relação à base.
+
+    `fator` é a razão entre a calibração desta execução e a da base: as
+    latências são divididas por ele antes da comparação.
+    """
+    regressoes = []
+    for nome, medida in atual.items():
+        anterior = base.get(nome)
+        if not anterior:
+            continue
+        # A cauda oscila mais que a mediana entre execuções: tolerância dobrada no p99
+        limites = (
+            ('p50_ms', tolerancia, FOLGA_LATENCIA_MS),
+            ('p99_ms', 2 * tolerancia, FOLGA_LATENCIA_MS),
+            ('pico_kb', tolerancia, FOLGA_MEMORIA_KB),
+        )
+        for chave, relativa, folga in limites:
+            novo, velho = medida.get(chave), anterior.get(chave)
+            if novo is None or velho is None:
+                continue
+            if chave.endswith('_ms'):
+                novo = round(novo / fator, 3)
+            if novo > velho * (1 + relativa) and novo - velho > folga:
+                regressoes.append((nome, f'{chave} {velho} -> {novo}'))
+        # Mediana de escritas com vizinhos sorteados pode oscilar meia consulta
+        if medida['consultas'] - anterior['consultas'] >= 1:
+            regressoes.append((nome, f'consultas {anterior["consultas"]} -> {medida["consultas"]}'))
+    return regressoes
+
+
+def variacao(medida, anterior, chave, fator):
+    if not anterior or not anterior.get(chave) or medida.get(chave) is None:
+        return ''
+    return f'{(medida[chave] / fator / anterior[chave] - 1) * 100:+.0f}%'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--banco', required=True, help='banco gerado por benchmarks.gerador (não é alterado)')
+    parser.add_argument('--repeticoes', type=int, default=30, help='chamadas medidas por cenário')
+    parser.add_argument('--repeticoes-memoria', type=int, default=3, help='chamadas com tracemalloc por cenário')
+    parser.add_argument('--filtro', default='', help='só cenários cujo nome ou endpoint contém o texto')
+    parser.add_argument('--com-cache', action='store_true', help='liga o cache de respostas (padrão: desligado)')
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--base', help='JSON salvo com --salvar-base para comparar')
+    parser.add_argument('--tolerancia', type=float, default=0.25, help='piora relativa aceita (0.25 = 25%%)')
+    parser.add_argument('--salvar-base', help='grava o resultado neste JSON')
+    args = parser.parse_args()
+
+    origem = os.path.abspath(args.banco)
+    if not os.path.exists(origem):
+        parser.error(f'{origem} não existe; gere com python -m benchmarks.gerador')
+    base, fator = None, 1.0
+    calibracao = calibrar()
+    if args.base:
+        with open(args.base, encoding='utf-8') as arquivo:
+            salvo = json.load(arquivo)
+        base = salvo['cenarios']
+        fator = calibracao / salvo['calibracao_ms']
+        print(f'calibração {calibracao} ms (base {salvo["calibracao_ms"]} ms): latências divididas por {fator:.2f}')
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        caminho = os.path.join(diretorio, 'bench.db')
+        copiar_banco(origem, caminho)
+        app = create_app({
+            'SQLALCHEMY_DATABASE_URI': f'sqlite:///{caminho}',
+            'AGENDADOR_ATIVO': False,
+            'CACHE_RESPOSTAS_BYTES': (32 * 1024 * 1024) if args.com_cache else 0,
+        })
+        # Índice de similares e modelo de recomendações ficam junto da cópia, não em instance/
+        app.instance_path = os.path.join(diretorio, 'instance')
+        # Os avisos de N+1 repetiriam a cada chamada; a coluna de consultas já mostra o número
+        app.logger.setLevel(logging.ERROR)
+        with app.app_context():
+            # Como no deploy: as rotas não montam o índice nem treinam o modelo
+            from services.recomendacao import treinar_e_salvar
+            from services.similares import reconstruir_indice
+            reconstruir_indice()
+            treinar_e_salvar()
+        contexto = Contexto(args.semente)
+        contexto.carregar(app)
+
+        registrados = {
+            regra.endpoint for regra in app.url_map.iter_rules() if regra.rule.startswith('/api/')
+        }
+        cobertos = {cenario.endpoint for cenario in CENARIOS}
+        for endpoint in sorted(registrados - cobertos):
+            print(f'aviso: rota sem cenário de benchmark: {endpoint}', file=sys.stderr)
+
+        selecionados = [
+            cenario for cenario in CENARIOS
+            if cenario.endpoint in registrados and (args.filtro in cenario.nome or args.filtro in cenario.endpoint)
+        ]
+        cliente = app.test_client()
+        resultados = {}
+        print(f'{"cenário":<26} {"p50 ms":>9} {"p99 ms":>9} {"Δp50":>6} {"consultas":>9} {"pico KB":>10} {"erros":>5}')
+        for cenario in selecionados:
+            repeticoes = max(3, args.repeticoes // 10) if cenario.pesado else args.repeticoes
+            try:
+                medida = medir(cliente, cenario, contexto, repeticoes, args.repeticoes_memoria)
+            except IndexError:
+                # Escrita que consome o que outro cenário cria (ex.: devolver sem emprestar)
+                print(f'{cenario.nome:<26} sem dados: selecione também o cenário que os cria')
+                continue
+            resultados[cenario.nome] = medida
+            anterior = (base or {}).get(cenario.nome)
+            print(
+                f'{cenario.nome:<26} {medida["p50_ms"]:>9.2f} {medida["p99_ms"]:>9.2f} '
+                f'{variacao(medida, anterior, "p50_ms", fator):>6} {medida["consultas"]:>9} '
+                f'{medida["pico_kb"] if medida["pico_kb"] is not None else "-":>10} {medida["erros"]:>5}'
+            )
+
+    if args.salvar_base:
+        with open(args.salvar_base, 'w', encoding='utf-8') as arquivo:
+            json.dump({
+                'banco': os.path.basename(origem),
+                'gerado_em': datetime.now().isoformat(timespec='seconds'),
+                'python': sys.version.split()[0],
+                'calibracao_ms': calibracao,
+                'cenarios': resultados
+            }, arquivo, ensure_ascii=False, indent=2)
+        print(f'base salva em {args.salvar_base}')
+
+    falhas = [nome for nome, medida in resultados.items() if medida['erros']]
+    for nome in falhas:
+        print(f'ERRO: {nome} respondeu com status >= 400', file=sys.stderr)
+    regressoes = comparar(resultados, base, args.tolerancia, fator) if base is not None else []
+    for nome, descricao in regressoes:
+        print(f'REGRESSÃO: {nome}: {descricao}', file=sys.stderr)
+    return 1 if falhas or regressoes else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,450 @@
+"""Gerador de dados sintéticos para benchmarks.
+
+Cria um banco com membros, livros (títulos, autores e sinopses em
+português), empréstimos com devoluções no prazo, atrasadas e em aberto,
+avaliações com tags, lista de desejos e o livro-razão de pontos. A mesma
+semente e a mesma data de referência geram sempre o mesmo banco.
+
+    python -m benchmarks.gerador --preset medio --banco /tmp/bench_medio.db
+    python -m benchmarks.gerador --preset grande --banco /tmp/bench_grande.db --semente 7
+
+Presets (membros / livros / empréstimos / avaliações / desejos):
+
+    minimo    10 /     200 /     1.000 /     500 /    100
+    pequeno   50 /   2.000 /    10.000 /   5.000 /  1.000
+    medio    300 /  20.000 /   100.000 /  50.000 / 10.000
+    grande 2.000 / 100.000 / 1.000.000 / 300.000 / 50.000
+"""
+import argparse
+import bisect
+import itertools
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app, db  # noqa: E402
+
+PRESETS = {
+    'minimo': dict(membros=10, livros=200, emprestimos=1_000, avaliacoes=500, desejos=100),
+    'pequeno': dict(membros=50, livros=2_000, emprestimos=10_000, avaliacoes=5_000, desejos=1_000),
+    'medio': dict(membros=300, livros=20_000, emprestimos=100_000, avaliacoes=50_000, desejos=10_000),
+    'grande': dict(membros=2_000, livros=100_000, emprestimos=1_000_000, avaliacoes=300_000, desejos=50_000),
+}
+
+TAMANHO_LOTE = 10_000
+# Janela de histórico dos empréstimos e menor intervalo médio entre dois empréstimos do mesmo livro
+ANOS_HISTORICO = 3
+INTERVALO_MINIMO_DIAS = 3
+
+NOMES = [
+    'Ana', 'Beatriz', 'Camila', 'Daniela', 'Eduarda', 'Fernanda', 'Gabriela', 'Helena', 'Isabela', 'Júlia',
+    'Larissa', 'Mariana', 'Natália', 'Olívia', 'Patrícia', 'Rafaela', 'Sofia', 'Tatiana', 'Valentina', 'Yasmin',
+    'André', 'Bruno', 'Carlos', 'Diego', 'Eduardo', 'Felipe', 'Gustavo', 'Henrique', 'Igor', 'João',
+    'Lucas', 'Marcelo', 'Nicolas', 'Otávio', 'Pedro', 'Rafael', 'Samuel', 'Thiago', 'Vinícius', 'Miguel'
+]
+SOBRENOMES = [
+    'Silva', 'Santos', 'Oliveira', 'Souza', 'Rodrigues', 'Ferreira', 'Alves', 'Pereira', 'Lima', 'Gomes',
+    'Costa', 'Ribeiro', 'Martins', 'Carvalho', 'Almeida', 'Lopes', 'Soares', 'Fernandes', 'Vieira', 'Barbosa',
+    'Rocha', 'Dias', 'Nascimento', 'Andrade', 'Moreira', 'Nunes', 'Marques', 'Machado', 'Mendes', 'Freitas'
+]
+
+GENEROS = {
+    'Romance': ['Romance histórico', 'Romance contemporâneo', 'Romance epistolar'],
+    'Ficção científica': ['Distopia', 'Space opera', 'Cyberpunk'],
+    'Fantasia': ['Alta fantasia', 'Fantasia urbana', 'Contos de fadas'],
+    'Mistério': ['Policial', 'Suspense psicológico', 'Noir'],
+    'Infantil': ['Fábulas', 'Aventura infantil', 'Livro ilustrado'],
+    'Juvenil': ['Aventura', 'Coming of age', 'Fantasia juvenil'],
+    'Biografia': ['Memórias', 'Autobiografia', 'Perfil'],
+    'História': ['Brasil colonial', 'Segunda Guerra', 'Antiguidade'],
+    'Poesia': ['Modernismo', 'Poesia contemporânea', 'Cordel'],
+    'Ciência': ['Divulgação científica', 'Astronomia', 'Biologia'],
+    'Autoajuda': ['Produtividade', 'Relacionamentos', 'Bem-estar'],
+    'Culinária': ['Cozinha brasileira', 'Confeitaria', 'Vegetariana'],
+}
+# Gêneros mais comuns aparecem mais no acervo
+PESOS_GENEROS = [18, 8, 10, 12, 10, 9, 5, 6, 4, 5, 6, 7]
+
+ARTIGOS = ['O', 'A', 'Os', 'As']
+SUBSTANTIVOS = [
+    'Segredo', 'Casa', 'Rio', 'Jardim', 'Viagem', 'Sombra', 'Cidade', 'Ilha', 'Memória', 'Carta',
+    'Estrela', 'Floresta', 'Noite', 'Janela', 'Livro', 'Mar', 'Sertão', 'Caminho', 'Relógio', 'Ponte',
+    'Guerra', 'Herança', 'Promessa', 'Canção', 'Montanha', 'Porto', 'Fazenda', 'Biblioteca', 'Chave', 'Travessia'
+]
+ADJETIVOS = [
+    'Perdido', 'Esquecido', 'Silencioso', 'Azul', 'Antigo', 'Distante', 'Secreto', 'Eterno', 'Partido',
+    'Invisível', 'Dourado', 'Selvagem', 'Último', 'Primeiro', 'Estrangeiro', 'Proibido'
+]
+LUGARES = [
+    'Ouro Preto', 'Salvador', 'Lisboa', 'Minas', 'Recife', 'Manaus', 'Paraty', 'Olinda', 'Porto Alegre',
+    'Belém', 'São Luís', 'Petrópolis', 'Diamantina', 'Florianópolis', 'Cuiabá'
+]
+EDITORAS = [
+    'Companhia das Letras', 'Record', 'Rocco', 'Intrínseca', 'Sextante', 'Globo Livros', 'Arqueiro',
+    'Zahar', 'Todavia', 'Autêntica', 'Moderna', 'Ática', 'Saraiva', 'Planeta', 'Martins Fontes'
+]
+FRASES_SINOPSE = [
+    'Nesta história, {nome} descobre que {objeto} guarda mais segredos do que parece.',
+    'Entre {lugar} e o interior, uma família precisa enfrentar o passado.',
+    'Uma narrativa sobre amizade, perda e recomeços.',
+    '{nome} parte em uma viagem que vai mudar sua vida para sempre.',
+    'Com humor e delicadeza, o livro revela o cotidiano de uma pequena cidade.',
+    'Um mistério que atravessa gerações e começa com {objeto} encontrada no sótão.',
+    'Baseado em fatos reais, o relato acompanha décadas de transformações em {lugar}.',
+    'Ilustrações encantadoras acompanham esta aventura para toda a família.',
+    'Uma investigação conduzida por {nome}, detetive aposentada, reabre um caso esquecido.',
+    'Ao receber {objeto}, {nome} entende que nada será como antes.',
+    'Uma reflexão sobre tempo, memória e o que deixamos para trás.',
+]
+OBJETOS = ['uma carta antiga', 'um mapa rasgado', 'uma chave de ferro', 'um diário', 'uma fotografia', 'um relógio parado']
+IDADES_RECOMENDADAS = ['Todas', '10+', '14+', '18+']
+ESTADOS = ['Novo', 'Bom', 'Regular', 'Ruim']
+ORIGENS = ['Comprado', 'Presente', 'Herdado', 'Troca', 'Sebo']
+IDIOMAS = ['Português', 'Inglês', 'Espanhol', 'Francês']
+COMENTARIOS = [
+    'Adorei a história, não consegui parar de ler.',
+    'Leitura leve, ótima para as férias.',
+    'O final me surpreendeu.',
+    'Achei o começo lento, mas depois melhora muito.',
+    'Personagens muito bem construídos.',
+    'Não gostei tanto quanto esperava.',
+    'Recomendo para toda a família.',
+    'Li em voz alta com as crianças, todos gostaram.',
+    'Um clássico que vale a releitura.',
+    'A escrita é linda, cheia de imagens.',
+]
+TAGS = [
+    'aventura', 'emocionante', 'classico', 'divertido', 'triste', 'reflexivo', 'para criancas',
+    'suspense', 'romantico', 'historico', 'leitura rapida', 'releitura', 'inspirador', 'assustador'
+]
+PRIORIDADES = ['alta', 'média', 'baixa']
+
+
+class Gerador:
+
+    def __init__(self, semente, hoje):
+        self.aleatorio = random.Random(semente)
+        self.hoje = hoje
+        self.inicio_historico = hoje - timedelta(days=365 * ANOS_HISTORICO)
+
+    def nome_pessoa(self):
+        a = self.aleatorio
+        return f'{a.choice(NOMES)} {a.choice(SOBRENOMES)}'
+
+    def data_entre(self, inicio, fim):
+        return inicio + timedelta(seconds=self.aleatorio.uniform(0, max((fim - inicio).total_seconds(), 0)))
+
+    # Membros -------------------------------------------------------------------
+
+    def membros(self, quantidade):
+        a = self.aleatorio
+        for i in range(quantidade):
+            idade = a.choice([a.randint(5, 12), a.randint(13, 17), a.randint(18, 80), a.randint(18, 80)])
+            tipo = 'administrador' if i == 0 else ('criança' if idade < 12 else 'membro')
+            yield {
+                'id_membro': i + 1,
+                'nome': self.nome_pessoa(),
+                'email': f'membro{i + 1}@biblioteca.local',
+                'apelido': a.choice([None, None, a.choice(NOMES)[:4]]),
+                'idade': idade,
+                'tipo': tipo,
+                'avatar_cor': '#%06X' % a.randrange(0x1000000),
+                'generos_favoritos': ','.join(a.sample(list(GENEROS), a.randint(1, 3))),
+                'data_cadastro': self.data_entre(self.inicio_historico - timedelta(days=365), self.inicio_historico),
+                'ativo': a.random() > 0.03,
+                'pontos_leitura': 0,
+                'id_ultimo_lancamento': 0,
+            }
+
+    # Livros --------------------------------------------------------------------
+
+    def titulo(self):
+        a = self.aleatorio
+        forma = a.randrange(5)
+        if forma == 0:
+            return f'{a.choice(ARTIGOS)} {a.choice(SUBSTANTIVOS)} {a.choice(ADJETIVOS)}'
+        if forma == 1:
+            return f'{a.choice(ARTIGOS)} {a.choice(SUBSTANTIVOS)} de {a.choice(LUGARES)}'
+        if forma == 2:
+            return f'Memórias de {a.choice(NOMES)}'
+        if forma == 3:
+            return f'{a.choice(SUBSTANTIVOS)} e {a.choice(SUBSTANTIVOS).lower()}'
+        return f'{a.choice(ARTIGOS)} {a.choice(SUBSTANTIVOS)} {a.choice(ADJETIVOS)} de {a.choice(NOMES)}'
+
+    def sinopse(self):
+        a = self.aleatorio
+        return ' '.join(
+            frase.format(nome=a.choice(NOMES), lugar=a.choice(LUGARES), objeto=a.choice(OBJETOS))
+            for frase in a.sample(FRASES_SINOPSE, a.randint(2, 4))
+        )
+
+    def livros(self, quantidade):
+        a = self.aleatorio
+        autores = [self.nome_pessoa() for _ in range(max(quantidade // 6, 10))]
+        generos = list(GENEROS)
+        for i in range(quantidade):
+            genero = a.choices(generos, PESOS_GENEROS)[0]
+            yield {
+                'id_livro': i + 1,
+                'isbn': f'978{i + 1:010d}',
+                'titulo': self.titulo(),
+                'autor': a.choice(autores),
+                'editora': a.choice(EDITORAS),
+                'ano_publicacao': a.randint(1900, self.hoje.year),
+                'genero': genero,
+                'subgenero': a.choice(GENEROS[genero]),
+                'idioma': a.choices(IDIOMAS, [85, 8, 4, 3])[0],
+                'num_paginas': a.randint(24, 120) if genero == 'Infantil' else a.randint(80, 900),
+                'idade_recomendada': 'Todas' if genero == 'Infantil' else a.choices(IDADES_RECOMENDADAS, [50, 20, 20, 10])[0],
+                'localizacao': f'Estante {a.choice("ABCDEFGHIJ")}, Prateleira {a.randint(1, 6)}',
+                'estado_conservacao': a.choices(ESTADOS, [15, 55, 22, 8])[0],
+                'disponivel': True,
+                'capa_url': f'https://capas.biblioteca.local/{i + 1}.jpg' if a.random() < 0.7 else None,
+                'sinopse': self.sinopse() if a.random() < 0.9 else None,
+                'data_aquisicao': self.data_entre(self.hoje - timedelta(days=365 * 10), self.hoje - timedelta(days=30)),
+                'origem': a.choice(ORIGENS),
+                'valor_estimado': round(a.uniform(10, 300), 2),
+                'classicos_familia': a.random() < 0.03,
+            }
+
+    # Empréstimos ---------------------------------------------------------------
+
+    def distribuir(self, total, quantidade_livros, maximo):
+        """Empréstimos por livro: poucos livros muito procurados, cauda longa de pouco lidos.
+
+        Nenhum livro passa de `maximo` (o que cabe em sequência na janela); o
+        excedente vai para outros livros.
+        """
+        a = self.aleatorio
+        pesos = [1 / (posicao + 10) ** 0.7 for posicao in range(quantidade_livros)]
+        acumulados = list(itertools.accumulate(pesos))
+        contagem = [0] * quantidade_livros
+        restantes = min(total, maximo * quantidade_livros)
+        while restantes:
+            posicao = bisect.bisect_left(acumulados, a.random() * acumulados[-1])
+            if contagem[posicao] < maximo:
+                contagem[posicao] += 1
+                restantes -= 1
+            else:
+                posicao = a.randrange(quantidade_livros)
+                if contagem[posicao] < maximo:
+                    contagem[posicao] += 1
+                    restantes -= 1
+        a.shuffle(contagem)
+        return contagem
+
+    def duracao(self, prazo):
+        """~70% voltam no prazo, ~25% com alguns dias de atraso e ~5% muito atrasados."""
+        a = self.aleatorio
+        sorteio = a.random()
+        if sorteio < 0.70:
+            return timedelta(days=a.uniform(1, prazo))
+        if sorteio < 0.95:
+            return timedelta(days=prazo + a.expovariate(1 / 7))
+        return timedelta(days=prazo + a.uniform(30, 120))
+
+    def emprestimos(self, total, livros, membros):
+        """Empréstimos em sequência por livro, sem dois abertos ao mesmo tempo.
+
+        Cada devolução acontece antes do empréstimo seguinte do mesmo livro; o
+        último pode continuar em aberto (ativo ou atrasado). Retorna (linhas,
+        ids dos livros emprestados agora).
+        """
+        a = self.aleatorio
+        linhas, emprestados = [], set()
+        janela = (self.hoje - self.inicio_historico).total_seconds()
+        maximo = int(janela // (86400 * INTERVALO_MINIMO_DIAS))
+        for livro, quantidade in zip(livros, self.distribuir(total, len(livros), maximo)):
+            if not quantidade:
+                continue
+            # Início de cada empréstimo em uma grade (um por fatia da janela) com variação
+            fatia = janela / quantidade
+            inicios = [
+                self.inicio_historico + timedelta(seconds=fatia * (i + a.uniform(0.1, 0.9)))
+                for i in range(quantidade)
+            ]
+            for i, inicio in enumerate(inicios):
+                interno = a.random() < 0.85
+                prazo = 30 if interno else 14
+                devolucao = inicio + self.duracao(prazo)
+                proximo = inicios[i + 1] if i + 1 < quantidade else None
+                if proximo is not None:
+                    devolucao = min(devolucao, proximo - timedelta(hours=1))
+                aberto = devolucao >= self.hoje
+                prevista = inicio + timedelta(days=prazo)
+                linhas.append({
+                    'id_membro': a.choice(membros),
+                    'id_livro': livro['id_livro'],
+                    'data_emprestimo': inicio,
+                    'data_prevista_devolucao': prevista,
+                    'data_devolucao': None if aberto else devolucao,
+                    'tipo_emprestimo': 'interno' if interno else 'externo',
+                    'nome_amiga': None if interno else self.nome_pessoa(),
+                    'contato_emprestimo': None if interno else f'({a.randint(11, 99)}) 9{a.randint(1000, 9999)}-{a.randint(1000, 9999)}',
+                    'status': ('atrasado' if prevista < self.hoje else 'ativo') if aberto else 'devolvido',
+                    'observacoes': None,
+                })
+                if aberto:
+                    emprestados.add(livro['id_livro'])
+        linhas.sort(key=lambda e: e['data_emprestimo'])
+        return linhas, emprestados
+
+    # Avaliações e lista de desejos ---------------------------------------------
+
+    def avaliacoes(self, total, emprestimos, livros, membros):
+        """Avaliações únicas por (membro, livro); a maioria de quem leu o livro emprestado."""
+        a = self.aleatorio
+        lidos = [e for e in emprestimos if e['tipo_emprestimo'] == 'interno' and e['data_devolucao']]
+        vistos, linhas = set(), []
+        tentativas = 0
+        while len(linhas) < total and tentativas < total * 5:
+            tentativas += 1
+            if lidos and a.random() < 0.7:
+                emprestimo = a.choice(lidos)
+                par = (emprestimo['id_membro'], emprestimo['id_livro'])
+                data = emprestimo['data_devolucao'] + timedelta(hours=a.uniform(1, 240))
+            else:
+                livro = a.choice(livros)
+                par = (a.choice(membros), livro['id_livro'])
+                data = self.data_entre(max(livro['data_aquisicao'], self.inicio_historico), self.hoje)
+            if par in vistos:
+                continue
+            vistos.add(par)
+            linhas.append({
+                'id_membro': par[0],
+                'id_livro': par[1],
+                'nota': a.choices([1, 2, 3, 4, 5], [5, 8, 20, 37, 30])[0],
+                'comentario': a.choice(COMENTARIOS) if a.random() < 0.7 else None,
+                'recomenda_para_idade': a.choice([None, 'Todas', '10+', '14+']),
+                'tags': ','.join(a.sample(TAGS, a.randint(0, 3))) or None,
+                'data_avaliacao': min(data, self.hoje),
+                'leitura_completa': a.random() < 0.9,
+            })
+        linhas.sort(key=lambda r: r['data_avaliacao'])
+        return linhas
+
+    def desejos(self, total, livros, membros):
+        a = self.aleatorio
+        for _ in range(total):
+            do_catalogo = a.random() < 0.6
+            yield {
+                'id_membro': a.choice(membros),
+                'id_livro': a.choice(livros)['id_livro'] if do_catalogo else None,
+                'titulo_desejado': None if do_catalogo else self.titulo(),
+                'autor_desejado': None if do_catalogo else self.nome_pessoa(),
+                'prioridade': a.choices(PRIORIDADES, [20, 50, 30])[0],
+                'data_adicao': self.data_entre(self.inicio_historico, self.hoje),
+                'notas': a.choice([None, None, 'Presente de aniversário', 'Vi na livraria', 'Indicação da escola']),
+            }
+
+    @staticmethod
+    def lancamentos(emprestimos, avaliacoes):
+        """Pontos das devoluções (10 + 20 no prazo) e avaliações (15), como as rotas lançam."""
+        linhas = []
+        for id_emprestimo, e in enumerate(emprestimos, start=1):
+            if e['tipo_emprestimo'] != 'interno' or not e['data_devolucao']:
+                continue
+            linhas.append({'id_membro': e['id_membro'], 'pontos': 10, 'motivo': 'devolucao',
+                           'id_referencia': id_emprestimo, 'data_lancamento': e['data_devolucao']})
+            if e['data_devolucao'] <= e['data_prevista_devolucao']:
+                linhas.append({'id_membro': e['id_membro'], 'pontos': 20, 'motivo': 'devolucao_no_prazo',
+                               'id_referencia': id_emprestimo, 'data_lancamento': e['data_devolucao']})
+        for id_avaliacao, r in enumerate(avaliacoes, start=1):
+            linhas.append({'id_membro': r['id_membro'], 'pontos': 15, 'motivo': 'avaliacao',
+                           'id_referencia': id_avaliacao, 'data_lancamento': r['data_avaliacao']})
+        linhas.sort(key=lambda l: l['data_lancamento'])
+        return linhas
+
+
+def inserir(modelo, linhas):
+    """Insere em lotes (executemany), com commit por lote. Retorna quantas linhas gravou."""
+    total = 0
+    linhas = iter(linhas)
+    while True:
+        lote = list(itertools.islice(linhas, TAMANHO_LOTE))
+        if not lote:
+            return total
+        db.session.execute(db.insert(modelo), lote)
+        db.session.commit()
+        total += len(lote)
+
+
+def gerar(app, preset, semente=42, hoje=None, saida=print):
+    """Popula o banco do app (vazio) com o preset. Retorna {tabela: linhas}."""
+    from models.avaliacao import Avaliacao
+    from models.emprestimo import Emprestimo
+    from models.estatistica import EstatisticasSnapshot
+    from models.livro import Livro
+    from models.membro import Membro
+    from models.pontos import LancamentoPontos
+    from models.tag import AvaliacaoTag
+    from models.wishlist import Wishlist
+
+    tamanhos = PRESETS[preset] if isinstance(preset, str) else preset
+    hoje = hoje or datetime.now().replace(hour=12, minute=0, second=0, microsecond=0)
+    gerador = Gerador(semente, hoje)
+    contagem = {}
+
+    def etapa(nome, funcao):
+        inicio = time.perf_counter()
+        contagem[nome] = funcao()
+        saida(f'  {nome:<20} {contagem[nome]:>10,} linhas  {time.perf_counter() - inicio:6.1f}s')
+
+    with app.app_context():
+        membros = list(gerador.membros(tamanhos['membros']))
+        ids_membros = [m['id_membro'] for m in membros]
+        livros = list(gerador.livros(tamanhos['livros']))
+        emprestimos, emprestados = gerador.emprestimos(tamanhos['emprestimos'], livros, ids_membros)
+        for livro in livros:
+            livro['disponivel'] = livro['id_livro'] not in emprestados
+        avaliacoes = gerador.avaliacoes(tamanhos['avaliacoes'], emprestimos, livros, ids_membros)
+
+        etapa('membros', lambda: inserir(Membro, membros))
+        etapa('livros', lambda: inserir(Livro, livros))
+        etapa('emprestimos', lambda: inserir(Emprestimo, emprestimos))
+        etapa('avaliacoes', lambda: inserir(Avaliacao, avaliacoes))
+        etapa('wishlist', lambda: inserir(Wishlist, gerador.desejos(tamanhos['desejos'], livros, ids_membros)))
+        etapa('lancamentos_pontos', lambda: inserir(LancamentoPontos, gerador.lancamentos(emprestimos, avaliacoes)))
+
+        # Campos derivados, pelos mesmos caminhos dos comandos de manutenção
+        etapa('agregados de notas', Livro.recalcular_agregados)
+        etapa('tags', AvaliacaoTag.reconstruir)
+        etapa('pontos', LancamentoPontos.recalcular)
+        EstatisticasSnapshot.recalcular()
+    return contagem
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--preset', choices=list(PRESETS), default='pequeno')
+    parser.add_argument('--banco', required=True, help='arquivo SQLite a criar (não pode existir)')
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--hoje', type=datetime.fromisoformat, default=None,
+                        help='data de referência (YYYY-MM-DD); padrão: hoje')
+    args = parser.parse_args()
+
+    caminho = os.path.abspath(args.banco)
+    if os.path.exists(caminho):
+        parser.error(f'{caminho} já existe')
+
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{caminho}',
+        'AGENDADOR_ATIVO': False,
+        'CACHE_RESPOSTAS_BYTES': 0,
+        'INSTRUMENTACAO_SQL': False,
+        # Só durante a carga: um banco descartável não precisa de fsync a cada lote
+        'SQLITE_SYNCHRONOUS': 'OFF',
+    })
+    print(f'preset={args.preset} semente={args.semente} banco={caminho}')
+    inicio = time.perf_counter()
+    gerar(app, args.preset, args.semente, args.hoje)
+    print(f'concluído em {time.perf_counter() - inicio:.1f}s')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,144 @@
+"""Benchmark de inicialização a frio (cold start) de um processo trabalhador.
+
+Para cada modo (desenvolvimento e MODO_PRODUCAO=1) sobe processos Python
+novos e mede: import do app, create_app(), primeira resposta
+(GET /api/livros?limit=20) e o tempo total do processo, inclusive o
+interpretador. Lista também os módulos pesados que já estavam carregados
+depois da primeira resposta (Flasgger, Alembic, NumPy...).
+
+Com --salvar-base grava as medianas em JSON; com --base compara e sai com
+código 1 se algum tempo piorou além da tolerância.
+
+    python -m benchmarks.inicializacao --repeticoes 10
+    python -m benchmarks.inicializacao --salvar-base base_boot.json
+    python -m benchmarks.inicializacao --base base_boot.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.executar import calibrar  # noqa: E402
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODOS = {'desenvolvimento': '0', 'producao': '1'}
+MODULOS_PESADOS = ('flasgger', 'jsonschema', 'yaml', 'flask_migrate', 'alembic', 'numpy', 'scipy')
+ETAPAS = ('importar_ms', 'criar_app_ms', 'primeira_resposta_ms', 'processo_ms')
+
+# Código rodado em cada processo novo; imprime as medidas em JSON
+SONDA = '''
+import json, sys, time
+inicio = time.perf_counter()
+import app as modulo
+importado = time.perf_counter()
+aplicacao = modulo.create_app({'SQLALCHEMY_DATABASE_URI': sys.argv[1], 'AGENDADOR_ATIVO': False})
+criado = time.perf_counter()
+status = aplicacao.test_client().get('/api/livros?limit=20').status_code
+respondido = time.perf_counter()
+print(json.dumps({
+    'importar_ms': (importado - inicio) * 1000,
+    'criar_app_ms': (criado - importado) * 1000,
+    'primeira_resposta_ms': (respondido - criado) * 1000,
+    'status': status,
+    'modulos': [nome for nome in sys.argv[2].split(',') if nome in sys.modules],
+}))
+'''
+
+
+def preparar_banco(caminho):
+    """Banco com o esquema completo: em produção o app não cria tabelas."""
+    from app import create_app, db
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{caminho}', 'AGENDADOR_ATIVO': False})
+    with app.app_context():
+        db.engine.dispose()
+
+
+def medir_processo(uri, modo):
+    ambiente = dict(os.environ, MODO_PRODUCAO=MODOS[modo], AGENDADOR_ATIVO='0')
+    inicio = time.perf_counter()
+    saida = subprocess.run(
+        [sys.executable, '-c', SONDA, uri, ','.join(MODULOS_PESADOS)],
+        cwd=RAIZ, env=ambiente, capture_output=True, text=True, check=True
+    )
+    medida = json.loads(saida.stdout.strip().splitlines()[-1])
+    medida['processo_ms'] = (time.perf_counter() - inicio) * 1000
+    return medida
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeticoes', type=int, default=7, help='processos por modo')
+    parser.add_argument('--modos', default=','.join(MODOS), help='modos a medir')
+    parser.add_argument('--base', help='JSON salvo com --salvar-base para comparar')
+    parser.add_argument('--tolerancia', type=float, default=0.25, help='piora relativa aceita (0.25 = 25%%)')
+    parser.add_argument('--salvar-base', help='grava as medianas neste JSON')
+    args = parser.parse_args()
+
+    modos = args.modos.split(',')
+    desconhecidos = set(modos) - set(MODOS)
+    if desconhecidos:
+        parser.error(f'modo desconhecido: {", ".join(desconhecidos)}')
+
+    base, fator = None, 1.0
+    calibracao = calibrar()
+    if args.base:
+        with open(args.base, encoding='utf-8') as arquivo:
+            salvo = json.load(arquivo)
+        base = salvo['modos']
+        fator = calibracao / salvo['calibracao_ms']
+        print(f'calibração {calibracao} ms (base {salvo["calibracao_ms"]} ms): tempos divididos por {fator:.2f}')
+
+    resultados = {}
+    with tempfile.TemporaryDirectory() as diretorio:
+        caminho = os.path.join(diretorio, 'boot.db')
+        preparar_banco(caminho)
+        uri = f'sqlite:///{caminho}'
+        for modo in modos:
+            # O primeiro processo aquece o cache de disco e os .pyc
+            medir_processo(uri, modo)
+            medidas = [medir_processo(uri, modo) for _ in range(args.repeticoes)]
+            if any(medida['status'] != 200 for medida in medidas):
+                print(f'ERRO: {modo}: primeira resposta com status {medidas[0]["status"]}', file=sys.stderr)
+                return 1
+            resultados[modo] = {etapa: round(statistics.median(m[etapa] for m in medidas), 1) for etapa in ETAPAS}
+            resultados[modo]['modulos_pesados'] = medidas[-1]['modulos']
+
+    print(f'{"modo":<16} {"import ms":>10} {"create_app":>11} {"1ª resposta":>12} {"processo":>10}  módulos pesados')
+    for modo, medida in resultados.items():
+        print(
+            f'{modo:<16} {medida["importar_ms"]:>10.1f} {medida["criar_app_ms"]:>11.1f} '
+            f'{medida["primeira_resposta_ms"]:>12.1f} {medida["processo_ms"]:>10.1f}  '
+            f'{", ".join(medida["modulos_pesados"]) or "-"}'
+        )
+
+    if args.salvar_base:
+        with open(args.salvar_base, 'w', encoding='utf-8') as arquivo:
+            json.dump({'calibracao_ms': calibracao, 'modos': resultados}, arquivo, ensure_ascii=False, indent=2)
+        print(f'base salva em {args.salvar_base}')
+
+    regressoes = []
+    for modo, medida in resultados.items():
+        anterior = (base or {}).get(modo)
+        if not anterior:
+            continue
+        for etapa in ETAPAS:
+            novo = medida[etapa] / fator
+            if novo > anterior[etapa] * (1 + args.tolerancia) and novo - anterior[etapa] > 5:
+                regressoes.append(f'{modo} {etapa}: {anterior[etapa]} -> {novo:.1f}')
+        novos_modulos = set(medida['modulos_pesados']) - set(anterior['modulos_pesados'])
+        if novos_modulos:
+            regressoes.append(f'{modo}: passou a carregar {", ".join(sorted(novos_modulos))} no boot')
+    for regressao in regressoes:
+        print(f'REGRESSÃO: {regressao}', file=sys.stderr)
+    return 1 if regressoes else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
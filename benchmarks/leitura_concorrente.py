@@ -0,0 +1,120 @@
+"""Benchmark de leituras em vários processos com escrita simultânea.
+
+Sobe N processos leitores (GET /api/livros paginado e GET /api/livros/<id>)
+e um processo escritor (empréstimo/devolução em loop) sobre o mesmo arquivo
+SQLite, e mede leituras por segundo para cada N. Roda com o perfil padrão
+(WAL) e, para comparação, com o journal de rollback (DELETE), em que os
+leitores esperam o escritor.
+
+    python -m benchmarks.leitura_concorrente --processos 1,2,4,8 --segundos 5
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app, db  # noqa: E402
+
+
+def configuracao(caminho, modo):
+    return {
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{caminho}',
+        'SQLITE_JOURNAL_MODE': modo,
+        'AGENDADOR_ATIVO': False,
+        'CACHE_RESPOSTAS_BYTES': 0
+    }
+
+
+def preparar(caminho, modo, livros):
+    from models.membro import Membro
+    from models.livro import Livro
+    app = create_app(configuracao(caminho, modo))
+    with app.app_context():
+        db.session.add(Membro(nome='Leitor', email='leitor@bench.local', idade=30))
+        for i in range(livros):
+            db.session.add(Livro(titulo=f'Livro {i}', autor=f'Autor {i % 50}', genero='Romance', num_paginas=200))
+        db.session.commit()
+        db.engine.dispose()
+
+
+def leitor(caminho, modo, livros, barreira, segundos, fila, semente):
+    app = create_app(configuracao(caminho, modo))
+    cliente = app.test_client()
+    aleatorio = random.Random(semente)
+    contagem = Counter()
+    barreira.wait()
+    prazo = time.monotonic() + segundos
+    while time.monotonic() < prazo:
+        if aleatorio.random() < 0.5:
+            resposta = cliente.get('/api/livros?limit=50')
+        else:
+            resposta = cliente.get(f'/api/livros/{aleatorio.randint(1, livros)}')
+        contagem['leitura_ok' if resposta.status_code == 200 else 'leitura_erro'] += 1
+    fila.put(contagem)
+
+
+def escritor(caminho, modo, livros, barreira, segundos, fila, semente):
+    app = create_app(configuracao(caminho, modo))
+    cliente = app.test_client()
+    aleatorio = random.Random(semente)
+    contagem = Counter()
+    barreira.wait()
+    prazo = time.monotonic() + segundos
+    while time.monotonic() < prazo:
+        resposta = cliente.post('/api/emprestimos', json={'id_livro': aleatorio.randint(1, livros), 'id_membro': 1})
+        contagem['escrita_ok' if resposta.status_code == 201 else 'escrita_erro'] += 1
+        if resposta.status_code != 201:
+            continue
+        resposta = cliente.put(f'/api/emprestimos/{resposta.get_json()["id_emprestimo"]}/devolver')
+        contagem['escrita_ok' if resposta.status_code == 200 else 'escrita_erro'] += 1
+    fila.put(contagem)
+
+
+def rodada(modo, processos, livros, segundos):
+    with tempfile.TemporaryDirectory() as diretorio:
+        caminho = os.path.join(diretorio, 'leitura.db')
+        preparar(caminho, modo, livros)
+
+        contexto = multiprocessing.get_context('spawn')
+        fila = contexto.Queue()
+        # Todos começam a medir juntos, depois de cada processo subir o app
+        barreira = contexto.Barrier(processos + 1)
+        filhos = [contexto.Process(target=escritor, args=(caminho, modo, livros, barreira, segundos, fila, 0))]
+        filhos += [
+            contexto.Process(target=leitor, args=(caminho, modo, livros, barreira, segundos, fila, i + 1))
+            for i in range(processos)
+        ]
+        for filho in filhos:
+            filho.start()
+        total = sum((fila.get() for _ in filhos), Counter())
+        for filho in filhos:
+            filho.join()
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--processos', default='1,2,4', help='lista de quantidades de leitores')
+    parser.add_argument('--segundos', type=float, default=5)
+    parser.add_argument('--livros', type=int, default=500)
+    parser.add_argument('--modos', default='WAL,DELETE', help='journal_mode a comparar')
+    args = parser.parse_args()
+
+    print(f'{"modo":<8} {"leitores":>8} {"leituras/s":>11} {"escritas/s":>11} {"erros":>6}')
+    for modo in args.modos.split(','):
+        for processos in (int(n) for n in args.processos.split(',')):
+            total = rodada(modo, processos, args.livros, args.segundos)
+            erros = total['leitura_erro'] + total['escrita_erro']
+            print(f'{modo:<8} {processos:>8} {total["leitura_ok"] / args.segundos:>11.1f} '
+                  f'{total["escrita_ok"] / args.segundos:>11.1f} {erros:>6}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,110 @@
+import click
+
+
+def registrar_comandos(app):
+    """Registra os comandos de manutenção disponíveis via `flask <comando>`."""
+
+    @app.cli.command('recalcular-avaliacoes')
+    def recalcular_avaliacoes():
+        """Reconstrói os agregados de avaliações (contagem, soma e distribuição) de todos os livros."""
+        from models.livro import Livro
+        total = Livro.recalcular_agregados()
+        click.echo(f'Agregados de avaliações recalculados para {total} livros')
+
+    @app.cli.command('recalcular-pontos')
+    def recalcular_pontos():
+        """Refaz pontos_leitura de todos os membros a partir do livro-razão de pontos."""
+        from models.pontos import LancamentoPontos
+        total = LancamentoPontos.recalcular()
+        click.echo(f'Pontos recalculados para {total} membros')
+
+    @app.cli.command('marcar-atrasados')
+    def marcar_atrasados():
+        """Marca como atrasados os empréstimos ativos com prazo vencido."""
+        from models.emprestimo import Emprestimo
+        total = Emprestimo.marcar_atrasados()
+        click.echo(f'{total} empréstimos marcados como atrasados')
+
+    @app.cli.command('recalcular-estatisticas')
+    def recalcular_estatisticas():
+        """Recalcula do zero o snapshot servido em /api/estatisticas."""
+        from models.estatistica import EstatisticasSnapshot
+        EstatisticasSnapshot.recalcular()
+        click.echo('Snapshot de estatísticas recalculado')
+
+    @app.cli.command('verificar-planos')
+    def verificar_planos():
+        """Falha se alguma consulta das rotas passar a varrer uma tabela inteira (EXPLAIN QUERY PLAN)."""
+        from utils.planos import verificar_planos as verificar
+        falhas = 0
+        for nome, (plano, varridas) in verificar().items():
+            situacao = 'FALHA' if varridas else 'ok'
+            click.echo(f'[{situacao}] {nome}')
+            for linha in plano:
+                click.echo(f'        {linha}')
+            falhas += bool(varridas)
+        if falhas:
+            raise click.ClickException(f'{falhas} consulta(s) com varredura completa de tabela')
+
+    @app.cli.command('verificar-consultas')
+    def verificar_consultas():
+        """Falha se alguma rota passar do número máximo de instruções SQL por requisição."""
+        from utils.instrumentacao import verificar_orcamento
+        falhas = 0
+        for caminho, (consultas, maximo) in verificar_orcamento(app).items():
+            situacao = 'FALHA' if consultas > maximo else 'ok'
+            click.echo(f'[{situacao}] {caminho}: {consultas} consulta(s), máximo {maximo}')
+            falhas += consultas > maximo
+        if falhas:
+            raise click.ClickException(f'{falhas} rota(s) acima do orçamento de consultas')
+
+    @app.cli.command('reindexar-busca')
+    def reindexar_busca():
+        """Reconstrói o índice de busca textual (FTS5) a partir de livros e avaliações."""
+        from models.busca import reconstruir_indice_busca
+        total = reconstruir_indice_busca()
+        click.echo(f'Índice de busca reconstruído com {total} livros')
+
+    @app.cli.command('treinar-recomendacoes')
+    def treinar_recomendacoes():
+        """Retreina do zero o modelo de recomendações e grava em instance/."""
+        from services.recomendacao import treinar_e_salvar
+        modelo = treinar_e_salvar()
+        click.echo(f'Modelo treinado com {len(modelo.ids_membros)} membros e {len(modelo.ids_livros)} livros')
+
+    @app.cli.command('reindexar-similares')
+    def reindexar_similares():
+        """Reconstrói o índice de livros parecidos (instance/similares/)."""
+        from services.similares import reconstruir_indice
+        total = reconstruir_indice()
+        click.echo(f'Índice de similares reconstruído com {total} livros')
+
+    @app.cli.command('reindexar-tags')
+    def reindexar_tags():
+        """Reconstrói a tabela de tags das avaliações a partir do campo texto."""
+        from models.tag import AvaliacaoTag
+        total = AvaliacaoTag.reconstruir()
+        click.echo(f'{total} vínculos de tags gravados')
+
+    @app.cli.command('gerar-openapi')
+    @click.option('--saida', default=None, help='Arquivo de saída (padrão: ARQUIVO_OPENAPI)')
+    def gerar_openapi(saida):
+        """Gera a especificação OpenAPI das rotas no arquivo servido em produção (MODO_PRODUCAO=1)."""
+        from utils.documentacao import gerar_especificacao, salvar_especificacao
+        caminho = saida or app.config['ARQUIVO_OPENAPI']
+        especificacao = gerar_especificacao(app)
+        salvar_especificacao(especificacao, caminho)
+        click.echo(f'Especificação com {len(especificacao["paths"])} caminhos gravada em {caminho}')
+
+    @app.cli.command('verificar-openapi')
+    @click.option('--arquivo', default=None, help='Arquivo a conferir (padrão: ARQUIVO_OPENAPI)')
+    def verificar_openapi(arquivo):
+        """Falha se o arquivo OpenAPI versionado não bate com os decoradores @swag_from das rotas."""
+        from utils.documentacao import diferencas_especificacao, gerar_especificacao
+        caminho = arquivo or app.config['ARQUIVO_OPENAPI']
+        diferencas = diferencas_especificacao(gerar_especificacao(app), caminho)
+        for linha in diferencas:
+            click.echo(linha.rstrip('\n'))
+        if diferencas:
+            raise click.ClickException(f'{caminho} desatualizado; rode flask gerar-openapi e versione o arquivo')
+        click.echo(f'{caminho} em dia com as rotas')
@@ -0,0 +1,101 @@
+"""indice de busca textual
+
+Revision ID: 0001b
+Revises: 0001a
+Create Date: 2026-10-18 00:26:11.402817
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001b'
+down_revision = '0001a'
+branch_labels = None
+depends_on = None
+
+# Cópia do DDL de models/busca.py nesta revisão: mudanças futuras no modelo
+# entram em uma revisão nova, não reescrevem esta
+DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS livros_busca USING fts5(
+        titulo, autor, editora, sinopse, comentarios,
+        tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS livros_busca_ai AFTER INSERT ON livros BEGIN
+        INSERT INTO livros_busca(rowid, titulo, autor, editora, sinopse, comentarios)
+        VALUES (new.id_livro, new.titulo, new.autor, new.editora, new.sinopse, '');
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS livros_busca_au
+    AFTER UPDATE OF titulo, autor, editora, sinopse ON livros BEGIN
+        UPDATE livros_busca
+        SET titulo = new.titulo, autor = new.autor, editora = new.editora, sinopse = new.sinopse
+        WHERE rowid = new.id_livro;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS livros_busca_ad AFTER DELETE ON livros BEGIN
+        DELETE FROM livros_busca WHERE rowid = old.id_livro;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS avaliacoes_busca_ai AFTER INSERT ON avaliacoes BEGIN
+        UPDATE livros_busca
+        SET comentarios = (SELECT group_concat(comentario, ' ') FROM avaliacoes WHERE id_livro = new.id_livro)
+        WHERE rowid = new.id_livro;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS avaliacoes_busca_au
+    AFTER UPDATE OF comentario, id_livro ON avaliacoes BEGIN
+        UPDATE livros_busca
+        SET comentarios = (SELECT group_concat(comentario, ' ') FROM avaliacoes WHERE id_livro = old.id_livro)
+        WHERE rowid = old.id_livro;
+        UPDATE livros_busca
+        SET comentarios = (SELECT group_concat(comentario, ' ') FROM avaliacoes WHERE id_livro = new.id_livro)
+        WHERE rowid = new.id_livro;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS avaliacoes_busca_ad AFTER DELETE ON avaliacoes BEGIN
+        UPDATE livros_busca
+        SET comentarios = (SELECT group_concat(comentario, ' ') FROM avaliacoes WHERE id_livro = old.id_livro)
+        WHERE rowid = old.id_livro;
+    END
+    """
+]
+
+TRIGGERS = ('livros_busca_ai', 'livros_busca_au', 'livros_busca_ad',
+            'avaliacoes_busca_ai', 'avaliacoes_busca_au', 'avaliacoes_busca_ad')
+
+
+def upgrade():
+    # Busca textual: tabela virtual FTS5 e triggers de sincronização
+    for instrucao in DDL:
+        op.execute(instrucao)
+
+    indexar_catalogo()
+
+
+def indexar_catalogo():
+    """Indexa os livros e comentários já existentes (os triggers só cobrem escritas novas)."""
+    conexao = op.get_bind()
+    conexao.execute(sa.text("DELETE FROM livros_busca"))
+    conexao.execute(sa.text(
+        "INSERT INTO livros_busca(rowid, titulo, autor, editora, sinopse, comentarios) "
+        "SELECT l.id_livro, l.titulo, l.autor, l.editora, l.sinopse, "
+        "coalesce((SELECT group_concat(a.comentario, ' ') FROM avaliacoes a WHERE a.id_livro = l.id_livro), '') "
+        "FROM livros l"
+    ))
+    conexao.execute(sa.text("INSERT INTO livros_busca(livros_busca) VALUES ('optimize')"))
+
+
+def downgrade():
+    for trigger in TRIGGERS:
+        op.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+    op.execute('DROP TABLE IF EXISTS livros_busca')
@@ -0,0 +1,31 @@
+"""linhas de versao do cache
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-18 01:32:10.418236
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0009'
+down_revision = '0008'
+branch_labels = None
+depends_on = None
+
+# Mesmas tags de CacheVersao.TAGS; em produção o app não as cria no boot
+TAGS = ('livros', 'emprestimos', 'avaliacoes', 'wishlist', 'membros', 'estatisticas')
+
+
+def upgrade():
+    for tag in TAGS:
+        op.execute(sa.text(
+            "INSERT INTO cache_versoes (tag, versao) VALUES (:tag, 0) ON CONFLICT (tag) DO NOTHING"
+        ).bindparams(tag=tag))
+
+
+def downgrade():
+    # As linhas são inofensivas sem o modo de produção (garantir_tags as recria)
+    pass
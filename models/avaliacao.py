@@ -1,8 +1,15 @@
 from app import db
+from utils.projecao import coluna, data_iso, calculado, relacionado, serializar
 from datetime import datetime
 
 class Avaliacao(db.Model):
     __tablename__ = 'avaliacoes'
+    __table_args__ = (
+        # Avaliações de um livro ordenadas por data
+        db.Index('ix_avaliacoes_livro_data', 'id_livro', 'data_avaliacao'),
+        # Verificação de avaliação duplicada e avaliações de um membro
+        db.Index('ix_avaliacoes_membro_livro', 'id_membro', 'id_livro'),
+    )
 
     id_avaliacao = db.Column(db.Integer, primary_key=True)
     id_membro = db.Column(db.Integer, db.ForeignKey('membros_familia.id_membro'), nullable=False)
@@ -18,17 +25,20 @@ class Avaliacao(db.Model):
     membro = db.relationship('Membro', back_populates='avaliacoes')
     livro = db.relationship('Livro', back_populates='avaliacoes')
 
-    def to_dict(self):
-        return {
-            'id_avaliacao': self.id_avaliacao,
-            'id_membro': self.id_membro,
-            'id_livro': self.id_livro,
-            'nome_membro': self.membro.nome if self.membro else None,
-            'titulo_livro': self.livro.titulo if self.livro else None,
-            'nota': self.nota,
-            'comentario': self.comentario,
-            'recomenda_para_idade': self.recomenda_para_idade,
-            'tags': self.tags.split(',') if self.tags else [],
-            'data_avaliacao': self.data_avaliacao.isoformat() if self.data_avaliacao else None,
-            'leitura_completa': self.leitura_completa
-        }
\ No newline at end of file
+    # Campos de to_dict e as colunas que cada um lê (para ?fields=)
+    CAMPOS = {
+        'id_avaliacao': coluna('id_avaliacao'),
+        'id_membro': coluna('id_membro'),
+        'id_livro': coluna('id_livro'),
+        'nome_membro': relacionado('membro', 'nome', 'id_membro'),
+        'titulo_livro': relacionado('livro', 'titulo', 'id_livro'),
+        'nota': coluna('nota'),
+        'comentario': coluna('comentario'),
+        'recomenda_para_idade': coluna('recomenda_para_idade'),
+        'tags': calculado(lambda a: a.tags.split(',') if a.tags else [], 'tags'),
+        'data_avaliacao': data_iso('data_avaliacao'),
+        'leitura_completa': coluna('leitura_completa')
+    }
+
+    def to_dict(self, campos=None):
+        return serializar(self, campos)
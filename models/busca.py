@@ -0,0 +1,137 @@
+import html
+import re
+from app import db
+
+# Índice de texto completo (SQLite FTS5) sobre o catálogo. O rowid da tabela
+# virtual é o id_livro; a coluna `comentarios` concatena os comentários das
+# avaliações do livro. unicode61 com remove_diacritics faz "memorias" casar
+# com "Memórias". A sincronização é feita por triggers, então qualquer
+# escrita em livros/avaliacoes (rotas, importação, SQL manual) mantém o índice.
+DDL_BUSCA = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS livros_busca USING fts5(
+        titulo, autor, editora, sinopse, comentarios,
+        tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS livros_busca_ai AFTER INSERT ON livros BEGIN
+        INSERT INTO livros_busca(rowid, titulo, autor, editora, sinopse, comentarios)
+        VALUES (new.id_livro, new.titulo, new.autor, new.editora, new.sinopse, '');
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS livros_busca_au
+    AFTER UPDATE OF titulo, autor, editora, sinopse ON livros BEGIN
+        UPDATE livros_busca
+        SET titulo = new.titulo, autor = new.autor, editora = new.editora, sinopse = new.sinopse
+        WHERE rowid = new.id_livro;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS livros_busca_ad AFTER DELETE ON livros BEGIN
+        DELETE FROM livros_busca WHERE rowid = old.id_livro;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS avaliacoes_busca_ai AFTER INSERT ON avaliacoes BEGIN
+        UPDATE livros_busca
+        SET comentarios = (SELECT group_concat(comentario, ' ') FROM avaliacoes WHERE id_livro = new.id_livro)
+        WHERE rowid = new.id_livro;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS avaliacoes_busca_au
+    AFTER UPDATE OF comentario, id_livro ON avaliacoes BEGIN
+        UPDATE livros_busca
+        SET comentarios = (SELECT group_concat(comentario, ' ') FROM avaliacoes WHERE id_livro = old.id_livro)
+        WHERE rowid = old.id_livro;
+        UPDATE livros_busca
+        SET comentarios = (SELECT group_concat(comentario, ' ') FROM avaliacoes WHERE id_livro = new.id_livro)
+        WHERE rowid = new.id_livro;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS avaliacoes_busca_ad AFTER DELETE ON avaliacoes BEGIN
+        UPDATE livros_busca
+        SET comentarios = (SELECT group_concat(comentario, ' ') FROM avaliacoes WHERE id_livro = old.id_livro)
+        WHERE rowid = old.id_livro;
+    END
+    """
+]
+
+# Marcadores do snippet() trocados por <mark> depois de escapar o texto: o trecho
+# mistura sinopse/comentários digitados por usuários com HTML de verdade
+INICIO_DESTAQUE, FIM_DESTAQUE = '\x02', '\x03'
+
+# Pesos do BM25 na ordem das colunas: título pesa mais que autor, que pesa mais que o resto
+PESOS_BM25 = (10.0, 6.0, 2.0, 1.0, 0.5)
+
+
+def criar_indice_busca():
+    """Cria a tabela FTS5 e os triggers, populando o índice se ele acabou de ser criado."""
+    existe = db.session.execute(db.text(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'livros_busca'"
+    )).first()
+    for instrucao in DDL_BUSCA:
+        db.session.execute(db.text(instrucao))
+    db.session.commit()
+    if not existe:
+        reconstruir_indice_busca()
+
+
+def reconstruir_indice_busca():
+    """Reconstrói todo o índice a partir das tabelas livros e avaliacoes."""
+    db.session.execute(db.text("DELETE FROM livros_busca"))
+    resultado = db.session.execute(db.text("""
+        INSERT INTO livros_busca(rowid, titulo, autor, editora, sinopse, comentarios)
+        SELECT l.id_livro, l.titulo, l.autor, l.editora, l.sinopse,
+               coalesce((SELECT group_concat(a.comentario, ' ') FROM avaliacoes a
+                         WHERE a.id_livro = l.id_livro), '')
+        FROM livros l
+    """))
+    db.session.execute(db.text("INSERT INTO livros_busca(livros_busca) VALUES ('optimize')"))
+    db.session.commit()
+    return resultado.rowcount
+
+
+def montar_consulta_fts(texto):
+    """Converte o texto digitado em uma expressão MATCH segura.
+
+    Cada palavra vira um termo entre aspas com busca por prefixo ("machad"*),
+    combinados com AND. Operadores e aspas do usuário são descartados.
+    """
+    termos = re.findall(r'\w+', texto or '')
+    return ' '.join(f'"{termo}"*' for termo in termos)
+
+
+def buscar_livros(texto, limit=20):
+    """Retorna [(id_livro, relevancia, trecho)] ordenados por BM25 (mais relevante primeiro).
+
+    O trecho é HTML seguro: o texto vem escapado e só os termos encontrados
+    ficam entre <mark></mark>.
+    """
+    consulta = montar_consulta_fts(texto)
+    if not consulta:
+        return []
+
+    pesos = ', '.join(str(p) for p in PESOS_BM25)
+    linhas = db.session.execute(db.text(f"""
+        SELECT rowid,
+               bm25(livros_busca, {pesos}) AS pontuacao,
+               snippet(livros_busca, -1, :inicio, :fim, '…', 16) AS trecho
+        FROM livros_busca
+        WHERE livros_busca MATCH :consulta
+        ORDER BY pontuacao
+        LIMIT :limit
+    """), {'consulta': consulta, 'limit': limit, 'inicio': INICIO_DESTAQUE, 'fim': FIM_DESTAQUE}).all()
+
+    # bm25() devolve valores negativos (menor = melhor); expõe como relevância positiva
+    return [(linha[0], round(-linha[1], 4), destacar(linha[2])) for linha in linhas]
+
+
+def destacar(trecho):
+    """Escapa o trecho do snippet() e só então troca os marcadores por <mark>."""
+    if trecho is None:
+        return None
+    return html.escape(trecho).replace(INICIO_DESTAQUE, '<mark>').replace(FIM_DESTAQUE, '</mark>')
@@ -0,0 +1,31 @@
+from app import db
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+class CacheVersao(db.Model):
+    __tablename__ = 'cache_versoes'
+
+    # Uma linha por recurso (livros, emprestimos, ...); a versão sobe a cada escrita
+    tag = db.Column(db.String(30), primary_key=True)
+    versao = db.Column(db.Integer, default=0, nullable=False)
+
+    TAGS = ('livros', 'emprestimos', 'avaliacoes', 'wishlist', 'membros', 'estatisticas')
+
+    @classmethod
+    def garantir_tags(cls):
+        db.session.execute(
+            sqlite_insert(cls).values([{'tag': tag, 'versao': 0} for tag in cls.TAGS])
+            .on_conflict_do_nothing()
+        )
+        db.session.commit()
+
+    @classmethod
+    def incrementar(cls, *tags):
+        """Invalida as respostas em cache dos recursos, dentro da transação corrente."""
+        db.session.execute(
+            db.update(cls).where(cls.tag.in_(tags)).values(versao=cls.versao + 1)
+            .execution_options(synchronize_session=False)
+        )
+
+    @classmethod
+    def atuais(cls):
+        return dict(db.session.execute(db.select(cls.tag, cls.versao)).all())
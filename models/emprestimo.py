@@ -1,8 +1,23 @@
 from app import db
+from utils.projecao import coluna, data_iso, calculado, relacionado, serializar
 from datetime import datetime, timedelta
 
+# O atraso conta em dias inteiros (calcular_dias_atraso): o empréstimo só fica atrasado
+# um dia inteiro depois do prazo. Filtros SQL, varredura e status_atual usam este corte
+ATRASO_MINIMO = timedelta(days=1)
+
 class Emprestimo(db.Model):
     __tablename__ = 'emprestimos'
+    __table_args__ = (
+        # Listagem com filtros de status/tipo ordenada por data
+        db.Index('ix_emprestimos_status_tipo_data', 'status', 'tipo_emprestimo', 'data_emprestimo'),
+        # Empréstimos de um membro ordenados por data
+        db.Index('ix_emprestimos_membro_data', 'id_membro', 'data_emprestimo'),
+        # Listagem sem filtros (ordem por data) e paginação por cursor
+        db.Index('ix_emprestimos_data', 'data_emprestimo', 'id_emprestimo'),
+        # Varredura de atrasados (status = 'ativo' AND data_prevista_devolucao <= agora - 1 dia)
+        db.Index('ix_emprestimos_status_prevista', 'status', 'data_prevista_devolucao'),
+    )
 
     id_emprestimo = db.Column(db.Integer, primary_key=True)
     id_membro = db.Column(db.Integer, db.ForeignKey('membros_familia.id_membro'), nullable=False)
@@ -27,24 +42,74 @@ class Emprestimo(db.Model):
             dias = 30 if self.tipo_emprestimo == 'interno' else 14
             self.data_prevista_devolucao = datetime.now() + timedelta(days=dias)
 
-    def to_dict(self):
-        return {
-            'id_emprestimo': self.id_emprestimo,
-            'id_membro': self.id_membro,
-            'id_livro': self.id_livro,
-            'nome_membro': self.membro.nome if self.membro else None,
-            'titulo_livro': self.livro.titulo if self.livro else None,
-            'tipo_emprestimo': self.tipo_emprestimo,
-            'nome_amiga': self.nome_amiga,
-            'contato_emprestimo': self.contato_emprestimo,
-            'data_emprestimo': self.data_emprestimo.isoformat() if self.data_emprestimo else None,
-            'data_prevista_devolucao': self.data_prevista_devolucao.isoformat() if self.data_prevista_devolucao else None,
-            'data_devolucao': self.data_devolucao.isoformat() if self.data_devolucao else None,
-            'status': self.status,
-            'dias_atraso': self.calcular_dias_atraso(),
-            'observacoes': self.observacoes
-        }
+    # Campos de to_dict e as colunas que cada um lê (para ?fields=)
+    CAMPOS = {
+        'id_emprestimo': coluna('id_emprestimo'),
+        'id_membro': coluna('id_membro'),
+        'id_livro': coluna('id_livro'),
+        'nome_membro': relacionado('membro', 'nome', 'id_membro'),
+        'titulo_livro': relacionado('livro', 'titulo', 'id_livro'),
+        'tipo_emprestimo': coluna('tipo_emprestimo'),
+        'nome_amiga': coluna('nome_amiga'),
+        'contato_emprestimo': coluna('contato_emprestimo'),
+        'data_emprestimo': data_iso('data_emprestimo'),
+        'data_prevista_devolucao': data_iso('data_prevista_devolucao'),
+        'data_devolucao': data_iso('data_devolucao'),
+        'status': calculado(lambda e: e.status_atual, 'status', 'data_prevista_devolucao'),
+        'dias_atraso': calculado(lambda e: e.calcular_dias_atraso(), 'status', 'data_prevista_devolucao'),
+        'observacoes': coluna('observacoes')
+    }
+
+    def to_dict(self, campos=None):
+        return serializar(self, campos)
     
+    @property
+    def status_atual(self):
+        # Reflete o atraso mesmo antes da próxima varredura gravar o status
+        if self.status == 'ativo' and self.calcular_dias_atraso() > 0:
+            return 'atrasado'
+        return self.status
+
+    @classmethod
+    def filtro_vencido(cls, agora=None):
+        """Condição SQL de empréstimo ativo com ao menos um dia de atraso (ainda não marcado)."""
+        corte = (agora or datetime.now()) - ATRASO_MINIMO
+        return db.and_(cls.status == 'ativo', cls.data_prevista_devolucao <= corte)
+
+    @classmethod
+    def filtro_atrasado(cls, agora=None):
+        """Condição SQL de empréstimo atrasado: já marcado ou ativo com prazo vencido."""
+        return db.or_(cls.status == 'atrasado', cls.filtro_vencido(agora))
+
+    @classmethod
+    def filtro_em_dia(cls, agora=None):
+        """Condição SQL de empréstimo ativo dentro do prazo (menos de um dia de atraso)."""
+        corte = (agora or datetime.now()) - ATRASO_MINIMO
+        return db.and_(
+            cls.status == 'ativo',
+            db.or_(cls.data_prevista_devolucao.is_(None), cls.data_prevista_devolucao > corte)
+        )
+
+    @classmethod
+    def marcar_atrasados(cls):
+        """Marca como 'atrasado' todos os empréstimos ativos vencidos em um único UPDATE."""
+        from models.estatistica import EstatisticasSnapshot
+        from models.cache_versao import CacheVersao
+        resultado = db.session.execute(
+            db.update(cls)
+            .where(cls.filtro_vencido())
+            .values(status='atrasado')
+            .execution_options(synchronize_session=False)
+        )
+        if resultado.rowcount:
+            EstatisticasSnapshot.ajustar(
+                emprestimos_ativos=-resultado.rowcount,
+                emprestimos_atrasados=resultado.rowcount
+            )
+            CacheVersao.incrementar('emprestimos')
+        db.session.commit()
+        return resultado.rowcount
+
     def calcular_dias_atraso(self):
         if self.status == 'devolvido' or not self.data_prevista_devolucao:
             return 0
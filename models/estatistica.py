@@ -0,0 +1,192 @@
+import json
+from app import db
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from models.cache_versao import CacheVersao
+from datetime import datetime, timedelta
+
+class EstatisticasSnapshot(db.Model):
+    __tablename__ = 'estatisticas_snapshot'
+
+    # Linha única (id = 1) com os contadores do painel de estatísticas
+    id = db.Column(db.Integer, primary_key=True)
+
+    # Contadores mantidos incrementalmente pelas rotas de escrita
+    total_membros = db.Column(db.Integer, default=0, nullable=False)
+    total_livros = db.Column(db.Integer, default=0, nullable=False)
+    livros_disponiveis = db.Column(db.Integer, default=0, nullable=False)
+    total_classicos = db.Column(db.Integer, default=0, nullable=False)
+    valor_total = db.Column(db.Float, default=0, nullable=False)
+    total_emprestimos = db.Column(db.Integer, default=0, nullable=False)
+    emprestimos_ativos = db.Column(db.Integer, default=0, nullable=False)
+    emprestimos_atrasados = db.Column(db.Integer, default=0, nullable=False)
+    total_avaliacoes = db.Column(db.Integer, default=0, nullable=False)
+
+    # Partes por janela de tempo e rankings, atualizadas só no recálculo completo (JSON)
+    detalhes = db.Column(db.Text)
+
+    atualizado_em = db.Column(db.DateTime, default=datetime.now)
+    recalculado_em = db.Column(db.DateTime, default=datetime.now)
+
+    CONTADORES = ('total_membros', 'total_livros', 'livros_disponiveis', 'total_classicos',
+                  'valor_total', 'total_emprestimos', 'emprestimos_ativos',
+                  'emprestimos_atrasados', 'total_avaliacoes')
+
+    @classmethod
+    def ajustar(cls, **deltas):
+        """Soma os deltas aos contadores, dentro da transação corrente.
+
+        Ex.: EstatisticasSnapshot.ajustar(total_emprestimos=1, livros_disponiveis=-1)
+        Se o snapshot ainda não existe não faz nada: o primeiro recálculo o cria.
+        """
+        valores = {getattr(cls, campo): getattr(cls, campo) + delta
+                   for campo, delta in deltas.items() if delta}
+        if not valores:
+            return
+        valores[cls.atualizado_em] = datetime.now()
+        CacheVersao.incrementar('estatisticas')
+        db.session.execute(
+            db.update(cls).where(cls.id == 1).values(valores)
+            .execution_options(synchronize_session=False)
+        )
+
+    @classmethod
+    def obter(cls):
+        """Retorna o snapshot, recalculando-o se ainda não existir."""
+        return db.session.get(cls, 1) or cls.recalcular()
+
+    @classmethod
+    def recalcular(cls):
+        """Recalcula todas as estatísticas a partir das tabelas e grava o snapshot."""
+        from models.membro import Membro
+        from models.livro import Livro
+        from models.emprestimo import Emprestimo
+        from models.avaliacao import Avaliacao
+        from models.pontos import LancamentoPontos
+        func, and_ = db.func, db.and_
+
+        # Garante que o status dos empréstimos vencidos e os pontos estão gravados antes de contar
+        Emprestimo.marcar_atrasados()
+        LancamentoPontos.consolidar()
+
+        contadores = {
+            'total_membros': Membro.query.filter_by(ativo=True).count(),
+            'total_livros': Livro.query.count(),
+            'livros_disponiveis': Livro.query.filter_by(disponivel=True).count(),
+            'total_classicos': Livro.query.filter_by(classicos_familia=True).count(),
+            'valor_total': db.session.query(func.sum(Livro.valor_estimado)).scalar() or 0,
+            'total_emprestimos': Emprestimo.query.count(),
+            'emprestimos_ativos': Emprestimo.query.filter_by(status='ativo').count(),
+            'emprestimos_atrasados': Emprestimo.query.filter_by(status='atrasado').count(),
+            'total_avaliacoes': Avaliacao.query.count()
+        }
+
+        # Estatísticas de leitura (últimos 30 dias)
+        um_mes_atras = datetime.utcnow() - timedelta(days=30)
+        livros_lidos_mes = Emprestimo.query.filter(
+            and_(
+                Emprestimo.status == 'devolvido',
+                Emprestimo.data_devolucao >= um_mes_atras
+            )
+        ).count()
+
+        # Gênero mais popular
+        genero_popular = db.session.query(
+            Livro.genero,
+            func.count(Emprestimo.id_emprestimo).label('total')
+        ).join(Emprestimo).group_by(Livro.genero).order_by(
+            func.count(Emprestimo.id_emprestimo).desc()
+        ).first()
+
+        # Leitor do mês (mais empréstimos devolvidos)
+        leitor_mes = db.session.query(
+            Membro.nome,
+            func.count(Emprestimo.id_emprestimo).label('total')
+        ).join(Emprestimo).filter(
+            and_(
+                Emprestimo.status == 'devolvido',
+                Emprestimo.data_devolucao >= um_mes_atras,
+                Emprestimo.tipo_emprestimo == 'interno'
+            )
+        ).group_by(Membro.id_membro).order_by(
+            func.count(Emprestimo.id_emprestimo).desc()
+        ).first()
+
+        # Livros mais emprestados
+        livros_populares = db.session.query(
+            Livro.titulo,
+            Livro.autor,
+            func.count(Emprestimo.id_emprestimo).label('total')
+        ).join(Emprestimo).group_by(Livro.id_livro).order_by(
+            func.count(Emprestimo.id_emprestimo).desc()
+        ).limit(5).all()
+
+        # Ranking de leitores por pontos (lido do ranking em memória, sem ordenar a tabela)
+        from services.ranking import usar_classificacao
+        with usar_classificacao() as classificacao:
+            ranking_leitores = classificacao.pagina('geral', 0, 5)
+
+        detalhes = {
+            'livros_lidos_ultimo_mes': livros_lidos_mes,
+            'genero_mais_popular': genero_popular[0] if genero_popular else None,
+            'leitor_do_mes': leitor_mes[0] if leitor_mes else 'Nenhum',
+            'livros_mais_emprestados': [
+                {'titulo': l[0], 'autor': l[1], 'total': l[2]}
+                for l in livros_populares
+            ],
+            'top_leitores': [
+                {'nome': m['nome'], 'pontos': m['pontos'], 'nivel': m['nivel_leitor']}
+                for m in ranking_leitores
+            ]
+        }
+
+        # Upsert da linha única: outro processo pode estar recalculando ao mesmo tempo
+        agora = datetime.now()
+        valores = dict(contadores, detalhes=json.dumps(detalhes), atualizado_em=agora, recalculado_em=agora)
+        db.session.execute(
+            sqlite_insert(cls).values(id=1, **valores)
+            .on_conflict_do_update(index_elements=[cls.id], set_=valores)
+        )
+        CacheVersao.incrementar('estatisticas')
+        db.session.commit()
+        return db.session.get(cls, 1, populate_existing=True)
+
+    def to_dict(self):
+        detalhes = json.loads(self.detalhes) if self.detalhes else {}
+        total_livros = self.total_livros
+        livros_emprestados = total_livros - self.livros_disponiveis
+        total_emprestimos = self.total_emprestimos
+        taxa_atraso = (self.emprestimos_atrasados / total_emprestimos * 100) if total_emprestimos > 0 else 0
+
+        return {
+            'resumo_geral': {
+                'total_membros': self.total_membros,
+                'total_livros': total_livros,
+                'livros_disponiveis': self.livros_disponiveis,
+                'livros_emprestados': livros_emprestados,
+                'valor_total_biblioteca': round(self.valor_total or 0, 2),
+                'total_emprestimos_historico': total_emprestimos,
+                'total_classicos_familia': self.total_classicos,
+                'total_avaliacoes': self.total_avaliacoes
+            },
+            'leituras': {
+                'emprestimos_ativos': self.emprestimos_ativos,
+                'livros_lidos_ultimo_mes': detalhes.get('livros_lidos_ultimo_mes', 0),
+                'genero_mais_popular': detalhes.get('genero_mais_popular'),
+                'leitor_do_mes': detalhes.get('leitor_do_mes', 'Nenhum'),
+                'taxa_atraso': round(taxa_atraso, 1)
+            },
+            'rankings': {
+                'livros_mais_emprestados': detalhes.get('livros_mais_emprestados', []),
+                'top_leitores': detalhes.get('top_leitores', [])
+            },
+            'tendencias': {
+                'media_emprestimos_por_mes': round(total_emprestimos / 12, 1) if total_emprestimos > 0 else 0,
+                'percentual_livros_emprestados': round(livros_emprestados / total_livros * 100, 1) if total_livros > 0 else 0
+            },
+            # Só instantes absolutos: o corpo fica em cache entre escritas, e uma idade
+            # calculada aqui congelaria no valor da primeira requisição
+            'snapshot': {
+                'atualizado_em': self.atualizado_em.isoformat() if self.atualizado_em else None,
+                'recalculado_em': self.recalculado_em.isoformat() if self.recalculado_em else None
+            }
+        }
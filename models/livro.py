@@ -1,8 +1,18 @@
 from app import db
+from utils.projecao import coluna, data_iso, calculado, serializar
 from datetime import datetime
 
 class Livro(db.Model):
     __tablename__ = 'livros'
+    __table_args__ = (
+        # Filtros do catálogo por gênero e disponibilidade
+        db.Index('ix_livros_genero_disponivel', 'genero', 'disponivel'),
+        # Cobre as dimensões de /livros/facetas: a contagem lê só o índice, já agrupado
+        db.Index(
+            'ix_livros_facetas', 'genero', 'subgenero', 'idioma', 'idade_recomendada',
+            'estado_conservacao', 'disponivel', 'classicos_familia'
+        ),
+    )
 
     id_livro = db.Column(db.Integer, primary_key=True)
     isbn = db.Column(db.String(13), unique=True)
@@ -25,6 +35,15 @@ class Livro(db.Model):
     valor_estimado = db.Column(db.Float)
     classicos_familia = db.Column(db.Boolean, default=False)
 
+    # Agregados das avaliações (mantidos pelas rotas de avaliações)
+    total_avaliacoes = db.Column(db.Integer, default=0, nullable=False)
+    soma_notas = db.Column(db.Integer, default=0, nullable=False)
+    notas_1 = db.Column(db.Integer, default=0, nullable=False)
+    notas_2 = db.Column(db.Integer, default=0, nullable=False)
+    notas_3 = db.Column(db.Integer, default=0, nullable=False)
+    notas_4 = db.Column(db.Integer, default=0, nullable=False)
+    notas_5 = db.Column(db.Integer, default=0, nullable=False)
+
     # Relacionamentos
     emprestimos = db.relationship('Emprestimo', back_populates='livro', lazy='dynamic')
     avaliacoes = db.relationship('Avaliacao', back_populates='livro', lazy='dynamic')
@@ -36,34 +55,111 @@ class Livro(db.Model):
     
     @property
     def nota_media(self):
-        avaliacoes = self.avaliacoes.all()
-        if not avaliacoes:
+        if not self.total_avaliacoes:
             return 0
-        return sum(a.nota for a in avaliacoes) / len(avaliacoes)
+        return self.soma_notas / self.total_avaliacoes
+
+    @property
+    def distribuicao_notas(self):
+        return {str(n): getattr(self, f'notas_{n}') or 0 for n in range(1, 6)}
+
+    @classmethod
+    def reservar(cls, id_livro):
+        """Marca o livro como emprestado se ainda estiver disponível (compare-and-set).
+
+        Retorna True se esta transação conseguiu a reserva; o rowcount do UPDATE
+        condicional decide, sem janela entre ler e gravar `disponivel`.
+        """
+        resultado = db.session.execute(
+            db.update(cls)
+            .where(cls.id_livro == id_livro, cls.disponivel == True)  # noqa: E712
+            .values(disponivel=False)
+        )
+        return resultado.rowcount == 1
+
+    @classmethod
+    def liberar(cls, id_livro):
+        """Marca o livro como disponível se estiver emprestado (compare-and-set)."""
+        resultado = db.session.execute(
+            db.update(cls)
+            .where(cls.id_livro == id_livro, cls.disponivel == False)  # noqa: E712
+            .values(disponivel=True)
+        )
+        return resultado.rowcount == 1
+
+    @classmethod
+    def ajustar_agregados(cls, id_livro, nota, delta):
+        """Soma (delta=1) ou subtrai (delta=-1) uma nota dos agregados do livro.
+
+        O UPDATE é feito no banco (coluna = coluna + delta) para não perder
+        atualizações concorrentes e entra na mesma transação da avaliação.
+        """
+        coluna_nota = getattr(cls, f'notas_{nota}')
+        db.session.execute(
+            db.update(cls)
+            .where(cls.id_livro == id_livro)
+            .values({
+                cls.total_avaliacoes: cls.total_avaliacoes + delta,
+                cls.soma_notas: cls.soma_notas + delta * nota,
+                coluna_nota: coluna_nota + delta
+            })
+            .execution_options(synchronize_session=False)
+        )
+
+    @classmethod
+    def recalcular_agregados(cls):
+        """Reconstrói os agregados de todos os livros a partir da tabela de avaliações."""
+        from models.avaliacao import Avaliacao
+
+        def subconsulta(expressao, *filtros):
+            return db.select(db.func.coalesce(expressao, 0)).where(
+                Avaliacao.id_livro == cls.id_livro, *filtros
+            ).scalar_subquery()
+
+        valores = {
+            cls.total_avaliacoes: subconsulta(db.func.count(Avaliacao.id_avaliacao)),
+            cls.soma_notas: subconsulta(db.func.sum(Avaliacao.nota))
+        }
+        for n in range(1, 6):
+            valores[getattr(cls, f'notas_{n}')] = subconsulta(
+                db.func.count(Avaliacao.id_avaliacao), Avaliacao.nota == n
+            )
+
+        resultado = db.session.execute(
+            db.update(cls).values(valores).execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        return resultado.rowcount
     
-    def to_dict(self):
-        return {
-            'id_livro': self.id_livro,
-            'isbn': self.isbn,
-            'titulo': self.titulo,
-            'autor': self.autor,
-            'editora': self.editora,
-            'ano_publicacao': self.ano_publicacao,
-            'genero': self.genero,
-            'subgenero': self.subgenero,
-            'idioma': self.idioma,
-            'num_paginas': self.num_paginas,
-            'idade_recomendada': self.idade_recomendada,
-            'localizacao': self.localizacao,
-            'estado_conservacao': self.estado_conservacao,
-            'status': self.status,
-            'disponivel': self.disponivel,
-            'capa_url': self.capa_url,
-            'sinopse': self.sinopse,
-            'data_aquisicao': self.data_aquisicao.isoformat() if self.data_aquisicao else None,
-            'origem': self.origem,
-            'valor_estimado': self.valor_estimado,
-            'classicos_familia': self.classicos_familia,
-            'nota_media': round(self.nota_media, 1),
-            'total_avaliacoes': self.avaliacoes.count()
-        }
\ No newline at end of file
+    # Campos de to_dict e as colunas que cada um lê (para ?fields=)
+    CAMPOS = {
+        'id_livro': coluna('id_livro'),
+        'isbn': coluna('isbn'),
+        'titulo': coluna('titulo'),
+        'autor': coluna('autor'),
+        'editora': coluna('editora'),
+        'ano_publicacao': coluna('ano_publicacao'),
+        'genero': coluna('genero'),
+        'subgenero': coluna('subgenero'),
+        'idioma': coluna('idioma'),
+        'num_paginas': coluna('num_paginas'),
+        'idade_recomendada': coluna('idade_recomendada'),
+        'localizacao': coluna('localizacao'),
+        'estado_conservacao': coluna('estado_conservacao'),
+        'status': calculado(lambda l: l.status, 'disponivel'),
+        'disponivel': coluna('disponivel'),
+        'capa_url': coluna('capa_url'),
+        'sinopse': coluna('sinopse'),
+        'data_aquisicao': data_iso('data_aquisicao'),
+        'origem': coluna('origem'),
+        'valor_estimado': coluna('valor_estimado'),
+        'classicos_familia': coluna('classicos_familia'),
+        'nota_media': calculado(lambda l: round(l.nota_media, 1), 'total_avaliacoes', 'soma_notas'),
+        'total_avaliacoes': calculado(lambda l: l.total_avaliacoes or 0, 'total_avaliacoes'),
+        'distribuicao_notas': calculado(
+            lambda l: l.distribuicao_notas, 'notas_1', 'notas_2', 'notas_3', 'notas_4', 'notas_5'
+        )
+    }
+
+    def to_dict(self, campos=None):
+        return serializar(self, campos)
@@ -1,4 +1,5 @@
 from app import db
+from utils.projecao import coluna, data_iso, calculado, serializar
 from datetime import datetime
 
 class Membro(db.Model):
@@ -14,35 +15,45 @@ class Membro(db.Model):
     generos_favoritos = db.Column(db.String(200))  # Gêneros separados por vírgula
     data_cadastro = db.Column(db.DateTime, default=datetime.utcnow)
     ativo = db.Column(db.Boolean, default=True)
-    pontos_leitura = db.Column(db.Integer, default=0)  # Gamificação
+    pontos_leitura = db.Column(db.Integer, default=0)  # Gamificação: soma consolidada do livro-razão (LancamentoPontos)
+    id_ultimo_lancamento = db.Column(db.Integer, default=0, nullable=False)  # Último lançamento já somado em pontos_leitura
     
     # Relacionamentos
     emprestimos = db.relationship('Emprestimo', back_populates='membro', lazy='dynamic')
     avaliacoes = db.relationship('Avaliacao', back_populates='membro', lazy='dynamic')
     wishlist_items = db.relationship('Wishlist', back_populates='membro', lazy='dynamic')
     
-    def to_dict(self):
-        return {
-            'id_membro': self.id_membro,
-            'nome': self.nome,
-            'email': self.email,
-            'apelido': self.apelido,
-            'idade': self.idade,
-            'tipo': self.tipo,
-            'avatar_cor': self.avatar_cor,
-            'generos_favoritos': self.generos_favoritos.split(',') if self.generos_favoritos else [],
-            'data_cadastro': self.data_cadastro.isoformat() if self.data_cadastro else None,
-            'ativo': self.ativo,
-            'pontos_leitura': self.pontos_leitura,
-            'nivel_leitor': self.calcular_nivel()
-        }
+    # Campos de to_dict e as colunas que cada um lê (para ?fields=)
+    CAMPOS = {
+        'id_membro': coluna('id_membro'),
+        'nome': coluna('nome'),
+        'email': coluna('email'),
+        'apelido': coluna('apelido'),
+        'idade': coluna('idade'),
+        'tipo': coluna('tipo'),
+        'avatar_cor': coluna('avatar_cor'),
+        'generos_favoritos': calculado(
+            lambda m: m.generos_favoritos.split(',') if m.generos_favoritos else [], 'generos_favoritos'
+        ),
+        'data_cadastro': data_iso('data_cadastro'),
+        'ativo': coluna('ativo'),
+        'pontos_leitura': coluna('pontos_leitura'),
+        'nivel_leitor': calculado(lambda m: m.calcular_nivel(), 'pontos_leitura')
+    }
+    
+    def to_dict(self, campos=None):
+        return serializar(self, campos)
     
     def calcular_nivel(self):
-        if self.pontos_leitura < 100:
+        return self.nivel_para(self.pontos_leitura)
+    
+    @staticmethod
+    def nivel_para(pontos):
+        if pontos < 100:
             return "Iniciante"
-        elif self.pontos_leitura < 500:
+        elif pontos < 500:
             return "Leitor"
-        elif self.pontos_leitura < 1000:
+        elif pontos < 1000:
             return "Bookworm"
         else:
             return "Mestre dos Livros"
\ No newline at end of file
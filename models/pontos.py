@@ -0,0 +1,106 @@
+from app import db
+from datetime import datetime
+
+class LancamentoPontos(db.Model):
+    __tablename__ = 'lancamentos_pontos'
+    __table_args__ = (
+        # Extrato e soma por período de um membro, lidos só do índice
+        db.Index('ix_lancamentos_membro_data', 'id_membro', 'data_lancamento', 'pontos'),
+        # Consolidação: lançamentos de um membro depois da marca
+        db.Index('ix_lancamentos_membro_id', 'id_membro', 'id_lancamento'),
+        # Quadros de semana/mês do ranking: somas por membro a partir de uma data
+        db.Index('ix_lancamentos_data', 'data_lancamento', 'id_membro', 'pontos'),
+    )
+
+    # Livro-razão de pontos: só recebe inserções. Membro.pontos_leitura é a soma
+    # consolidada até Membro.id_ultimo_lancamento, avançada pelo próprio lancar()
+    id_lancamento = db.Column(db.Integer, primary_key=True)
+    id_membro = db.Column(db.Integer, db.ForeignKey('membros_familia.id_membro'), nullable=False)
+    pontos = db.Column(db.Integer, nullable=False)
+    motivo = db.Column(db.String(30), nullable=False) # devolucao, devolucao_no_prazo, avaliacao, ...
+    id_referencia = db.Column(db.Integer) # Empréstimo, avaliação ou item da wishlist de origem
+    data_lancamento = db.Column(db.DateTime, default=datetime.now, nullable=False)
+
+    @classmethod
+    def _somar_pendentes(cls, limite):
+        """UPDATE que soma em pontos_leitura os lançamentos entre a marca do membro e limite."""
+        from models.membro import Membro
+        pendentes = db.and_(
+            cls.id_membro == Membro.id_membro,
+            cls.id_lancamento > Membro.id_ultimo_lancamento,
+            cls.id_lancamento <= limite
+        )
+        return (
+            db.update(Membro)
+            .where(db.exists().where(pendentes))
+            .values(
+                pontos_leitura=db.func.coalesce(Membro.pontos_leitura, 0) + db.select(
+                    db.func.coalesce(db.func.sum(cls.pontos), 0)
+                ).where(pendentes).scalar_subquery(),
+                id_ultimo_lancamento=limite
+            )
+            .execution_options(synchronize_session=False)
+        )
+
+    @classmethod
+    def lancar(cls, id_membro, pontos, motivo, id_referencia=None):
+        """Registra pontos para o membro e os soma em pontos_leitura na transação corrente.
+
+        A soma parte da marca do membro, não do valor lançado: se sobrou lançamento
+        sem consolidar, ele entra junto e nada é contado duas vezes.
+        """
+        if not pontos:
+            return
+        from models.membro import Membro
+        id_lancamento = db.session.execute(db.insert(cls).values(
+            id_membro=id_membro,
+            pontos=pontos,
+            motivo=motivo,
+            id_referencia=id_referencia,
+            data_lancamento=datetime.now()
+        )).inserted_primary_key[0]
+        db.session.execute(cls._somar_pendentes(id_lancamento).where(Membro.id_membro == id_membro))
+
+    @classmethod
+    def consolidar(cls):
+        """Reconciliação: soma em pontos_leitura os lançamentos que ficaram depois da marca.
+
+        lancar() já atualiza o membro na mesma transação; aqui só entram lançamentos
+        inseridos por fora dele (cargas, importações). Um único UPDATE: a escrita pega
+        o lock do banco, então o máximo lido na própria instrução não deixa passar
+        lançamento de transação em andamento. Retorna quantos membros foram atualizados.
+        """
+        limite = db.select(db.func.max(cls.id_lancamento)).scalar_subquery()
+        atualizados = db.session.execute(cls._somar_pendentes(limite)).rowcount
+        if atualizados:
+            from models.cache_versao import CacheVersao
+            CacheVersao.incrementar('membros', 'estatisticas')
+        db.session.commit()
+        return atualizados
+
+    @classmethod
+    def recalcular(cls):
+        """Refaz Membro.pontos_leitura somando o livro-razão inteiro. Retorna quantos membros mudaram."""
+        from models.membro import Membro
+        from models.cache_versao import CacheVersao
+        do_membro = cls.id_membro == Membro.id_membro
+        total = db.select(db.func.coalesce(db.func.sum(cls.pontos), 0)).where(do_membro).scalar_subquery()
+        marca = db.select(db.func.coalesce(db.func.max(cls.id_lancamento), 0)).where(do_membro).scalar_subquery()
+        atualizados = db.session.execute(
+            db.update(Membro)
+            .values(pontos_leitura=total, id_ultimo_lancamento=marca)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        CacheVersao.incrementar('membros', 'estatisticas')
+        db.session.commit()
+        return atualizados
+
+    def to_dict(self):
+        return {
+            'id_lancamento': self.id_lancamento,
+            'id_membro': self.id_membro,
+            'pontos': self.pontos,
+            'motivo': self.motivo,
+            'id_referencia': self.id_referencia,
+            'data_lancamento': self.data_lancamento.isoformat() if self.data_lancamento else None
+        }
@@ -0,0 +1,20 @@
+from app import db
+from datetime import datetime
+
+class EventoAvaliacao(db.Model):
+    __tablename__ = 'eventos_avaliacao'
+
+    # Registro de "as avaliações deste membro mudaram"; o modelo de recomendação
+    # de cada processo aplica os eventos posteriores ao último que já processou
+    id_evento = db.Column(db.Integer, primary_key=True)
+    id_membro = db.Column(db.Integer, db.ForeignKey('membros_familia.id_membro'), nullable=False)
+    data_evento = db.Column(db.DateTime, default=datetime.utcnow)
+
+    @classmethod
+    def registrar(cls, id_membro):
+        """Marca as avaliações do membro como alteradas, na transação corrente."""
+        db.session.execute(db.insert(cls).values(id_membro=id_membro, data_evento=datetime.utcnow()))
+
+    @classmethod
+    def ultimo(cls):
+        return db.session.scalar(db.select(db.func.max(cls.id_evento))) or 0
@@ -0,0 +1,100 @@
+from app import db
+from datetime import datetime
+import json
+import os
+
+# Diretório do índice em disco, dentro de instance/ (services/similares.py)
+DIRETORIO_INDICE = 'similares'
+# Maior id_livro coberto pelo índice, em JSON: lido aqui sem carregar numpy
+ARQUIVO_COBERTURA = 'cobertura.json'
+
+class VizinhancaLivro(db.Model):
+    __tablename__ = 'vizinhanca_livros'
+
+    # Camada sobre o índice de similares gravado em disco: livros criados ou
+    # alterados depois da última reconstrução, e os livros cujas listas eles mudaram
+    id_livro = db.Column(db.Integer, db.ForeignKey('livros.id_livro'), primary_key=True)
+    vizinhos = db.Column(db.Text, nullable=False) # JSON [[id_livro, similaridade], ...]
+    vetor = db.Column(db.Text) # JSON {indice_termo: peso}; só para livros com texto novo
+    atualizado_em = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    @classmethod
+    def gravar(cls, id_livro, vizinhos, vetor=None):
+        """Grava (insere ou substitui) a lista de vizinhos do livro, na transação corrente."""
+        from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+        valores = {
+            'id_livro': id_livro,
+            'vizinhos': json.dumps(vizinhos),
+            'atualizado_em': datetime.utcnow()
+        }
+        atualizar = dict(valores)
+        if vetor is not None:
+            valores['vetor'] = atualizar['vetor'] = json.dumps(vetor)
+        db.session.execute(
+            sqlite_insert(cls).values(valores)
+            .on_conflict_do_update(index_elements=['id_livro'], set_=atualizar)
+        )
+
+    @classmethod
+    def gravar_listas(cls, listas):
+        """Substitui as listas de vizinhos de vários livros ({id_livro: lista}) em uma instrução."""
+        if not listas:
+            return
+        from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+        agora = datetime.utcnow()
+        instrucao = sqlite_insert(cls)
+        db.session.execute(
+            instrucao.on_conflict_do_update(
+                index_elements=['id_livro'],
+                set_={'vizinhos': instrucao.excluded.vizinhos, 'atualizado_em': instrucao.excluded.atualizado_em}
+            ),
+            [{'id_livro': id_livro, 'vizinhos': json.dumps(lista), 'atualizado_em': agora}
+             for id_livro, lista in listas.items()]
+        )
+
+    @classmethod
+    def listas(cls, ids, contendo=None):
+        """{id_livro: lista} dos livros em `ids` e, com `contendo`, dos que têm esse livro na lista."""
+        condicoes = [cls.id_livro.in_(ids)] if ids else []
+        if contendo is not None:
+            # vizinhos é JSON [[id, sim], ...]: "[<id>," só aparece no início de um par
+            condicoes.append(cls.vizinhos.like(f'%[{int(contendo)},%'))
+        if not condicoes:
+            return {}
+        linhas = db.session.execute(db.select(cls.id_livro, cls.vizinhos).where(db.or_(*condicoes)))
+        return {id_livro: [tuple(par) for par in json.loads(vizinhos)] for id_livro, vizinhos in linhas}
+
+    @classmethod
+    def remover(cls, id_livro):
+        db.session.execute(
+            db.delete(cls).where(cls.id_livro == id_livro).execution_options(synchronize_session=False)
+        )
+
+    @classmethod
+    def precisa_reconstruir(cls, instance_path, limite):
+        """True se o índice em disco ainda não existe, a camada passou de `limite` livros
+        ou há livros cadastrados depois da construção que não estão nem na camada.
+
+        O último caso cobre importações grandes demais para a camada. Só consulta o
+        banco e o sistema de arquivos: quem chama decide se importa numpy/scipy para
+        reconstruir.
+        """
+        from models.livro import Livro
+        diretorio = os.path.join(instance_path, DIRETORIO_INDICE)
+        if not os.path.exists(os.path.join(diretorio, 'ids.npy')):
+            return True
+        if db.session.scalar(db.select(db.func.count()).select_from(cls)) > limite:
+            return True
+        try:
+            with open(os.path.join(diretorio, ARQUIVO_COBERTURA), encoding='utf-8') as arquivo:
+                maior_id = json.load(arquivo)['maior_id']
+        except (OSError, ValueError, KeyError):
+            return True
+        fora_do_indice = db.select(Livro.id_livro).where(
+            Livro.id_livro > maior_id,
+            ~db.exists().where(cls.id_livro == Livro.id_livro)
+        )
+        return db.session.scalar(db.select(fora_do_indice.exists()))
+
+    def lista(self):
+        return [tuple(par) for par in json.loads(self.vizinhos)]
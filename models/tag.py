@@ -0,0 +1,105 @@
+from app import db
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+class Tag(db.Model):
+    __tablename__ = 'tags'
+
+    id_tag = db.Column(db.Integer, primary_key=True)
+    nome = db.Column(db.String(50), unique=True, nullable=False) # Sempre normalizado (minúsculo, sem espaços nas pontas)
+
+    @staticmethod
+    def normalizar(tags):
+        """Converte o texto "Aventura, magia ,aventura" em ['aventura', 'magia']."""
+        if not tags:
+            return []
+        nomes = []
+        for tag in tags.split(','):
+            nome = tag.strip().lower()[:50]
+            if nome and nome not in nomes:
+                nomes.append(nome)
+        return nomes
+
+    def to_dict(self):
+        return {
+            'id_tag': self.id_tag,
+            'nome': self.nome
+        }
+
+
+class AvaliacaoTag(db.Model):
+    __tablename__ = 'avaliacao_tags'
+    __table_args__ = (
+        # "Livros com a tag X": busca pela tag e devolve os livros sem ler a tabela
+        db.Index('ix_avaliacao_tags_tag_livro', 'id_tag', 'id_livro'),
+        # Remoção das tags de uma avaliação
+        db.Index('ix_avaliacao_tags_avaliacao', 'id_avaliacao'),
+    )
+
+    id_tag = db.Column(db.Integer, db.ForeignKey('tags.id_tag'), primary_key=True)
+    id_avaliacao = db.Column(db.Integer, db.ForeignKey('avaliacoes.id_avaliacao'), primary_key=True)
+    # Copiado da avaliação para que o filtro por tag não precise do join
+    id_livro = db.Column(db.Integer, db.ForeignKey('livros.id_livro'), nullable=False)
+
+    @classmethod
+    def sincronizar(cls, avaliacao):
+        """Regrava as tags da avaliação a partir do campo texto, na transação corrente.
+
+        A avaliação precisa já ter id (use db.session.flush() antes).
+        """
+        cls.remover(avaliacao.id_avaliacao)
+        nomes = Tag.normalizar(avaliacao.tags)
+        if not nomes:
+            return
+        db.session.execute(
+            sqlite_insert(Tag).values([{'nome': nome} for nome in nomes]).on_conflict_do_nothing()
+        )
+        ids_tags = db.session.execute(
+            db.select(Tag.id_tag).where(Tag.nome.in_(nomes))
+        ).scalars().all()
+        db.session.execute(db.insert(cls), [
+            {'id_tag': id_tag, 'id_avaliacao': avaliacao.id_avaliacao, 'id_livro': avaliacao.id_livro}
+            for id_tag in ids_tags
+        ])
+
+    @classmethod
+    def remover(cls, id_avaliacao):
+        db.session.execute(
+            db.delete(cls).where(cls.id_avaliacao == id_avaliacao)
+            .execution_options(synchronize_session=False)
+        )
+
+    @classmethod
+    def reconstruir(cls):
+        """Recria todos os vínculos a partir de Avaliacao.tags. Retorna quantos foram gravados."""
+        from models.avaliacao import Avaliacao
+        db.session.execute(db.delete(cls))
+        avaliacoes = db.session.execute(
+            db.select(Avaliacao.id_avaliacao, Avaliacao.id_livro, Avaliacao.tags)
+            .where(Avaliacao.tags.isnot(None), Avaliacao.tags != '')
+        ).all()
+        nomes = {nome for _, _, tags in avaliacoes for nome in Tag.normalizar(tags)}
+        if nomes:
+            db.session.execute(
+                sqlite_insert(Tag).values([{'nome': nome} for nome in nomes]).on_conflict_do_nothing()
+            )
+        ids_tags = dict(db.session.execute(db.select(Tag.nome, Tag.id_tag)).all())
+        vinculos = [
+            {'id_tag': ids_tags[nome], 'id_avaliacao': id_avaliacao, 'id_livro': id_livro}
+            for id_avaliacao, id_livro, tags in avaliacoes
+            for nome in Tag.normalizar(tags)
+        ]
+        if vinculos:
+            db.session.execute(db.insert(cls), vinculos)
+        db.session.commit()
+        return len(vinculos)
+
+    @classmethod
+    def filtro_livros(cls, nome_tag):
+        """Condição "Livro tem alguma avaliação com a tag", para usar em Livro.query.filter()."""
+        from models.livro import Livro
+        ids_livros = (
+            db.select(cls.id_livro)
+            .join(Tag, Tag.id_tag == cls.id_tag)
+            .where(Tag.nome == nome_tag.strip().lower())
+        )
+        return Livro.id_livro.in_(ids_livros)
@@ -1,8 +1,15 @@
 from app import db
+from utils.projecao import coluna, data_iso, calculado, relacionado, serializar
 from datetime import datetime
 
 class Wishlist(db.Model):
     __tablename__ = 'wishlist'
+    __table_args__ = (
+        # Lista de desejos de um membro, filtrada por prioridade e ordenada por data
+        db.Index('ix_wishlist_membro_prioridade_data', 'id_membro', 'prioridade', 'data_adicao'),
+        # Lista de desejos de toda a família filtrada só por prioridade (?prioridade=)
+        db.Index('ix_wishlist_prioridade_data', 'prioridade', 'data_adicao'),
+    )
 
     id_wishlist = db.Column(db.Integer, primary_key=True)
     id_membro = db.Column(db.Integer, db.ForeignKey('membros_familia.id_membro'))
@@ -17,15 +24,24 @@ class Wishlist(db.Model):
     membro = db.relationship('Membro', back_populates='wishlist_items')
     livro = db.relationship('Livro', back_populates='wishlist_items')
 
-    def to_dict(self):
-        return {
-            'id_wishlist': self.id_wishlist,
-            'id_membro': self.id_membro,
-            'nome_membro': self.membro.none if self.membro else None,
-            'id_livro': self.id_livro,
-            'titulo_livro': self.livro.titulo if self.livro else self.titulo_desejado,
-            'autor_livro': self.livro.autor if self.livro else self.autor_desejado,
-            'prioridade': self.prioridade,
-            'data_adicao': self.data_adicao.isoformat() if self.data_adicao else None,
-            'notas': self.notas
-        }
\ No newline at end of file
+    # Campos de to_dict e as colunas que cada um lê (para ?fields=)
+    CAMPOS = {
+        'id_wishlist': coluna('id_wishlist'),
+        'id_membro': coluna('id_membro'),
+        'nome_membro': relacionado('membro', 'nome', 'id_membro'),
+        'id_livro': coluna('id_livro'),
+        'titulo_livro': calculado(
+            lambda w: w.livro.titulo if w.livro else w.titulo_desejado, 'id_livro', 'titulo_desejado',
+            relacoes={'livro': ('titulo',)}
+        ),
+        'autor_livro': calculado(
+            lambda w: w.livro.autor if w.livro else w.autor_desejado, 'id_livro', 'autor_desejado',
+            relacoes={'livro': ('autor',)}
+        ),
+        'prioridade': coluna('prioridade'),
+        'data_adicao': data_iso('data_adicao'),
+        'notas': coluna('notas')
+    }
+
+    def to_dict(self, campos=None):
+        return serializar(self, campos)
@@ -6,10 +6,23 @@ from app import db
 from models.avaliacao import Avaliacao
 from models.livro import Livro
 from models.membro import Membro
-from flasgger import swag_from
+from models.estatistica import EstatisticasSnapshot
+from models.tag import AvaliacaoTag
+from models.recomendacao import EventoAvaliacao
+from models.pontos import LancamentoPontos
+from utils.documentacao import swag_from
+from utils.paginacao import paginar, resposta_paginada, CursorInvalido, PARAMETROS_PAGINACAO
+from utils.projecao import ler_campos, preparar_consulta, CampoInvalido, PARAMETRO_CAMPOS
+from utils.cache import cache_resposta, invalidar_cache
 
 avaliacoes_bp = Blueprint('avaliacoes', __name__)
 
+# Mais recentes primeiro; o id desempata avaliações do mesmo instante
+ORDENACAO_AVALIACOES = [
+    (Avaliacao.data_avaliacao, 'desc'),
+    (Avaliacao.id_avaliacao, 'desc')
+]
+
 @avaliacoes_bp.route('/avaliacoes', methods=['POST'])
 @swag_from({
     'tags': ['Avaliações'],
@@ -23,8 +36,8 @@ avaliacoes_bp = Blueprint('avaliacoes', __name__)
                 'type': 'object',
                 'required': ['id_membro', 'id_livro', 'nota'],
                 'properties': {
-                    'id_membro': {'type': 'integer'},
-                    'id_livro': {'type': 'integer'},
+                    'id_membro': {'type': 'integer', 'minimum': 1},
+                    'id_livro': {'type': 'integer', 'minimum': 1},
                     'nota': {'type': 'integer', 'minimum': 1, 'maximum': 5},
                     'comentario': {'type': 'string'},
                     'recomenda_para_idade': {'type': 'string'},
@@ -42,15 +55,9 @@ avaliacoes_bp = Blueprint('avaliacoes', __name__)
 })
 def criar_avaliacao():
     try:
+        # Corpo já validado contra o esquema acima (utils/validacao.py)
         data = request.get_json()
         
-        # Validações
-        if not all([data.get('id_membro'), data.get('id_livro'), data.get('nota')]):
-            return jsonify({'erro': 'ID do membro, ID do livro e nota são obrigatórios'}), 400
-        
-        if data['nota'] < 1 or data['nota'] > 5:
-            return jsonify({'erro': 'Nota deve estar entre 1 e 5'}), 400
-        
         # Verifica se já existe avaliação
         avaliacao_existente = Avaliacao.query.filter_by(
             id_membro=data['id_membro'],
@@ -75,12 +82,17 @@ def criar_avaliacao():
             leitura_completa=data.get('leitura_completa', True)
         )
         
-        # Adiciona pontos ao membro pela avaliação
-        membro = Membro.query.get(data['id_membro'])
-        if membro:
-            membro.pontos_leitura += 15  # 15 pontos por avaliação
-        
         db.session.add(nova_avaliacao)
+        db.session.flush()
+        
+        # Pontos pela avaliação vão para o livro-razão (15 pontos por avaliação)
+        if db.session.get(Membro, data['id_membro']):
+            LancamentoPontos.lancar(data['id_membro'], 15, 'avaliacao', nova_avaliacao.id_avaliacao)
+        AvaliacaoTag.sincronizar(nova_avaliacao)
+        EventoAvaliacao.registrar(nova_avaliacao.id_membro)
+        Livro.ajustar_agregados(nova_avaliacao.id_livro, nova_avaliacao.nota, 1)
+        EstatisticasSnapshot.ajustar(total_avaliacoes=1)
+        invalidar_cache('avaliacoes', 'membros')
         db.session.commit()
         
         return jsonify(nova_avaliacao.to_dict()), 201
@@ -99,18 +111,24 @@ def criar_avaliacao():
             'type': 'integer',
             'required': True,
             'description': 'ID do livro'
-        }
+        },
+        *PARAMETROS_PAGINACAO,
+        PARAMETRO_CAMPOS
     ],
     'responses': {
         200: {'description': 'Lista de avaliações retornada com sucesso'}
     }
 })
+@cache_resposta('avaliacoes', 'membros', 'livros')
 def listar_avaliacoes_livro(id_livro):
     try:
-        avaliacoes = Avaliacao.query.filter_by(id_livro=id_livro).order_by(
-            Avaliacao.data_avaliacao.desc()
-        ).all()
-        return jsonify([a.to_dict() for a in avaliacoes]), 200
+        campos = ler_campos(Avaliacao)
+        avaliacoes, proximo_cursor = paginar(
+            preparar_consulta(Avaliacao.query.filter_by(id_livro=id_livro), Avaliacao, campos), ORDENACAO_AVALIACOES
+        )
+        return resposta_paginada([a.to_dict(campos) for a in avaliacoes], proximo_cursor), 200
+    except (CursorInvalido, CampoInvalido) as e:
+        return jsonify({'erro': str(e)}), 400
     except Exception as e:
         return jsonify({'erro': str(e)}), 500
 
@@ -125,18 +143,24 @@ def listar_avaliacoes_livro(id_livro):
             'type': 'integer',
             'required': True,
             'description': 'ID do membro'
-        }
+        },
+        *PARAMETROS_PAGINACAO,
+        PARAMETRO_CAMPOS
     ],
     'responses': {
         200: {'description': 'Lista de avaliações retornada com sucesso'}
     }
 })
+@cache_resposta('avaliacoes', 'membros', 'livros')
 def listar_avaliacoes_membro(id_membro):
     try:
-        avaliacoes = Avaliacao.query.filter_by(id_membro=id_membro).order_by(
-            Avaliacao.data_avaliacao.desc()
-        ).all()
-        return jsonify([a.to_dict() for a in avaliacoes]), 200
+        campos = ler_campos(Avaliacao)
+        avaliacoes, proximo_cursor = paginar(
+            preparar_consulta(Avaliacao.query.filter_by(id_membro=id_membro), Avaliacao, campos), ORDENACAO_AVALIACOES
+        )
+        return resposta_paginada([a.to_dict(campos) for a in avaliacoes], proximo_cursor), 200
+    except (CursorInvalido, CampoInvalido) as e:
+        return jsonify({'erro': str(e)}), 400
     except Exception as e:
         return jsonify({'erro': str(e)}), 500
 
@@ -158,6 +182,7 @@ def listar_avaliacoes_membro(id_membro):
         404: {'description': 'Avaliação não encontrada'}
     }
 })
+@cache_resposta('avaliacoes', 'membros', 'livros')
 def buscar_avaliacao(id):
     try:
         avaliacao = Avaliacao.query.get(id)
@@ -186,7 +211,7 @@ def buscar_avaliacao(id):
             'schema': {
                 'type': 'object',
                 'properties': {
-                    'nota': {'type': 'integer', 'minimum': 1, 'maximum': 5},
+                    'nota': {'type': 'integer', 'minimum': 1, 'maximum': 5, 'x-nullable': False},
                     'comentario': {'type': 'string'},
                     'recomenda_para_idade': {'type': 'string'},
                     'tags': {'type': 'string'},
@@ -197,6 +222,7 @@ def buscar_avaliacao(id):
     ],
     'responses': {
         200: {'description': 'Avaliação atualizada com sucesso'},
+        400: {'description': 'Dados inválidos'},
         404: {'description': 'Avaliação não encontrada'}
     }
 })
@@ -208,22 +234,30 @@ def atualizar_avaliacao(id):
         
         data = request.get_json()
         
-        # Validação da nota se fornecida
         if 'nota' in data:
-            if data['nota'] < 1 or data['nota'] > 5:
-                return jsonify({'erro': 'Nota deve estar entre 1 e 5'}), 400
-            
             # Verifica se o livro é clássico da família
             livro = Livro.query.get(avaliacao.id_livro)
             if livro and livro.classicos_familia and data['nota'] < 4:
                 return jsonify({'aviso': 'Clássico da família! Tem certeza que quer dar menos de 4 estrelas?'}), 200
         
+        nota_anterior = avaliacao.nota
+        
         # Atualiza campos permitidos
         campos_atualizaveis = ['nota', 'comentario', 'recomenda_para_idade', 'tags', 'leitura_completa']
         for campo in campos_atualizaveis:
             if campo in data:
                 setattr(avaliacao, campo, data[campo])
         
+        # Mantém os agregados do livro em sincronia com a nova nota
+        if avaliacao.nota != nota_anterior:
+            Livro.ajustar_agregados(avaliacao.id_livro, nota_anterior, -1)
+            Livro.ajustar_agregados(avaliacao.id_livro, avaliacao.nota, 1)
+            EventoAvaliacao.registrar(avaliacao.id_membro)
+        
+        if 'tags' in data:
+            AvaliacaoTag.sincronizar(avaliacao)
+        
+        invalidar_cache('avaliacoes')
         db.session.commit()
         return jsonify(avaliacao.to_dict()), 200
     except Exception as e:
@@ -254,11 +288,18 @@ def deletar_avaliacao(id):
         if not avaliacao:
             return jsonify({'erro': 'Avaliação não encontrada'}), 404
         
-        # Remove os pontos do membro (15 pontos que foram dados)
-        membro = Membro.query.get(avaliacao.id_membro)
+        # Estorna os 15 pontos dados pela avaliação, sem deixar o total negativo.
+        # lancar() mantém pontos_leitura em dia, então o saldo lido aqui é o do livro-razão
+        membro = db.session.get(Membro, avaliacao.id_membro)
         if membro:
-            membro.pontos_leitura = max(0, membro.pontos_leitura - 15)
+            estorno = min(15, max(0, membro.pontos_leitura or 0))
+            LancamentoPontos.lancar(avaliacao.id_membro, -estorno, 'avaliacao_removida', avaliacao.id_avaliacao)
         
+        Livro.ajustar_agregados(avaliacao.id_livro, avaliacao.nota, -1)
+        AvaliacaoTag.remover(avaliacao.id_avaliacao)
+        EventoAvaliacao.registrar(avaliacao.id_membro)
+        EstatisticasSnapshot.ajustar(total_avaliacoes=-1)
+        invalidar_cache('avaliacoes', 'membros')
         db.session.delete(avaliacao)
         db.session.commit()
         
@@ -285,25 +326,23 @@ def deletar_avaliacao(id):
         200: {'description': 'Lista de livros mais bem avaliados'}
     }
 })
+@cache_resposta('avaliacoes', 'livros')
 def livros_mais_bem_avaliados():
     try:
         limit = request.args.get('limit', 10, type=int)
         
-        # Query para pegar livros com suas médias
+        # Usa os agregados mantidos em Livro, sem varrer a tabela de avaliações
+        nota_media = (Livro.soma_notas * 1.0 / Livro.total_avaliacoes).label('nota_media')
         livros_com_notas = db.session.query(
             Livro.id_livro,
             Livro.titulo,
             Livro.autor,
-            db.func.avg(Avaliacao.nota).label('nota_media'),
-            db.func.count(Avaliacao.id_avaliacao).label('total_avaliacoes')
-        ).join(
-            Avaliacao
-        ).group_by(
-            Livro.id_livro
-        ).having(
-            db.func.count(Avaliacao.id_avaliacao) >= 1  # Pelo menos 1 avaliação
+            nota_media,
+            Livro.total_avaliacoes
+        ).filter(
+            Livro.total_avaliacoes >= 1  # Pelo menos 1 avaliação
         ).order_by(
-            db.func.avg(Avaliacao.nota).desc()
+            nota_media.desc()
         ).limit(limit).all()
         
         resultado = [
@@ -0,0 +1,37 @@
+from flask import Blueprint, current_app, jsonify, request
+from utils.documentacao import swag_from
+
+debug_bp = Blueprint('debug', __name__)
+
+@debug_bp.route('/debug/consultas', methods=['GET'])
+@swag_from({
+    'tags': ['Debug'],
+    'summary': 'Consultas SQL das últimas requisições deste processo',
+    'description': 'Número de instruções, tempo no banco, as mais lentas e as formas repetidas '
+                   '(suspeita de N+1). Só registrado com DEBUG_CONSULTAS=1 ou em modo debug.',
+    'parameters': [
+        {
+            'name': 'suspeitas',
+            'in': 'query',
+            'type': 'boolean',
+            'required': False,
+            'description': 'Apenas requisições com suspeita de N+1'
+        }
+    ],
+    'responses': {
+        200: {'description': 'Requisições, da mais recente para a mais antiga'}
+    }
+})
+def listar_consultas():
+    try:
+        instrumentacao = current_app.extensions.get('instrumentacao')
+        if instrumentacao is None:
+            return jsonify({'erro': 'Instrumentação de SQL desligada (INSTRUMENTACAO_SQL=0)'}), 404
+
+        suspeitas = request.args.get('suspeitas', '').lower() == 'true'
+        return jsonify({
+            'limite_repeticoes': instrumentacao.limite_repeticoes,
+            'requisicoes': instrumentacao.recentes(apenas_suspeitas=suspeitas)
+        }), 200
+    except Exception as e:
+        return jsonify({'erro': str(e)}), 500
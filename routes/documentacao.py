@@ -0,0 +1,54 @@
+from flask import Blueprint, current_app, jsonify, make_response, request, send_from_directory
+from utils.documentacao import diretorio_swagger_ui
+
+# Só registrado em produção (MODO_PRODUCAO=1): mesmas URLs do Flasgger, servidas de arquivos
+documentacao_bp = Blueprint('documentacao', __name__)
+
+PAGINA_SWAGGER_UI = '''<!DOCTYPE html>
+<html lang="pt-BR">
+<head>
+  <meta charset="utf-8">
+  <title>{titulo}</title>
+  <link rel="stylesheet" href="/apidocs/static/swagger-ui.css">
+</head>
+<body>
+  <div id="swagger-ui"></div>
+  <script src="/apidocs/static/swagger-ui-bundle.js"></script>
+  <script src="/apidocs/static/swagger-ui-standalone-preset.js"></script>
+  <script>
+    SwaggerUIBundle({{
+      url: '/apispec_1.json',
+      dom_id: '#swagger-ui',
+      presets: [SwaggerUIBundle.presets.apis, SwaggerUIStandalonePreset],
+      layout: 'StandaloneLayout'
+    }});
+  </script>
+</body>
+</html>
+'''
+
+@documentacao_bp.route('/apispec_1.json', methods=['GET'])
+def especificacao():
+    # Corpo e ETag carregados no boot: a requisição não toca no disco nem remonta a especificação
+    especificacao = current_app.extensions.get('openapi')
+    if especificacao is None:
+        return jsonify({'erro': 'Especificação não gerada; rode flask gerar-openapi no build'}), 404
+    resposta = make_response(especificacao['corpo'], 200)
+    resposta.mimetype = 'application/json'
+    resposta.set_etag(especificacao['etag'])
+    resposta.headers['Cache-Control'] = f'public, max-age={current_app.config["OPENAPI_MAX_AGE"]}'
+    return resposta.make_conditional(request)
+
+@documentacao_bp.route('/apidocs/', methods=['GET'])
+def swagger_ui():
+    if diretorio_swagger_ui() is None:
+        return jsonify({'erro': 'Swagger UI indisponível (flasgger não instalado)'}), 404
+    titulo = current_app.config['SWAGGER'].get('title', 'API')
+    return PAGINA_SWAGGER_UI.format(titulo=titulo), 200, {'Content-Type': 'text/html; charset=utf-8'}
+
+@documentacao_bp.route('/apidocs/static/<path:arquivo>', methods=['GET'])
+def arquivos_swagger_ui(arquivo):
+    diretorio = diretorio_swagger_ui()
+    if diretorio is None:
+        return jsonify({'erro': 'Swagger UI indisponível (flasgger não instalado)'}), 404
+    return send_from_directory(diretorio, arquivo)
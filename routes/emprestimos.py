@@ -3,11 +3,41 @@ from app import db
 from models.emprestimo import Emprestimo
 from models.livro import Livro
 from models.membro import Membro
+from models.estatistica import EstatisticasSnapshot
+from models.pontos import LancamentoPontos
 from datetime import datetime, timedelta
-from flasgger import swag_from
+from utils.documentacao import swag_from
+from utils.paginacao import paginar, resposta_paginada, CursorInvalido, PARAMETROS_PAGINACAO
+from utils.projecao import ler_campos, preparar_consulta, CampoInvalido, PARAMETRO_CAMPOS
+from utils.cache import cache_resposta, invalidar_cache
 
 emprestimos_bp = Blueprint('emprestimos', __name__)
 
+# Mais recentes primeiro; o id desempata empréstimos feitos no mesmo instante
+ORDENACAO_EMPRESTIMOS = [
+    (Emprestimo.data_emprestimo, 'desc'),
+    (Emprestimo.id_emprestimo, 'desc')
+]
+
+
+def filtrar_emprestimos(query, args, agora=None):
+    """Aplica à consulta os filtros de status e tipo presentes na query string."""
+    # O status gravado pode estar defasado até a próxima varredura de atrasos,
+    # então ativo/atrasado são filtrados pelo prazo
+    status = args.get('status')
+    if status == 'atrasado':
+        query = query.filter(Emprestimo.filtro_atrasado(agora))
+    elif status == 'ativo':
+        query = query.filter(Emprestimo.filtro_em_dia(agora))
+    elif status and status != 'todos':
+        query = query.filter_by(status=status)
+    
+    tipo = args.get('tipo')
+    if tipo and tipo != 'todos':
+        query = query.filter_by(tipo_emprestimo=tipo)
+    
+    return query
+
 @emprestimos_bp.route('/emprestimos', methods=['POST'])
 @swag_from({
     'tags': ['Empréstimos'],
@@ -21,8 +51,8 @@ emprestimos_bp = Blueprint('emprestimos', __name__)
                 'type': 'object',
                 'required': ['id_livro'],
                 'properties': {
-                    'id_membro': {'type': 'integer', 'description': 'ID do membro (se empréstimo interno)'},
-                    'id_livro': {'type': 'integer'},
+                    'id_membro': {'type': 'integer', 'minimum': 1, 'description': 'ID do membro (se empréstimo interno)'},
+                    'id_livro': {'type': 'integer', 'minimum': 1},
                     'tipo_emprestimo': {'type': 'string', 'enum': ['interno', 'externo']},
                     'nome_amigo': {'type': 'string', 'description': 'Nome do amigo (se empréstimo externo)'},
                     'contato_amigo': {'type': 'string', 'description': 'Contato do amigo'},
@@ -33,23 +63,17 @@ emprestimos_bp = Blueprint('emprestimos', __name__)
     ],
     'responses': {
         201: {'description': 'Empréstimo realizado com sucesso'},
-        400: {'description': 'Livro não disponível'},
+        400: {'description': 'Dados inválidos ou livro não disponível'},
         404: {'description': 'Livro não encontrado'}
     }
 })
 def realizar_emprestimo():
     try:
+        # Tipos e campos obrigatórios já validados contra o esquema acima (utils/validacao.py);
+        # aqui ficam só as regras que dependem do tipo de empréstimo
         data = request.get_json()
         
-        # Validações
-        livro = Livro.query.get(data['id_livro'])
-        if not livro:
-            return jsonify({'erro': 'Livro não encontrado'}), 404
-        
-        if not livro.disponivel:
-            return jsonify({'erro': 'Livro não disponível'}), 400
-        
-        tipo = data.get('tipo_emprestimo', 'interno')
+        tipo = data.get('tipo_emprestimo') or 'interno'
         
         # Validação para empréstimo interno
         if tipo == 'interno':
@@ -68,20 +92,26 @@ def realizar_emprestimo():
             if not data.get('nome_amigo'):
                 return jsonify({'erro': 'Nome do amigo é obrigatório para empréstimo externo'}), 400
         
+        # Reserva o livro com um UPDATE condicional: só um pedido concorrente consegue
+        if not Livro.reservar(data['id_livro']):
+            db.session.rollback()
+            if not db.session.get(Livro, data['id_livro']):
+                return jsonify({'erro': 'Livro não encontrado'}), 404
+            return jsonify({'erro': 'Livro não disponível'}), 400
+        
         # Cria o empréstimo
         novo_emprestimo = Emprestimo(
             id_membro=data.get('id_membro', 1),  # Default para admin se for externo
             id_livro=data['id_livro'],
             tipo_emprestimo=tipo,
-            nome_amigo=data.get('nome_amigo'),
-            contato_amigo=data.get('contato_amigo'),
+            nome_amiga=data.get('nome_amigo'),
+            contato_emprestimo=data.get('contato_amigo'),
             observacoes=data.get('observacoes')
         )
         
-        # Atualiza disponibilidade do livro
-        livro.disponivel = False
-        
         db.session.add(novo_emprestimo)
+        EstatisticasSnapshot.ajustar(total_emprestimos=1, emprestimos_ativos=1, livros_disponiveis=-1)
+        invalidar_cache('emprestimos', 'livros')
         db.session.commit()
         
         return jsonify(novo_emprestimo.to_dict()), 201
@@ -116,12 +146,23 @@ def devolver_livro(id):
         if emprestimo.status == 'devolvido':
             return jsonify({'erro': 'Livro já foi devolvido'}), 400
         
-        emprestimo.status = 'devolvido'
-        emprestimo.data_devolucao = datetime.utcnow()
+        status_anterior = emprestimo.status
+        dias_atraso = emprestimo.calcular_dias_atraso()
+        
+        # Compare-and-set: só devolve se o status não mudou desde a leitura,
+        # então duas devoluções simultâneas não liberam o livro nem pontuam duas vezes
+        devolvido = db.session.execute(
+            db.update(Emprestimo)
+            .where(Emprestimo.id_emprestimo == id, Emprestimo.status == status_anterior)
+            .values(status='devolvido', data_devolucao=datetime.utcnow())
+        ).rowcount
+        if not devolvido:
+            db.session.rollback()
+            return jsonify({'erro': 'Livro já foi devolvido'}), 400
         
         # Atualiza disponibilidade do livro
-        livro = Livro.query.get(emprestimo.id_livro)
-        livro.disponivel = True
+        livro_liberado = Livro.liberar(emprestimo.id_livro)
+        livro = db.session.get(Livro, emprestimo.id_livro)
         
         # Adiciona pontos de leitura se for membro da família
         pontos_base = 0
@@ -131,12 +172,19 @@ def devolver_livro(id):
             if livro.num_paginas:
                 pontos_base = min(100, livro.num_paginas // 10)
             
+            LancamentoPontos.lancar(emprestimo.id_membro, pontos_base, 'devolucao', emprestimo.id_emprestimo)
+            
             # Bônus por devolver no prazo
-            if emprestimo.calcular_dias_atraso() == 0:
+            if dias_atraso == 0:
+                LancamentoPontos.lancar(emprestimo.id_membro, 20, 'devolucao_no_prazo', emprestimo.id_emprestimo)
                 pontos_base += 20
-            
-            emprestimo.membro.pontos_leitura += pontos_base
         
+        EstatisticasSnapshot.ajustar(
+            livros_disponiveis=1 if livro_liberado else 0,
+            emprestimos_ativos=-1 if status_anterior == 'ativo' else 0,
+            emprestimos_atrasados=-1 if status_anterior == 'atrasado' else 0
+        )
+        invalidar_cache('emprestimos', 'livros', 'membros')
         db.session.commit()
         
         return jsonify({
@@ -164,43 +212,37 @@ def devolver_livro(id):
             'in': 'query',
             'type': 'string',
             'enum': ['interno', 'externo', 'todos']
-        }
+        },
+        *PARAMETROS_PAGINACAO,
+        PARAMETRO_CAMPOS
     ],
     'responses': {
         200: {'description': 'Lista de empréstimos'}
     }
 })
+@cache_resposta('emprestimos', 'livros', 'membros', por_dia=True)
 def listar_emprestimos():
     try:
-        query = Emprestimo.query
-        
-        status = request.args.get('status')
-        if status and status != 'todos':
-            query = query.filter_by(status=status)
-        
-        tipo = request.args.get('tipo')
-        if tipo and tipo != 'todos':
-            query = query.filter_by(tipo_emprestimo=tipo)
+        campos = ler_campos(Emprestimo)
+        query = preparar_consulta(filtrar_emprestimos(Emprestimo.query, request.args), Emprestimo, campos)
+        emprestimos, proximo_cursor = paginar(query, ORDENACAO_EMPRESTIMOS)
         
-        emprestimos = query.order_by(Emprestimo.data_emprestimo.desc()).all()
-        
-        # Atualiza status de atrasados
-        for emp in emprestimos:
-            if emp.status == 'ativo' and emp.calcular_dias_atraso() > 0:
-                emp.status = 'atrasado'
-        
-        db.session.commit()
-        
-        return jsonify([e.to_dict() for e in emprestimos]), 200
+        return resposta_paginada([e.to_dict(campos) for e in emprestimos], proximo_cursor), 200
+    except (CursorInvalido, CampoInvalido) as e:
+        return jsonify({'erro': str(e)}), 400
     except Exception as e:
         return jsonify({'erro': str(e)}), 500
 
 @emprestimos_bp.route('/emprestimos/membro/<int:id_membro>', methods=['GET'])
+@cache_resposta('emprestimos', 'livros', 'membros', por_dia=True)
 def listar_emprestimos_membro(id_membro):
     try:
-        emprestimos = Emprestimo.query.filter_by(id_membro=id_membro).order_by(
-            Emprestimo.data_emprestimo.desc()
-        ).all()
-        return jsonify([e.to_dict() for e in emprestimos]), 200
+        campos = ler_campos(Emprestimo)
+        emprestimos, proximo_cursor = paginar(
+            preparar_consulta(Emprestimo.query.filter_by(id_membro=id_membro), Emprestimo, campos), ORDENACAO_EMPRESTIMOS
+        )
+        return resposta_paginada([e.to_dict(campos) for e in emprestimos], proximo_cursor), 200
+    except (CursorInvalido, CampoInvalido) as e:
+        return jsonify({'erro': str(e)}), 400
     except Exception as e:
         return jsonify({'erro': str(e)}), 500
\ No newline at end of file
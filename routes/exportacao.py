@@ -0,0 +1,184 @@
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+from app import db
+from models.livro import Livro
+from models.membro import Membro
+from models.emprestimo import Emprestimo
+from models.avaliacao import Avaliacao
+from utils.documentacao import swag_from
+from utils.banco import sessao_leitura
+
+exportacao_bp = Blueprint('exportacao', __name__)
+
+# Linhas buscadas por ida ao banco e tamanho aproximado de cada pedaço enviado ao cliente
+LINHAS_POR_LOTE = 1000
+BYTES_POR_PEDACO = 64 * 1024
+
+
+def _consulta_livros():
+    return db.select(*Livro.__table__.columns).order_by(Livro.id_livro)
+
+
+def _consulta_emprestimos():
+    # Nomes relacionados vêm do mesmo join, sem lazy load por linha
+    return db.select(
+        *Emprestimo.__table__.columns,
+        Membro.nome.label('nome_membro'),
+        Livro.titulo.label('titulo_livro')
+    ).outerjoin(Membro, Emprestimo.id_membro == Membro.id_membro).outerjoin(
+        Livro, Emprestimo.id_livro == Livro.id_livro
+    ).order_by(Emprestimo.id_emprestimo)
+
+
+def _consulta_avaliacoes():
+    return db.select(
+        *Avaliacao.__table__.columns,
+        Membro.nome.label('nome_membro'),
+        Livro.titulo.label('titulo_livro')
+    ).outerjoin(Membro, Avaliacao.id_membro == Membro.id_membro).outerjoin(
+        Livro, Avaliacao.id_livro == Livro.id_livro
+    ).order_by(Avaliacao.id_avaliacao)
+
+
+CONSULTAS_EXPORTACAO = {
+    'livros': _consulta_livros,
+    'emprestimos': _consulta_emprestimos,
+    'avaliacoes': _consulta_avaliacoes
+}
+
+
+def _serializar_valor(valor):
+    return valor.isoformat() if isinstance(valor, datetime) else valor
+
+
+def _linhas(consulta):
+    """Percorre a consulta com cursor no servidor, LINHAS_POR_LOTE linhas por vez.
+
+    Usa a sessão somente leitura, que é fechada quando o fluxo termina, para
+    uma exportação longa não ocupar conexões do pool de escrita.
+    """
+    sessao = sessao_leitura()
+    resultado = sessao.execute(consulta.execution_options(yield_per=LINHAS_POR_LOTE))
+
+    def percorrer():
+        try:
+            yield from resultado
+        finally:
+            sessao.close()
+
+    return resultado.keys(), percorrer()
+
+
+def _gerar_ndjson(colunas, linhas):
+    for linha in linhas:
+        yield json.dumps(
+            {coluna: _serializar_valor(valor) for coluna, valor in zip(colunas, linha)},
+            ensure_ascii=False
+        ) + '\n'
+
+
+def _gerar_csv(colunas, linhas):
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    escritor.writerow(colunas)
+    for linha in linhas:
+        escritor.writerow([_serializar_valor(valor) for valor in linha])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+def _agrupar(partes):
+    """Junta as linhas em pedaços de ~BYTES_POR_PEDACO para reduzir o overhead de escrita."""
+    pedaco, tamanho = [], 0
+    for parte in partes:
+        dados = parte.encode('utf-8')
+        pedaco.append(dados)
+        tamanho += len(dados)
+        if tamanho >= BYTES_POR_PEDACO:
+            yield b''.join(pedaco)
+            pedaco, tamanho = [], 0
+    if pedaco:
+        yield b''.join(pedaco)
+
+
+def _comprimir(pedacos):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31: formato gzip
+    for pedaco in pedacos:
+        dados = compressor.compress(pedaco)
+        if dados:
+            yield dados
+    yield compressor.flush()
+
+
+@exportacao_bp.route('/export/<recurso>', methods=['GET'])
+@swag_from({
+    'tags': ['Exportação'],
+    'summary': 'Exporta livros, empréstimos ou avaliações em fluxo (NDJSON ou CSV)',
+    'description': 'As linhas são lidas do banco em lotes e enviadas à medida que são geradas; '
+                   'o consumo de memória não depende do tamanho da tabela.',
+    'produces': ['application/x-ndjson', 'text/csv', 'application/gzip'],
+    'parameters': [
+        {
+            'name': 'recurso',
+            'in': 'path',
+            'type': 'string',
+            'enum': ['livros', 'emprestimos', 'avaliacoes'],
+            'required': True
+        },
+        {
+            'name': 'formato',
+            'in': 'query',
+            'type': 'string',
+            'enum': ['ndjson', 'csv'],
+            'default': 'ndjson',
+            'required': False
+        },
+        {
+            'name': 'gzip',
+            'in': 'query',
+            'type': 'boolean',
+            'required': False,
+            'description': 'Comprime a saída com gzip'
+        }
+    ],
+    'responses': {
+        200: {'description': 'Arquivo exportado'},
+        400: {'description': 'Formato inválido'},
+        404: {'description': 'Recurso desconhecido'}
+    }
+})
+def exportar(recurso):
+    try:
+        if recurso not in CONSULTAS_EXPORTACAO:
+            return jsonify({'erro': 'Recurso de exportação desconhecido'}), 404
+        
+        formato = request.args.get('formato', 'ndjson')
+        if formato not in ('ndjson', 'csv'):
+            return jsonify({'erro': 'Formato deve ser ndjson ou csv'}), 400
+        comprimir = request.args.get('gzip', '').lower() == 'true'
+        
+        colunas, linhas = _linhas(CONSULTAS_EXPORTACAO[recurso]())
+        gerador = _gerar_csv if formato == 'csv' else _gerar_ndjson
+        corpo = _agrupar(gerador(list(colunas), linhas))
+        
+        nome_arquivo = f'{recurso}.{formato}'
+        mimetype = 'text/csv' if formato == 'csv' else 'application/x-ndjson'
+        if comprimir:
+            corpo = _comprimir(corpo)
+            nome_arquivo += '.gz'
+            mimetype = 'application/gzip'
+        
+        return Response(
+            stream_with_context(corpo),
+            mimetype=mimetype,
+            headers={'Content-Disposition': f'attachment; filename="{nome_arquivo}"'}
+        )
+    except Exception as e:
+        return jsonify({'erro': str(e)}), 500
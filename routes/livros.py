@@ -1,71 +1,252 @@
 from flask import Blueprint, jsonify, request
 from app import db
 from models.livro import Livro
-from flasgger import swag_from
+from models.busca import buscar_livros
+from models.estatistica import EstatisticasSnapshot
+from models.tag import AvaliacaoTag
+from models.similar import VizinhancaLivro
+from utils.cache import cache_resposta, invalidar_cache
+from services.importacao import importar_livros, ler_csv, ler_jsonl
+from utils.documentacao import swag_from
+from utils.paginacao import paginar, resposta_paginada, CursorInvalido, PARAMETROS_PAGINACAO
+from utils.projecao import ler_campos, preparar_consulta, filtrar_extras, CampoInvalido, PARAMETRO_CAMPOS
 
 livros_bp = Blueprint('livros', __name__)
 
+# Filtros do catálogo, compartilhados pela listagem e pelas facetas
+PARAMETROS_FILTRO_LIVROS = [
+    {
+        'name': 'genero',
+        'in': 'query',
+        'type': 'string',
+        'required': False,
+        'description': 'Filtrar por gênero'
+    },
+    {
+        'name': 'subgenero',
+        'in': 'query',
+        'type': 'string',
+        'required': False,
+        'description': 'Filtrar por subgênero'
+    },
+    {
+        'name': 'idioma',
+        'in': 'query',
+        'type': 'string',
+        'required': False,
+        'description': 'Filtrar por idioma'
+    },
+    {
+        'name': 'idade_recomendada',
+        'in': 'query',
+        'type': 'string',
+        'required': False,
+        'description': 'Filtrar por idade recomendada'
+    },
+    {
+        'name': 'estado_conservacao',
+        'in': 'query',
+        'type': 'string',
+        'required': False,
+        'description': 'Filtrar por estado de conservação'
+    },
+    {
+        'name': 'disponivel',
+        'in': 'query',
+        'type': 'boolean',
+        'required': False,
+        'description': 'Filtrar apenas disponíveis'
+    },
+    {
+        'name': 'classicos',
+        'in': 'query',
+        'type': 'boolean',
+        'required': False,
+        'description': 'Filtrar apenas clássicos da família'
+    },
+    {
+        'name': 'tag',
+        'in': 'query',
+        'type': 'string',
+        'required': False,
+        'description': 'Filtrar livros com alguma avaliação marcada com a tag'
+    }
+]
+
+# Dimensões contadas em /livros/facetas (nome na resposta -> coluna)
+FACETAS_LIVROS = {
+    'genero': Livro.genero,
+    'subgenero': Livro.subgenero,
+    'idioma': Livro.idioma,
+    'idade_recomendada': Livro.idade_recomendada,
+    'estado_conservacao': Livro.estado_conservacao,
+    'disponivel': Livro.disponivel,
+    'classicos_familia': Livro.classicos_familia
+}
+
+
+# Catálogo em ordem de cadastro
+ORDENACAO_LIVROS = [(Livro.id_livro, 'asc')]
+
+# Campos que entram no índice de similares (services/similares.PESOS_CAMPOS)
+CAMPOS_TEXTO_SIMILARES = ('titulo', 'autor', 'genero', 'subgenero', 'sinopse')
+
+
+def atualizar_similares(livro, novo=False):
+    """Atualiza o índice de livros parecidos para um livro novo ou com texto alterado."""
+    # Import tardio: numpy/scipy só são carregados quando o catálogo muda
+    from services.similares import atualizar_livro
+    atualizar_livro(livro, novo)
+
+
+def filtrar_livros(query, args):
+    """Aplica à consulta os filtros do catálogo presentes na query string."""
+    for campo in ('genero', 'subgenero', 'idioma', 'idade_recomendada', 'estado_conservacao'):
+        valor = args.get(campo)
+        if valor:
+            query = query.filter(getattr(Livro, campo) == valor)
+    
+    disponivel = args.get('disponivel')
+    if disponivel and disponivel.lower() == 'true':
+        query = query.filter(Livro.disponivel == True)  # noqa: E712
+    
+    classicos = args.get('classicos')
+    if classicos and classicos.lower() == 'true':
+        query = query.filter(Livro.classicos_familia == True)  # noqa: E712
+    
+    tag = args.get('tag')
+    if tag:
+        query = query.filter(AvaliacaoTag.filtro_livros(tag))
+    
+    return query
+
 @livros_bp.route('/livros', methods=['GET'])
 @swag_from({
     'tags': ['Livros'],
     'summary': 'Lista todos os livros com filtros opcionais',
+    'parameters': [
+        *PARAMETROS_FILTRO_LIVROS,
+        *PARAMETROS_PAGINACAO,
+        PARAMETRO_CAMPOS
+    ],
+    'responses': {
+        200: {'description': 'Lista de livros retornada com sucesso'},
+        400: {'description': 'Cursor ou campo inválido'}
+    }
+})
+@cache_resposta('livros', 'avaliacoes', 'emprestimos')
+def listar_livros():
+    try:
+        campos = ler_campos(Livro)
+        query = preparar_consulta(filtrar_livros(Livro.query, request.args), Livro, campos)
+        
+        livros, proximo_cursor = paginar(query, ORDENACAO_LIVROS)
+        return resposta_paginada([l.to_dict(campos) for l in livros], proximo_cursor), 200
+    except (CursorInvalido, CampoInvalido) as e:
+        return jsonify({'erro': str(e)}), 400
+    except Exception as e:
+        return jsonify({'erro': str(e)}), 500
+
+@livros_bp.route('/livros/facetas', methods=['GET'])
+@swag_from({
+    'tags': ['Livros'],
+    'summary': 'Contagens por gênero, subgênero, idioma, idade, conservação, disponibilidade e clássicos',
+    'description': 'Conta os livros de cada valor de cada dimensão, considerando os filtros aplicados. '
+                   'Aceita os mesmos filtros de GET /livros.',
+    'parameters': PARAMETROS_FILTRO_LIVROS,
+    'responses': {
+        200: {
+            'description': 'Total de livros filtrados e contagens por dimensão',
+            'schema': {
+                'type': 'object',
+                'properties': {
+                    'total': {'type': 'integer'},
+                    'facetas': {'type': 'object'}
+                }
+            }
+        }
+    }
+})
+@cache_resposta('livros', 'avaliacoes')
+def facetas_livros():
+    try:
+        # Uma única passada: agrupa pelas combinações das dimensões (poucas, mesmo
+        # em catálogos grandes) e soma cada dimensão a partir delas
+        colunas = list(FACETAS_LIVROS.values())
+        combinacoes = filtrar_livros(
+            db.session.query(*colunas, db.func.count()), request.args
+        ).group_by(*colunas).all()
+        
+        facetas = {nome: {} for nome in FACETAS_LIVROS}
+        total = 0
+        for *valores, quantidade in combinacoes:
+            total += quantidade
+            for nome, valor in zip(FACETAS_LIVROS, valores):
+                facetas[nome][valor] = facetas[nome].get(valor, 0) + quantidade
+        
+        return jsonify({
+            'total': total,
+            'facetas': {
+                nome: [
+                    {'valor': valor, 'total': quantidade}
+                    for valor, quantidade in sorted(contagens.items(), key=lambda item: (-item[1], str(item[0])))
+                ]
+                for nome, contagens in facetas.items()
+            }
+        }), 200
+    except Exception as e:
+        return jsonify({'erro': str(e)}), 500
+
+@livros_bp.route('/livros/busca', methods=['GET'])
+@swag_from({
+    'tags': ['Livros'],
+    'summary': 'Busca textual no catálogo (título, autor, editora, sinopse e comentários)',
     'parameters': [
         {
-            'name': 'genero',
+            'name': 'q',
             'in': 'query',
             'type': 'string',
-            'required': False,
-            'description': 'Filtrar por gênero'
-        },
-        {
-            'name': 'disponivel',
-            'in': 'query',
-            'type': 'boolean',
-            'required': False,
-            'description': 'Filtrar apenas disponíveis'
+            'required': True,
+            'description': 'Texto a buscar; acentos são ignorados e cada palavra casa por prefixo'
         },
         {
-            'name': 'idade_recomendada',
+            'name': 'limit',
             'in': 'query',
-            'type': 'string',
+            'type': 'integer',
             'required': False,
-            'description': 'Filtrar por idade recomendada'
+            'default': 20,
+            'description': 'Número máximo de resultados'
         },
-        {
-            'name': 'classicos',
-            'in': 'query',
-            'type': 'boolean',
-            'required': False,
-            'description': 'Filtrar apenas clássicos da família'
-        }
+        PARAMETRO_CAMPOS
     ],
     'responses': {
-        200: {'description': 'Lista de livros retornada com sucesso'}
+        200: {'description': 'Livros ordenados por relevância, com trecho destacado (HTML escapado, termos em <mark>)'},
+        400: {'description': 'Parâmetro q ausente ou campo inválido'}
     }
 })
-def listar_livros():
+@cache_resposta('livros', 'avaliacoes', 'emprestimos')
+def buscar_livros_texto():
     try:
-        query = Livro.query
-        
-        # Filtros opcionais
-        genero = request.args.get('genero')
-        if genero:
-            query = query.filter_by(genero=genero)
-        
-        disponivel = request.args.get('disponivel')
-        if disponivel and disponivel.lower() == 'true':
-            query = query.filter_by(disponivel=True)
+        texto = request.args.get('q', '').strip()
+        if not texto:
+            return jsonify({'erro': 'Informe o texto da busca no parâmetro q'}), 400
         
-        idade = request.args.get('idade_recomendada')
-        if idade:
-            query = query.filter_by(idade_recomendada=idade)
+        limit = max(1, min(request.args.get('limit', 20, type=int), 100))
+        campos = ler_campos(Livro, extras=('relevancia', 'trecho'))
+        resultados = buscar_livros(texto, limit)
         
-        classicos = request.args.get('classicos')
-        if classicos and classicos.lower() == 'true':
-            query = query.filter_by(classicos_familia=True)
+        # Carrega todos os livros encontrados em uma única query
+        ids = [id_livro for id_livro, _, _ in resultados]
+        consulta = preparar_consulta(Livro.query.filter(Livro.id_livro.in_(ids)), Livro, campos)
+        livros = {l.id_livro: l for l in consulta.all()} if ids else {}
         
-        livros = query.all()
-        return jsonify([l.to_dict() for l in livros]), 200
+        return jsonify([
+            filtrar_extras(dict(livros[id_livro].to_dict(campos), relevancia=relevancia, trecho=trecho), campos)
+            for id_livro, relevancia, trecho in resultados
+            if id_livro in livros
+        ]), 200
+    except CampoInvalido as e:
+        return jsonify({'erro': str(e)}), 400
     except Exception as e:
         return jsonify({'erro': str(e)}), 500
 
@@ -87,12 +268,60 @@ def listar_livros():
         404: {'description': 'Livro não encontrado'}
     }
 })
+@cache_resposta('livros', 'avaliacoes', 'emprestimos')
 def buscar_livro(id):
     livro = Livro.query.get(id)
     if livro:
         return jsonify(livro.to_dict()), 200
     return jsonify({'erro': 'Livro não encontrado'}), 404
 
+@livros_bp.route('/livros/<int:id>/similares', methods=['GET'])
+@swag_from({
+    'tags': ['Livros'],
+    'summary': 'Lista livros parecidos (título, autor, gênero e sinopse)',
+    'parameters': [
+        {
+            'name': 'id',
+            'in': 'path',
+            'type': 'integer',
+            'required': True,
+            'description': 'ID do livro'
+        },
+        {
+            'name': 'limit',
+            'in': 'query',
+            'type': 'integer',
+            'required': False,
+            'default': 10,
+            'description': 'Número de livros a retornar (até 20)'
+        },
+        PARAMETRO_CAMPOS
+    ],
+    'responses': {
+        200: {'description': 'Livros parecidos, do mais para o menos similar'},
+        400: {'description': 'Campo inválido'},
+        404: {'description': 'Livro não encontrado'}
+    }
+})
+@cache_resposta('livros', 'avaliacoes')
+def livros_similares(id):
+    try:
+        if not db.session.get(Livro, id):
+            return jsonify({'erro': 'Livro não encontrado'}), 404
+        
+        limit = min(max(request.args.get('limit', 10, type=int), 1), 20)
+        campos = ler_campos(Livro, extras=('similaridade',))
+        
+        from services.similares import similares
+        return jsonify([
+            filtrar_extras({**livro.to_dict(campos), 'similaridade': round(similaridade, 4)}, campos)
+            for livro, similaridade in similares(id, limit)
+        ]), 200
+    except CampoInvalido as e:
+        return jsonify({'erro': str(e)}), 400
+    except Exception as e:
+        return jsonify({'erro': str(e)}), 500
+
 @livros_bp.route('/livros', methods=['POST'])
 @swag_from({
     'tags': ['Livros'],
@@ -107,8 +336,8 @@ def buscar_livro(id):
                 'required': ['titulo', 'autor'],
                 'properties': {
                     'isbn': {'type': 'string'},
-                    'titulo': {'type': 'string'},
-                    'autor': {'type': 'string'},
+                    'titulo': {'type': 'string', 'minLength': 1},
+                    'autor': {'type': 'string', 'minLength': 1},
                     'editora': {'type': 'string'},
                     'ano_publicacao': {'type': 'integer'},
                     'genero': {'type': 'string'},
@@ -135,11 +364,9 @@ def buscar_livro(id):
 })
 def criar_livro():
     try:
+        # Corpo já validado contra o esquema acima (utils/validacao.py)
         data = request.get_json()
         
-        if not data.get('titulo') or not data.get('autor'):
-            return jsonify({'erro': 'Título e autor são obrigatórios'}), 400
-        
         # Verifica ISBN duplicado
         if data.get('isbn'):
             if Livro.query.filter_by(isbn=data['isbn']).first():
@@ -166,6 +393,15 @@ def criar_livro():
         )
         
         db.session.add(novo_livro)
+        db.session.flush()
+        atualizar_similares(novo_livro, novo=True)
+        EstatisticasSnapshot.ajustar(
+            total_livros=1,
+            livros_disponiveis=1,
+            total_classicos=1 if novo_livro.classicos_familia else 0,
+            valor_total=novo_livro.valor_estimado or 0
+        )
+        invalidar_cache('livros')
         db.session.commit()
         
         return jsonify(novo_livro.to_dict()), 201
@@ -173,6 +409,59 @@ def criar_livro():
         db.session.rollback()
         return jsonify({'erro': str(e)}), 500
 
+@livros_bp.route('/livros/import', methods=['POST'])
+@swag_from({
+    'tags': ['Livros'],
+    'summary': 'Importa livros em lote a partir de CSV ou JSONL',
+    'description': 'O corpo é lido em fluxo e gravado em lotes. Linhas inválidas ou com ISBN '
+                   'já cadastrado são listadas no relatório sem interromper a importação.',
+    'consumes': ['text/csv', 'application/x-ndjson'],
+    'parameters': [
+        {
+            'name': 'formato',
+            'in': 'query',
+            'type': 'string',
+            'enum': ['csv', 'jsonl'],
+            'required': False,
+            'description': 'Formato do corpo; se omitido é deduzido do Content-Type'
+        },
+        {
+            'name': 'body',
+            'in': 'body',
+            'required': True,
+            'schema': {
+                'type': 'string',
+                'description': 'CSV com cabeçalho (colunas iguais aos campos de POST /livros) ou um objeto JSON por linha'
+            }
+        }
+    ],
+    'responses': {
+        200: {'description': 'Relatório da importação (importados, duplicados, inválidos e erros por linha)'},
+        400: {'description': 'Formato não suportado'}
+    }
+})
+def importar_catalogo():
+    try:
+        formato = request.args.get('formato')
+        if not formato:
+            tipo = request.mimetype or ''
+            formato = 'csv' if tipo == 'text/csv' else 'jsonl' if tipo in (
+                'application/x-ndjson', 'application/jsonl', 'application/jsonlines'
+            ) else None
+        
+        if formato == 'csv':
+            registros = ler_csv(request.stream)
+        elif formato == 'jsonl':
+            registros = ler_jsonl(request.stream)
+        else:
+            return jsonify({'erro': 'Informe formato=csv ou formato=jsonl (ou o Content-Type correspondente)'}), 400
+        
+        relatorio = importar_livros(registros)
+        return jsonify(relatorio.to_dict()), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'erro': str(e)}), 500
+
 @livros_bp.route('/livros/<int:id>', methods=['PUT'])
 @swag_from({
     'tags': ['Livros'],
@@ -192,8 +481,8 @@ def criar_livro():
             'schema': {
                 'type': 'object',
                 'properties': {
-                    'titulo': {'type': 'string'},
-                    'autor': {'type': 'string'},
+                    'titulo': {'type': 'string', 'minLength': 1, 'x-nullable': False},
+                    'autor': {'type': 'string', 'minLength': 1, 'x-nullable': False},
                     'editora': {'type': 'string'},
                     'ano_publicacao': {'type': 'integer'},
                     'genero': {'type': 'string'},
@@ -214,6 +503,7 @@ def criar_livro():
     ],
     'responses': {
         200: {'description': 'Livro atualizado com sucesso'},
+        400: {'description': 'Dados inválidos'},
         404: {'description': 'Livro não encontrado'}
     }
 })
@@ -232,10 +522,25 @@ def atualizar_livro(id):
                                'capa_url', 'sinopse', 'origem', 'valor_estimado',
                                'classicos_familia']
         
+        valor_anterior = livro.valor_estimado or 0
+        classico_anterior = bool(livro.classicos_familia)
+        
+        texto_alterado = any(
+            campo in data and data[campo] != getattr(livro, campo) for campo in CAMPOS_TEXTO_SIMILARES
+        )
+        
         for campo in campos_atualizaveis:
             if campo in data:
                 setattr(livro, campo, data[campo])
         
+        if texto_alterado:
+            atualizar_similares(livro)
+        
+        EstatisticasSnapshot.ajustar(
+            valor_total=(livro.valor_estimado or 0) - valor_anterior,
+            total_classicos=int(bool(livro.classicos_familia)) - int(classico_anterior)
+        )
+        invalidar_cache('livros')
         db.session.commit()
         return jsonify(livro.to_dict()), 200
     except Exception as e:
@@ -270,6 +575,14 @@ def deletar_livro(id):
         if not livro.disponivel:
             return jsonify({'erro': 'Não é possível remover um livro emprestado'}), 400
         
+        EstatisticasSnapshot.ajustar(
+            total_livros=-1,
+            livros_disponiveis=-1,
+            total_classicos=-1 if livro.classicos_familia else 0,
+            valor_total=-(livro.valor_estimado or 0)
+        )
+        VizinhancaLivro.remover(livro.id_livro)
+        invalidar_cache('livros')
         db.session.delete(livro)
         db.session.commit()
         
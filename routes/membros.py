@@ -1,14 +1,29 @@
 from flask import Blueprint, jsonify, request
 from app import db
 from models.membro import Membro
-from flasgger import swag_from
+from models.livro import Livro
+from models.pontos import LancamentoPontos
+from services.ranking import PERIODOS, usar_classificacao
+from routes.ranking import PARAMETRO_PERIODO
+from datetime import datetime
+from utils.documentacao import swag_from
+from utils.paginacao import paginar, resposta_paginada, CursorInvalido, PARAMETROS_PAGINACAO
+from utils.projecao import ler_campos, preparar_consulta, filtrar_extras, CampoInvalido, PARAMETRO_CAMPOS
+from utils.cache import cache_resposta, invalidar_cache
 
 membros_bp = Blueprint('membros', __name__)
 
+# Extrato de pontos: mais recentes primeiro; o id desempata lançamentos do mesmo instante
+ORDENACAO_LANCAMENTOS = [
+    (LancamentoPontos.data_lancamento, 'desc'),
+    (LancamentoPontos.id_lancamento, 'desc')
+]
+
 @membros_bp.route('/membros', methods=['GET'])
 @swag_from({
     'tags': ['Membros da Família'],
     'summary': 'Lista todos os membros da família',
+    'parameters': [*PARAMETROS_PAGINACAO, PARAMETRO_CAMPOS],
     'responses': {
         200: {
             'description': 'Lista de membros retornada com sucesso',
@@ -31,9 +46,185 @@ membros_bp = Blueprint('membros', __name__)
         }
     }
 })
+@cache_resposta('membros')
 def listar_membros():
     try:
-        membros = Membro.query.filter_by(ativo=True).all()
-        return jsonify([m.to_dict() for m in membros]), 200
+        campos = ler_campos(Membro)
+        membros, proximo_cursor = paginar(
+            preparar_consulta(Membro.query.filter_by(ativo=True), Membro, campos), [(Membro.id_membro, 'asc')]
+        )
+        return resposta_paginada([m.to_dict(campos) for m in membros], proximo_cursor), 200
+    except (CursorInvalido, CampoInvalido) as e:
+        return jsonify({'erro': str(e)}), 400
+    except Exception as e:
+        return jsonify({'erro': str(e)}), 500
+
+@membros_bp.route('/membros/<int:id>/recomendacoes', methods=['GET'])
+@swag_from({
+    'tags': ['Membros da Família'],
+    'summary': 'Recomenda livros a partir das avaliações de leitores parecidos',
+    'description': 'Filtragem colaborativa item-item. Livros já avaliados ou emprestados pelo membro '
+                   'ficam de fora, e para crianças só entram livros da faixa de idade.',
+    'parameters': [
+        {
+            'name': 'id',
+            'in': 'path',
+            'type': 'integer',
+            'required': True,
+            'description': 'ID do membro'
+        },
+        {
+            'name': 'limit',
+            'in': 'query',
+            'type': 'integer',
+            'required': False,
+            'default': 10,
+            'description': 'Número de recomendações'
+        },
+        PARAMETRO_CAMPOS
+    ],
+    'responses': {
+        200: {'description': 'Livros recomendados, do mais para o menos indicado'},
+        400: {'description': 'Campo inválido'},
+        404: {'description': 'Membro não encontrado'}
+    }
+})
+@cache_resposta('avaliacoes', 'emprestimos', 'livros', 'membros')
+def recomendacoes_membro(id):
+    try:
+        membro = db.session.get(Membro, id)
+        if not membro:
+            return jsonify({'erro': 'Membro não encontrado'}), 404
+        
+        limit = min(max(request.args.get('limit', 10, type=int), 1), 50)
+        campos = ler_campos(Livro, extras=('pontuacao', 'motivo'))
+        
+        # numpy/scipy só são carregados quando a primeira recomendação é pedida
+        from services.recomendacao import recomendar_para_membro
+        recomendacoes = recomendar_para_membro(membro, limit)
+        
+        return jsonify([
+            filtrar_extras({**livro.to_dict(campos), 'pontuacao': pontuacao, 'motivo': motivo}, campos)
+            for livro, pontuacao, motivo in recomendacoes
+        ]), 200
+    except CampoInvalido as e:
+        return jsonify({'erro': str(e)}), 400
+    except Exception as e:
+        return jsonify({'erro': str(e)}), 500
+
+@membros_bp.route('/membros/<int:id>/pontos', methods=['GET'])
+@swag_from({
+    'tags': ['Membros da Família'],
+    'summary': 'Extrato de pontos do membro (livro-razão)',
+    'description': 'Lido só do livro-razão, com total por período.',
+    'parameters': [
+        {
+            'name': 'id',
+            'in': 'path',
+            'type': 'integer',
+            'required': True,
+            'description': 'ID do membro'
+        },
+        {
+            'name': 'desde',
+            'in': 'query',
+            'type': 'string',
+            'format': 'date',
+            'required': False,
+            'description': 'Só lançamentos a partir desta data (YYYY-MM-DD)'
+        },
+        *PARAMETROS_PAGINACAO
+    ],
+    'responses': {
+        200: {
+            'description': 'Total, total no período e lançamentos (mais recentes primeiro)',
+            'schema': {
+                'type': 'object',
+                'properties': {
+                    'id_membro': {'type': 'integer'},
+                    'total': {'type': 'integer'},
+                    'total_periodo': {'type': 'integer'},
+                    'lancamentos': {'type': 'array', 'items': {'type': 'object'}}
+                }
+            }
+        },
+        400: {'description': 'Data inválida'},
+        404: {'description': 'Membro não encontrado'}
+    }
+})
+@cache_resposta('membros')
+def extrato_pontos(id):
+    try:
+        if not db.session.get(Membro, id):
+            return jsonify({'erro': 'Membro não encontrado'}), 404
+        
+        desde = request.args.get('desde')
+        try:
+            desde = datetime.fromisoformat(desde) if desde else None
+        except ValueError:
+            return jsonify({'erro': 'desde deve estar no formato YYYY-MM-DD'}), 400
+        
+        do_membro = LancamentoPontos.query.filter_by(id_membro=id)
+        periodo = do_membro.filter(LancamentoPontos.data_lancamento >= desde) if desde else do_membro
+        soma = db.func.coalesce(db.func.sum(LancamentoPontos.pontos), 0)
+        
+        lancamentos, proximo_cursor = paginar(periodo, ORDENACAO_LANCAMENTOS)
+        resposta = jsonify({
+            'id_membro': id,
+            'desde': desde.isoformat() if desde else None,
+            'total': do_membro.with_entities(soma).scalar(),
+            'total_periodo': periodo.with_entities(soma).scalar(),
+            'lancamentos': [l.to_dict() for l in lancamentos]
+        })
+        if proximo_cursor:
+            resposta.headers['X-Proximo-Cursor'] = proximo_cursor
+        return resposta, 200
+    except CursorInvalido as e:
+        return jsonify({'erro': str(e)}), 400
+    except Exception as e:
+        return jsonify({'erro': str(e)}), 500
+
+@membros_bp.route('/membros/<int:id>/ranking', methods=['GET'])
+@swag_from({
+    'tags': ['Membros da Família'],
+    'summary': 'Posição do membro no ranking de leitores',
+    'description': 'Posição (empates dividem a posição), percentil (percentual de membros com menos '
+                   'pontos) e os vizinhos imediatamente acima e abaixo.',
+    'parameters': [
+        {
+            'name': 'id',
+            'in': 'path',
+            'type': 'integer',
+            'required': True,
+            'description': 'ID do membro'
+        },
+        PARAMETRO_PERIODO,
+        {
+            'name': 'vizinhos',
+            'in': 'query',
+            'type': 'integer',
+            'required': False,
+            'default': 2,
+            'description': 'Quantos leitores mostrar acima e abaixo'
+        }
+    ],
+    'responses': {
+        200: {'description': 'Posição, percentil e vizinhos do membro'},
+        400: {'description': 'Período inválido'},
+        404: {'description': 'Membro não encontrado ou inativo'}
+    }
+})
+def ranking_membro(id):
+    try:
+        periodo = request.args.get('periodo', 'geral')
+        if periodo not in PERIODOS:
+            return jsonify({'erro': f'periodo deve ser um de: {", ".join(PERIODOS)}'}), 400
+        vizinhos = min(max(request.args.get('vizinhos', 2, type=int), 0), 10)
+        
+        with usar_classificacao() as classificacao:
+            posicao = classificacao.do_membro(periodo, id, vizinhos)
+        if posicao is None:
+            return jsonify({'erro': 'Membro não encontrado ou inativo'}), 404
+        return jsonify(posicao), 200
     except Exception as e:
-        return jsonify({'erro': str(e)}), 500
\ No newline at end of file
+        return jsonify({'erro': str(e)}), 500
@@ -0,0 +1,75 @@
+from flask import Blueprint, jsonify, request
+from utils.documentacao import swag_from
+from services.ranking import PERIODOS, usar_classificacao
+
+ranking_bp = Blueprint('ranking', __name__)
+
+PARAMETRO_PERIODO = {
+    'name': 'periodo',
+    'in': 'query',
+    'type': 'string',
+    'enum': list(PERIODOS),
+    'required': False,
+    'default': 'geral',
+    'description': 'geral, semana (desde segunda-feira) ou mes (desde o dia 1)'
+}
+
+@ranking_bp.route('/ranking', methods=['GET'])
+@swag_from({
+    'tags': ['Membros da Família'],
+    'summary': 'Ranking de leitores por pontos',
+    'description': 'Servido de um ranking mantido em memória e atualizado a partir do livro-razão '
+                   'de pontos; membros empatados dividem a posição.',
+    'parameters': [
+        PARAMETRO_PERIODO,
+        {
+            'name': 'limit',
+            'in': 'query',
+            'type': 'integer',
+            'required': False,
+            'default': 10,
+            'description': 'Número de leitores'
+        },
+        {
+            'name': 'offset',
+            'in': 'query',
+            'type': 'integer',
+            'required': False,
+            'default': 0,
+            'description': 'Quantos leitores pular a partir do primeiro'
+        }
+    ],
+    'responses': {
+        200: {
+            'description': 'Página do ranking',
+            'schema': {
+                'type': 'object',
+                'properties': {
+                    'periodo': {'type': 'string'},
+                    'inicio': {'type': 'string'},
+                    'total_membros': {'type': 'integer'},
+                    'ranking': {'type': 'array', 'items': {'type': 'object'}}
+                }
+            }
+        },
+        400: {'description': 'Período inválido'}
+    }
+})
+def listar_ranking():
+    try:
+        periodo = request.args.get('periodo', 'geral')
+        if periodo not in PERIODOS:
+            return jsonify({'erro': f'periodo deve ser um de: {", ".join(PERIODOS)}'}), 400
+        limit = min(max(request.args.get('limit', 10, type=int), 1), 100)
+        offset = max(request.args.get('offset', 0, type=int), 0)
+
+        with usar_classificacao() as classificacao:
+            inicio = classificacao.inicio(periodo)
+            return jsonify({
+                'periodo': periodo,
+                'inicio': inicio.isoformat() if inicio else None,
+                'total_membros': classificacao.total(periodo),
+                'ranking': classificacao.pagina(periodo, offset, limit)
+            }), 200
+    except Exception as e:
+        return jsonify({'erro': str(e)}), 500
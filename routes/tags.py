@@ -0,0 +1,58 @@
+from flask import Blueprint, jsonify, request
+from app import db
+from models.tag import Tag, AvaliacaoTag
+from utils.documentacao import swag_from
+from utils.cache import cache_resposta
+
+tags_bp = Blueprint('tags', __name__)
+
+@tags_bp.route('/tags', methods=['GET'])
+@swag_from({
+    'tags': ['Avaliações'],
+    'summary': 'Lista as tags usadas nas avaliações, com contagens',
+    'parameters': [
+        {
+            'name': 'q',
+            'in': 'query',
+            'type': 'string',
+            'required': False,
+            'description': 'Apenas tags que começam com este texto'
+        },
+        {
+            'name': 'limit',
+            'in': 'query',
+            'type': 'integer',
+            'required': False,
+            'default': 50,
+            'description': 'Número máximo de tags'
+        }
+    ],
+    'responses': {
+        200: {'description': 'Tags ordenadas pelo número de avaliações'}
+    }
+})
+@cache_resposta('avaliacoes')
+def listar_tags():
+    try:
+        limit = min(max(request.args.get('limit', 50, type=int), 1), 500)
+
+        total_avaliacoes = db.func.count().label('total_avaliacoes')
+        query = db.session.query(
+            Tag.nome,
+            total_avaliacoes,
+            db.func.count(db.distinct(AvaliacaoTag.id_livro)).label('total_livros')
+        ).join(AvaliacaoTag, AvaliacaoTag.id_tag == Tag.id_tag).group_by(Tag.id_tag)
+
+        prefixo = request.args.get('q', '').strip().lower()
+        if prefixo:
+            # Tag.nome já é minúsculo; o intervalo usa o índice único de nome
+            query = query.filter(Tag.nome >= prefixo, Tag.nome < prefixo + '\U0010ffff')
+
+        tags = query.order_by(total_avaliacoes.desc(), Tag.nome).limit(limit).all()
+
+        return jsonify([
+            {'tag': nome, 'total_avaliacoes': avaliacoes, 'total_livros': livros}
+            for nome, avaliacoes, livros in tags
+        ]), 200
+    except Exception as e:
+        return jsonify({'erro': str(e)}), 500
@@ -6,10 +6,40 @@ from app import db
 from models.wishlist import Wishlist
 from models.membro import Membro
 from models.livro import Livro
-from flasgger import swag_from
+from models.estatistica import EstatisticasSnapshot
+from models.pontos import LancamentoPontos
+from utils.documentacao import swag_from
+from utils.paginacao import paginar, resposta_paginada, CursorInvalido, PARAMETROS_PAGINACAO
+from utils.projecao import ler_campos, preparar_consulta, CampoInvalido, PARAMETRO_CAMPOS
+from utils.cache import cache_resposta, invalidar_cache
 
 wishlist_bp = Blueprint('wishlist', __name__)
 
+# Prioridade (alta primeiro), depois os mais recentes; o id desempata
+ORDENACAO_WISHLIST = [
+    (db.case(
+        (Wishlist.prioridade == 'alta', 1),
+        (Wishlist.prioridade == 'média', 2),
+        (Wishlist.prioridade == 'baixa', 3),
+        else_=4
+    ), 'asc'),
+    (Wishlist.data_adicao, 'desc'),
+    (Wishlist.id_wishlist, 'desc')
+]
+
+
+def filtrar_wishlist(query, args):
+    """Aplica à consulta os filtros de membro e prioridade presentes na query string."""
+    id_membro = args.get('id_membro')
+    if id_membro:
+        query = query.filter_by(id_membro=int(id_membro))
+    
+    prioridade = args.get('prioridade')
+    if prioridade:
+        query = query.filter_by(prioridade=prioridade)
+    
+    return query
+
 @wishlist_bp.route('/wishlist', methods=['POST'])
 @swag_from({
     'tags': ['Lista de Desejos'],
@@ -23,8 +53,8 @@ wishlist_bp = Blueprint('wishlist', __name__)
                 'type': 'object',
                 'required': ['id_membro'],
                 'properties': {
-                    'id_membro': {'type': 'integer'},
-                    'id_livro': {'type': 'integer', 'description': 'Para livro já cadastrado'},
+                    'id_membro': {'type': 'integer', 'minimum': 1},
+                    'id_livro': {'type': 'integer', 'minimum': 1, 'description': 'Para livro já cadastrado'},
                     'titulo_desejado': {'type': 'string', 'description': 'Para livro não cadastrado'},
                     'autor_desejado': {'type': 'string'},
                     'prioridade': {'type': 'string', 'enum': ['baixa', 'média', 'alta']},
@@ -41,11 +71,9 @@ wishlist_bp = Blueprint('wishlist', __name__)
 })
 def adicionar_wishlist():
     try:
+        # Corpo já validado contra o esquema acima (utils/validacao.py)
         data = request.get_json()
         
-        if not data.get('id_membro'):
-            return jsonify({'erro': 'ID do membro é obrigatório'}), 400
-        
         # Precisa ter ou id_livro ou titulo_desejado
         if not data.get('id_livro') and not data.get('titulo_desejado'):
             return jsonify({'erro': 'Informe o ID do livro ou o título desejado'}), 400
@@ -85,11 +113,12 @@ def adicionar_wishlist():
             id_livro=data.get('id_livro'),
             titulo_desejado=data.get('titulo_desejado'),
             autor_desejado=data.get('autor_desejado'),
-            prioridade=data.get('prioridade', 'média'),
+            prioridade=data.get('prioridade') or 'média',
             notas=data.get('notas')
         )
         
         db.session.add(novo_item)
+        invalidar_cache('wishlist')
         db.session.commit()
         
         return jsonify(novo_item.to_dict()), 201
@@ -116,37 +145,24 @@ def adicionar_wishlist():
             'enum': ['baixa', 'média', 'alta'],
             'required': False,
             'description': 'Filtrar por prioridade'
-        }
+        },
+        *PARAMETROS_PAGINACAO,
+        PARAMETRO_CAMPOS
     ],
     'responses': {
         200: {'description': 'Lista de desejos retornada com sucesso'}
     }
 })
+@cache_resposta('wishlist', 'membros', 'livros')
 def listar_wishlist():
     try:
-        query = Wishlist.query
-        
-        # Filtro por membro
-        id_membro = request.args.get('id_membro')
-        if id_membro:
-            query = query.filter_by(id_membro=int(id_membro))
+        campos = ler_campos(Wishlist)
+        query = preparar_consulta(filtrar_wishlist(Wishlist.query, request.args), Wishlist, campos)
+        items, proximo_cursor = paginar(query, ORDENACAO_WISHLIST)
         
-        # Filtro por prioridade
-        prioridade = request.args.get('prioridade')
-        if prioridade:
-            query = query.filter_by(prioridade=prioridade)
-        
-        # Ordena por prioridade (alta primeiro) e data de adição
-        items = query.order_by(
-            db.case(
-                (Wishlist.prioridade == 'alta', 1),
-                (Wishlist.prioridade == 'média', 2),
-                (Wishlist.prioridade == 'baixa', 3)
-            ),
-            Wishlist.data_adicao.desc()
-        ).all()
-        
-        return jsonify([i.to_dict() for i in items]), 200
+        return resposta_paginada([i.to_dict(campos) for i in items], proximo_cursor), 200
+    except (CursorInvalido, CampoInvalido) as e:
+        return jsonify({'erro': str(e)}), 400
     except Exception as e:
         return jsonify({'erro': str(e)}), 500
 
@@ -168,6 +184,7 @@ def listar_wishlist():
         404: {'description': 'Item não encontrado'}
     }
 })
+@cache_resposta('wishlist', 'membros', 'livros')
 def buscar_wishlist_item(id):
     try:
         item = Wishlist.query.get(id)
@@ -196,7 +213,7 @@ def buscar_wishlist_item(id):
             'schema': {
                 'type': 'object',
                 'properties': {
-                    'prioridade': {'type': 'string', 'enum': ['baixa', 'média', 'alta']},
+                    'prioridade': {'type': 'string', 'enum': ['baixa', 'média', 'alta'], 'x-nullable': False},
                     'notas': {'type': 'string'},
                     'titulo_desejado': {'type': 'string'},
                     'autor_desejado': {'type': 'string'}
@@ -206,6 +223,7 @@ def buscar_wishlist_item(id):
     ],
     'responses': {
         200: {'description': 'Item atualizado com sucesso'},
+        400: {'description': 'Dados inválidos'},
         404: {'description': 'Item não encontrado'}
     }
 })
@@ -223,6 +241,7 @@ def atualizar_wishlist(id):
             if campo in data:
                 setattr(item, campo, data[campo])
         
+        invalidar_cache('wishlist')
         db.session.commit()
         return jsonify(item.to_dict()), 200
     except Exception as e:
@@ -253,6 +272,7 @@ def deletar_wishlist(id):
         if not item:
             return jsonify({'erro': 'Item não encontrado na lista de desejos'}), 404
         
+        invalidar_cache('wishlist')
         db.session.delete(item)
         db.session.commit()
         
@@ -293,6 +313,7 @@ def deletar_wishlist(id):
     ],
     'responses': {
         200: {'description': 'Item comprado e adicionado ao catálogo'},
+        400: {'description': 'Dados inválidos'},
         404: {'description': 'Item não encontrado'}
     }
 })
@@ -322,12 +343,21 @@ def marcar_como_comprado(id):
             
             db.session.add(novo_livro)
             db.session.flush()  # Para obter o ID do novo livro
+            # Import tardio, como em routes/livros: numpy/scipy só quando o catálogo muda
+            from services.similares import atualizar_livro
+            atualizar_livro(novo_livro, novo=True)
+            EstatisticasSnapshot.ajustar(
+                total_livros=1,
+                livros_disponiveis=1,
+                valor_total=novo_livro.valor_estimado or 0
+            )
             
             # Adiciona pontos ao membro que sugeriu
             if item.membro:
-                item.membro.pontos_leitura += 30  # 30 pontos por sugestão aceita
+                LancamentoPontos.lancar(item.id_membro, 30, 'wishlist_comprado', item.id_wishlist)  # 30 pontos por sugestão aceita
             
             # Remove da wishlist
+            invalidar_cache('wishlist', 'livros', 'membros')
             db.session.delete(item)
             db.session.commit()
             
@@ -341,6 +371,7 @@ def marcar_como_comprado(id):
             livro = Livro.query.get(item.id_livro)
             
             # Remove da wishlist
+            invalidar_cache('wishlist')
             db.session.delete(item)
             db.session.commit()
             
@@ -362,6 +393,7 @@ def marcar_como_comprado(id):
         200: {'description': 'Lista de livros mais desejados'}
     }
 })
+@cache_resposta('wishlist', 'membros', 'livros')
 def livros_mais_desejados():
     try:
         # Agrupa por título e conta quantos membros querem cada livro
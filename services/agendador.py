@@ -0,0 +1,58 @@
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class Agendador:
+    """Executa tarefas periódicas em uma thread de fundo, dentro do contexto da aplicação.
+
+    Cada tarefa roda no máximo uma vez por intervalo. Erros são registrados
+    no log e não interrompem as demais tarefas.
+    """
+
+    def __init__(self, app, resolucao=1.0):
+        self.app = app
+        self.resolucao = resolucao
+        self.tarefas = []
+        self._parar = threading.Event()
+        self._trava = threading.Lock()
+        self._thread = None
+
+    def registrar(self, nome, intervalo, funcao, imediato=True):
+        """Agenda `funcao` a cada `intervalo` segundos; com imediato=True roda também na partida."""
+        proxima = 0 if imediato else time.monotonic() + intervalo
+        self.tarefas.append({'nome': nome, 'intervalo': intervalo, 'funcao': funcao, 'proxima': proxima})
+
+    def iniciar(self):
+        if self._thread is not None or not self.tarefas:
+            return
+        with self._trava:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._executar, name='agendador', daemon=True)
+                self._thread.start()
+
+    def parar(self):
+        self._parar.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _executar(self):
+        while not self._parar.is_set():
+            agora = time.monotonic()
+            for tarefa in self.tarefas:
+                if agora >= tarefa['proxima']:
+                    tarefa['proxima'] = agora + tarefa['intervalo']
+                    self._executar_tarefa(tarefa)
+            self._parar.wait(self.resolucao)
+
+    def _executar_tarefa(self, tarefa):
+        from app import db
+        with self.app.app_context():
+            try:
+                tarefa['funcao']()
+            except Exception:
+                db.session.rollback()
+                logger.exception('Falha na tarefa agendada %s', tarefa['nome'])
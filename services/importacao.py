@@ -0,0 +1,168 @@
+import csv
+import io
+import json
+from itertools import islice
+
+from app import db
+from models.livro import Livro
+from models.estatistica import EstatisticasSnapshot
+from models.cache_versao import CacheVersao
+
+TAMANHO_LOTE = 2000
+MAXIMO_ERROS_DETALHADOS = 1000
+
+CAMPOS_TEXTO = ('isbn', 'titulo', 'autor', 'editora', 'genero', 'subgenero', 'idioma',
+                'idade_recomendada', 'localizacao', 'estado_conservacao', 'capa_url',
+                'sinopse', 'origem')
+CAMPOS_INTEIROS = ('ano_publicacao', 'num_paginas')
+VALORES_VERDADEIROS = ('true', '1', 'sim', 's', 'yes')
+
+
+class ErroLinha(ValueError):
+    pass
+
+
+def ler_csv(fluxo):
+    """Gera (numero_linha, registro) lendo o CSV sob demanda, sem carregar o arquivo inteiro."""
+    leitor = csv.DictReader(io.TextIOWrapper(fluxo, encoding='utf-8-sig', newline=''))
+    for registro in leitor:
+        yield leitor.line_num, registro
+
+
+def ler_jsonl(fluxo):
+    """Gera (numero_linha, registro) para cada linha JSON do fluxo."""
+    for numero, linha in enumerate(io.TextIOWrapper(fluxo, encoding='utf-8-sig'), start=1):
+        if not linha.strip():
+            continue
+        try:
+            registro = json.loads(linha)
+        except ValueError as e:
+            yield numero, ErroLinha(f'JSON inválido: {e}')
+            continue
+        yield numero, registro
+
+
+def _vazio(valor):
+    return valor is None or (isinstance(valor, str) and not valor.strip())
+
+
+def normalizar_livro(registro):
+    """Converte um registro do arquivo nos valores da tabela livros (mesmos padrões de criar_livro)."""
+    if isinstance(registro, ErroLinha):
+        raise registro
+    if not isinstance(registro, dict):
+        raise ErroLinha('Registro deve ser um objeto')
+
+    livro = {}
+    for campo in CAMPOS_TEXTO:
+        valor = registro.get(campo)
+        livro[campo] = None if _vazio(valor) else str(valor).strip()
+
+    if not livro['titulo'] or not livro['autor']:
+        raise ErroLinha('Título e autor são obrigatórios')
+
+    for campo in CAMPOS_INTEIROS:
+        valor = registro.get(campo)
+        try:
+            livro[campo] = None if _vazio(valor) else int(valor)
+        except (TypeError, ValueError):
+            raise ErroLinha(f'{campo} deve ser um número inteiro')
+
+    valor = registro.get('valor_estimado')
+    try:
+        livro['valor_estimado'] = None if _vazio(valor) else float(valor)
+    except (TypeError, ValueError):
+        raise ErroLinha('valor_estimado deve ser numérico')
+
+    classico = registro.get('classicos_familia')
+    livro['classicos_familia'] = classico if isinstance(classico, bool) else (
+        str(classico).strip().lower() in VALORES_VERDADEIROS if not _vazio(classico) else False
+    )
+
+    livro['idioma'] = livro['idioma'] or 'Português'
+    livro['idade_recomendada'] = livro['idade_recomendada'] or 'Todas'
+    livro['estado_conservacao'] = livro['estado_conservacao'] or 'Bom'
+    livro['disponivel'] = True
+    return livro
+
+
+class RelatorioImportacao:
+    def __init__(self):
+        self.importados = 0
+        self.duplicados = 0
+        self.invalidos = 0
+        self.erros = []
+        self.erros_omitidos = 0
+
+    def erro(self, linha, mensagem, isbn=None):
+        if len(self.erros) < MAXIMO_ERROS_DETALHADOS:
+            self.erros.append({'linha': linha, 'isbn': isbn, 'erro': mensagem})
+        else:
+            self.erros_omitidos += 1
+
+    def to_dict(self):
+        return {
+            'importados': self.importados,
+            'duplicados': self.duplicados,
+            'invalidos': self.invalidos,
+            'erros': sorted(self.erros, key=lambda e: e['linha']),
+            'erros_omitidos': self.erros_omitidos
+        }
+
+
+def _gravar_lote(lote, relatorio):
+    """Insere um lote em uma transação, descartando ISBNs já cadastrados ou repetidos no lote."""
+    isbns = {livro['isbn'] for _, livro in lote if livro['isbn']}
+    existentes = set(db.session.execute(
+        db.select(Livro.isbn).where(Livro.isbn.in_(isbns))
+    ).scalars()) if isbns else set()
+
+    novos = []
+    for linha, livro in lote:
+        if livro['isbn']:
+            if livro['isbn'] in existentes:
+                relatorio.duplicados += 1
+                relatorio.erro(linha, 'ISBN já cadastrado', livro['isbn'])
+                continue
+            existentes.add(livro['isbn'])
+        novos.append(livro)
+
+    if not novos:
+        return
+
+    ids = db.session.execute(db.insert(Livro).returning(Livro.id_livro), novos).scalars().all()
+    # Import tardio: numpy/scipy só quando o catálogo muda
+    from services.similares import incluir_livros
+    incluir_livros(ids)
+    EstatisticasSnapshot.ajustar(
+        total_livros=len(novos),
+        livros_disponiveis=len(novos),
+        total_classicos=sum(1 for l in novos if l['classicos_familia']),
+        valor_total=sum(l['valor_estimado'] or 0 for l in novos)
+    )
+    CacheVersao.incrementar('livros')
+    db.session.commit()
+    relatorio.importados += len(novos)
+
+
+def importar_livros(registros, tamanho_lote=TAMANHO_LOTE):
+    """Importa livros de um iterável de (numero_linha, registro), lote a lote.
+
+    Linhas inválidas ou com ISBN duplicado entram no relatório e não
+    interrompem a importação; cada lote é confirmado em sua própria transação.
+    """
+    relatorio = RelatorioImportacao()
+    registros = iter(registros)
+    while True:
+        bloco = list(islice(registros, tamanho_lote))
+        if not bloco:
+            break
+        lote = []
+        for linha, registro in bloco:
+            try:
+                lote.append((linha, normalizar_livro(registro)))
+            except ErroLinha as e:
+                relatorio.invalidos += 1
+                relatorio.erro(linha, str(e), registro.get('isbn') if isinstance(registro, dict) else None)
+        _gravar_lote(lote, relatorio)
+    return relatorio
@@ -0,0 +1,241 @@
+"""Ranking de leitores por pontos, mantido em memória a partir do livro-razão.
+
+Cada quadro (geral, semana, mês) é uma lista ordenada de chaves
+(-pontos, id_membro): a posição de um membro sai de uma busca binária e uma
+página do ranking é uma fatia da lista. O processo guarda a marca do último
+LancamentoPontos aplicado e, a cada uso, lê só os lançamentos posteriores e
+move os membros afetados dentro dos quadros.
+
+Os quadros de semana e mês cobrem o período corrente do calendário (semana a
+partir de segunda-feira): ao virar o período, só aquele quadro é refeito a
+partir dos lançamentos do novo período.
+"""
+import threading
+from bisect import bisect_left, bisect_right, insort
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from app import db
+from models.membro import Membro
+from models.pontos import LancamentoPontos
+
+PERIODOS = ('geral', 'semana', 'mes')
+
+
+def inicio_periodo(periodo, agora=None):
+    """Primeiro instante do período corrente (None para o ranking geral)."""
+    agora = agora or datetime.now()
+    hoje = agora.replace(hour=0, minute=0, second=0, microsecond=0)
+    if periodo == 'semana':
+        return hoje - timedelta(days=hoje.weekday())
+    if periodo == 'mes':
+        return hoje.replace(day=1)
+    return None
+
+
+class Placar:
+    """Pontos por membro e a lista ordenada de chaves (-pontos, id_membro)."""
+
+    def __init__(self, pontos, inicio=None):
+        self.inicio = inicio
+        self.pontos = dict(pontos)
+        self.chaves = sorted((-p, m) for m, p in self.pontos.items())
+
+    def somar(self, id_membro, delta):
+        atual = self.pontos.get(id_membro)
+        if atual is None or not delta:
+            return
+        del self.chaves[bisect_left(self.chaves, (-atual, id_membro))]
+        self.pontos[id_membro] = atual + delta
+        insort(self.chaves, (-(atual + delta), id_membro))
+
+    def incluir(self, id_membro, pontos=0):
+        if id_membro not in self.pontos:
+            self.pontos[id_membro] = pontos
+            insort(self.chaves, (-pontos, id_membro))
+
+    def excluir(self, id_membro):
+        pontos = self.pontos.pop(id_membro, None)
+        if pontos is not None:
+            del self.chaves[bisect_left(self.chaves, (-pontos, id_membro))]
+
+    def posicao(self, id_membro):
+        """Posição com empates (1 + quantos têm mais pontos) e índice na lista."""
+        pontos = self.pontos[id_membro]
+        return bisect_left(self.chaves, (-pontos,)) + 1, bisect_left(self.chaves, (-pontos, id_membro))
+
+    def abaixo_de(self, id_membro):
+        """Quantos membros têm menos pontos."""
+        return len(self.chaves) - bisect_right(self.chaves, (-self.pontos[id_membro], float('inf')))
+
+    def fatia(self, inicio, fim):
+        """[(posicao, id_membro, pontos)] das chaves[inicio:fim]."""
+        resultado = []
+        for negativo, id_membro in self.chaves[inicio:fim]:
+            posicao = bisect_left(self.chaves, (negativo,)) + 1
+            resultado.append((posicao, id_membro, -negativo))
+        return resultado
+
+
+class Classificacao:
+
+    def __init__(self):
+        self.marca = 0
+        self.assinatura = None
+        self.membros = {}
+        self.placares = {}
+
+    @staticmethod
+    def _assinatura_membros():
+        """Muda quando um membro ativo entra ou sai, sem carregar a tabela."""
+        return tuple(db.session.execute(
+            db.select(db.func.count(), db.func.total(Membro.id_membro)).where(Membro.ativo == True)  # noqa: E712
+        ).one())
+
+    @staticmethod
+    def _somas(marca, inicio=None):
+        """{id_membro: pontos} dos lançamentos até a marca (a partir do início, se informado)."""
+        if inicio is None:
+            return dict(db.session.execute(
+                db.select(LancamentoPontos.id_membro, db.func.sum(LancamentoPontos.pontos))
+                .where(LancamentoPontos.id_lancamento <= marca)
+                .group_by(LancamentoPontos.id_membro)
+            ).all())
+        # Soma em Python: com GROUP BY o SQLite prefere percorrer o índice por membro
+        # inteiro em vez do intervalo de datas em ix_lancamentos_data
+        somas = defaultdict(int)
+        for id_membro, pontos in db.session.execute(
+            db.select(LancamentoPontos.id_membro, LancamentoPontos.pontos)
+            .where(LancamentoPontos.data_lancamento >= inicio, LancamentoPontos.id_lancamento <= marca)
+        ):
+            somas[id_membro] += pontos
+        return somas
+
+    def _placar(self, inicio):
+        somas = self._somas(self.marca, inicio)
+        return Placar({m: somas.get(m, 0) for m in self.membros}, inicio)
+
+    def _carregar_membros(self):
+        self.membros = {
+            m.id_membro: {'nome': m.nome, 'apelido': m.apelido, 'avatar_cor': m.avatar_cor}
+            for m in db.session.execute(
+                db.select(Membro.id_membro, Membro.nome, Membro.apelido, Membro.avatar_cor)
+                .where(Membro.ativo == True)  # noqa: E712
+            )
+        }
+
+    def reconstruir(self):
+        """Monta todos os quadros do zero."""
+        # A marca é lida antes das somas: o que entrar depois é aplicado pela sincronização
+        self.marca = db.session.execute(
+            db.select(db.func.coalesce(db.func.max(LancamentoPontos.id_lancamento), 0))
+        ).scalar()
+        self.assinatura = self._assinatura_membros()
+        self._carregar_membros()
+        self.placares = {periodo: self._placar(inicio_periodo(periodo)) for periodo in PERIODOS}
+
+    def _atualizar_membros(self):
+        assinatura = self._assinatura_membros()
+        if assinatura == self.assinatura:
+            return
+        antigos = set(self.membros)
+        self._carregar_membros()
+        self.assinatura = assinatura
+        for id_membro in antigos - set(self.membros):
+            for placar in self.placares.values():
+                placar.excluir(id_membro)
+        novos = set(self.membros) - antigos
+        if novos:
+            for periodo, placar in self.placares.items():
+                somas = self._somas(self.marca, placar.inicio)
+                for id_membro in novos:
+                    placar.incluir(id_membro, somas.get(id_membro, 0))
+
+    def sincronizar(self):
+        """Aplica os lançamentos posteriores à marca. Retorna quantos foram aplicados."""
+        self._atualizar_membros()
+
+        # Virada de semana/mês: refaz só o quadro do período que mudou
+        for periodo in PERIODOS:
+            inicio = inicio_periodo(periodo)
+            if inicio != self.placares[periodo].inicio:
+                self.placares[periodo] = self._placar(inicio)
+
+        lancamentos = db.session.execute(
+            db.select(
+                LancamentoPontos.id_lancamento, LancamentoPontos.id_membro,
+                LancamentoPontos.pontos, LancamentoPontos.data_lancamento
+            ).where(LancamentoPontos.id_lancamento > self.marca)
+        ).all()
+        if not lancamentos:
+            return 0
+        deltas = {periodo: defaultdict(int) for periodo in PERIODOS}
+        for _, id_membro, pontos, data in lancamentos:
+            for periodo, placar in self.placares.items():
+                if placar.inicio is None or data >= placar.inicio:
+                    deltas[periodo][id_membro] += pontos
+        for periodo, por_membro in deltas.items():
+            for id_membro, delta in por_membro.items():
+                self.placares[periodo].somar(id_membro, delta)
+        self.marca = max(l[0] for l in lancamentos)
+        return len(lancamentos)
+
+    def _item(self, posicao, id_membro, pontos):
+        return {
+            'posicao': posicao,
+            'id_membro': id_membro,
+            **self.membros[id_membro],
+            'pontos': pontos,
+            'nivel_leitor': Membro.nivel_para(pontos)
+        }
+
+    def pagina(self, periodo, offset=0, limit=10):
+        placar = self.placares[periodo]
+        return [self._item(*linha) for linha in placar.fatia(offset, offset + limit)]
+
+    def total(self, periodo):
+        return len(self.placares[periodo].chaves)
+
+    def inicio(self, periodo):
+        return self.placares[periodo].inicio
+
+    def do_membro(self, periodo, id_membro, vizinhos=2):
+        """Posição, percentil e os vizinhos acima/abaixo; None se o membro não está no ranking."""
+        placar = self.placares[periodo]
+        if id_membro not in placar.pontos:
+            return None
+        posicao, indice = placar.posicao(id_membro)
+        total = len(placar.chaves)
+        return {
+            'id_membro': id_membro,
+            'periodo': periodo,
+            'posicao': posicao,
+            'pontos': placar.pontos[id_membro],
+            'total_membros': total,
+            # Percentual de membros com menos pontos
+            'percentil': round(placar.abaixo_de(id_membro) / total * 100, 1),
+            'acima': [self._item(*linha) for linha in placar.fatia(max(indice - vizinhos, 0), indice)],
+            'abaixo': [self._item(*linha) for linha in placar.fatia(indice + 1, indice + 1 + vizinhos)]
+        }
+
+
+_classificacao = None
+_trava = threading.Lock()
+
+
+@contextmanager
+def usar_classificacao():
+    """Ranking do processo, montado no primeiro uso e sincronizado a cada uso.
+
+    As leituras acontecem dentro do bloco, com a trava: outra thread não move
+    os quadros no meio de uma página.
+    """
+    global _classificacao
+    with _trava:
+        if _classificacao is None:
+            _classificacao = Classificacao()
+            _classificacao.reconstruir()
+        else:
+            _classificacao.sincronizar()
+        yield _classificacao
@@ -0,0 +1,367 @@
+"""Recomendações por filtragem colaborativa item-item.
+
+O modelo guarda a matriz de notas membro x livro (centradas na média de cada
+membro), a matriz de Gram livro x livro G = RᵀR e, para cada livro, a lista
+dos VIZINHOS_POR_LIVRO livros mais parecidos (cosseno ajustado). Recomendar é
+só somar as listas de vizinhos dos livros que o membro leu.
+
+Quando as avaliações de um membro mudam, as rotas registram um EventoAvaliacao.
+Cada processo aplica os eventos pendentes como uma atualização de posto baixo:
+com ΔR = R'ₘ − Rₘ nas linhas dos membros afetados,
+
+    G' = G + ΔRᵀ Rₘ + R'ₘᵀ ΔR
+
+e só as listas de vizinhos dos livros atingidos são recalculadas. O modelo é
+salvo em instance/ periodicamente; ao subir, o processo carrega o arquivo e
+aplica os eventos posteriores a ele.
+"""
+import os
+import tempfile
+import threading
+
+import numpy as np
+from scipy import sparse
+from flask import current_app
+
+from app import db
+from models.avaliacao import Avaliacao
+from models.emprestimo import Emprestimo
+from models.livro import Livro
+from models.recomendacao import EventoAvaliacao
+
+VIZINHOS_POR_LIVRO = 50
+ARQUIVO_MODELO = 'recomendacoes.npz'
+
+# Livro emprestado e ainda não avaliado conta como uma nota levemente positiva
+PESO_EMPRESTIMO = 0.5
+NOTA_NEUTRA = 2.5
+# Somado ao denominador da média ponderada: um livro indicado por um único
+# vizinho fraco não empata com um indicado por vários vizinhos fortes
+SUAVIZACAO = 1.0
+MAXIMO_CANDIDATOS = 200
+
+
+def _linhas_centradas(registros, indice_membro, indice_livro, forma):
+    """Monta a matriz esparsa de notas centradas na média de cada membro."""
+    if not registros:
+        return sparse.csr_matrix(forma, dtype=np.float64)
+    membros, livros, notas = (np.array(coluna) for coluna in zip(*registros))
+    linhas = np.array([indice_membro[m] for m in membros])
+    colunas = np.array([indice_livro[l] for l in livros])
+    notas = notas.astype(np.float64)
+    soma = np.bincount(linhas, weights=notas, minlength=forma[0])
+    quantidade = np.bincount(linhas, minlength=forma[0])
+    medias = soma / np.maximum(quantidade, 1)
+    return sparse.csr_matrix((notas - medias[linhas], (linhas, colunas)), shape=forma)
+
+
+class ModeloRecomendacao:
+
+    def __init__(self, ids_membros, ids_livros, notas, gram, vizinhos, pesos, marca):
+        self.ids_membros = ids_membros
+        self.ids_livros = ids_livros
+        self.indice_membro = {int(m): i for i, m in enumerate(ids_membros)}
+        self.indice_livro = {int(l): i for i, l in enumerate(ids_livros)}
+        self.notas = notas
+        self.gram = gram
+        self.vizinhos = vizinhos
+        self.pesos = pesos
+        self.marca = marca
+
+    @classmethod
+    def treinar(cls):
+        """Calcula o modelo do zero a partir da tabela de avaliações."""
+        # A marca é lida antes das notas: um evento concorrente é reaplicado depois,
+        # e reaplicar é seguro porque a linha do membro é relida por inteiro
+        marca = EventoAvaliacao.ultimo()
+        registros = db.session.execute(
+            db.select(Avaliacao.id_membro, Avaliacao.id_livro, Avaliacao.nota)
+        ).all()
+        ids_membros = np.array(sorted({r[0] for r in registros}), dtype=np.int64)
+        ids_livros = np.array(sorted({r[1] for r in registros}), dtype=np.int64)
+        modelo = cls(
+            ids_membros, ids_livros, None, None,
+            np.full((len(ids_livros), VIZINHOS_POR_LIVRO), -1, dtype=np.int32),
+            np.zeros((len(ids_livros), VIZINHOS_POR_LIVRO), dtype=np.float32),
+            marca
+        )
+        modelo.notas = _linhas_centradas(
+            registros, modelo.indice_membro, modelo.indice_livro, (len(ids_membros), len(ids_livros))
+        )
+        modelo.gram = (modelo.notas.T @ modelo.notas).tocsr()
+        modelo._recalcular_vizinhos(np.arange(len(ids_livros)))
+        return modelo
+
+    def _recalcular_vizinhos(self, livros):
+        """Refaz as listas de vizinhos dos livros (índices de coluna) informados."""
+        if not len(livros):
+            return
+        normas = np.sqrt(np.maximum(self.gram.diagonal(), 0))
+        inversas = np.divide(1.0, normas, out=np.zeros_like(normas), where=normas > 0)
+        similaridades = (
+            sparse.diags(inversas[livros]) @ self.gram[livros] @ sparse.diags(inversas)
+        ).tocsr()
+        for posicao, livro in enumerate(livros):
+            inicio, fim = similaridades.indptr[posicao], similaridades.indptr[posicao + 1]
+            colunas = similaridades.indices[inicio:fim]
+            valores = similaridades.data[inicio:fim]
+            mantidos = (colunas != livro) & (valores > 1e-9)
+            colunas, valores = colunas[mantidos], valores[mantidos]
+            if len(valores) > VIZINHOS_POR_LIVRO:
+                melhores = np.argpartition(-valores, VIZINHOS_POR_LIVRO)[:VIZINHOS_POR_LIVRO]
+                colunas, valores = colunas[melhores], valores[melhores]
+            ordem = np.argsort(-valores)
+            self.vizinhos[livro] = -1
+            self.pesos[livro] = 0
+            self.vizinhos[livro, :len(ordem)] = colunas[ordem]
+            self.pesos[livro, :len(ordem)] = valores[ordem]
+
+    def _crescer(self, novos_membros, novos_livros):
+        """Abre linhas/colunas para membros e livros que ainda não estão no modelo."""
+        if novos_membros:
+            self.ids_membros = np.concatenate([self.ids_membros, np.array(novos_membros, dtype=np.int64)])
+            inicio = len(self.indice_membro)
+            self.indice_membro.update({m: inicio + i for i, m in enumerate(novos_membros)})
+        if novos_livros:
+            self.ids_livros = np.concatenate([self.ids_livros, np.array(novos_livros, dtype=np.int64)])
+            inicio = len(self.indice_livro)
+            self.indice_livro.update({l: inicio + i for i, l in enumerate(novos_livros)})
+            extras = len(novos_livros)
+            self.vizinhos = np.vstack([self.vizinhos, np.full((extras, VIZINHOS_POR_LIVRO), -1, dtype=np.int32)])
+            self.pesos = np.vstack([self.pesos, np.zeros((extras, VIZINHOS_POR_LIVRO), dtype=np.float32)])
+        self.notas.resize((len(self.ids_membros), len(self.ids_livros)))
+        self.gram.resize((len(self.ids_livros), len(self.ids_livros)))
+
+    def sincronizar(self):
+        """Aplica os eventos de avaliação posteriores à marca do modelo."""
+        eventos = db.session.execute(
+            db.select(EventoAvaliacao.id_membro, db.func.max(EventoAvaliacao.id_evento))
+            .where(EventoAvaliacao.id_evento > self.marca)
+            .group_by(EventoAvaliacao.id_membro)
+        ).all()
+        if not eventos:
+            return 0
+        membros = [id_membro for id_membro, _ in eventos]
+        registros = db.session.execute(
+            db.select(Avaliacao.id_membro, Avaliacao.id_livro, Avaliacao.nota)
+            .where(Avaliacao.id_membro.in_(membros))
+        ).all()
+
+        self._crescer(
+            [m for m in membros if m not in self.indice_membro],
+            sorted({r[1] for r in registros if r[1] not in self.indice_livro})
+        )
+        linhas = np.array([self.indice_membro[m] for m in membros])
+        forma = (len(membros), len(self.ids_livros))
+        posicao = {m: i for i, m in enumerate(membros)}
+        antigas = self.notas[linhas]
+        novas = _linhas_centradas(registros, posicao, self.indice_livro, forma)
+        delta = novas - antigas
+
+        self.gram = (self.gram + delta.T @ antigas + novas.T @ delta).tocsr()
+        self.gram.eliminate_zeros()
+        selecao = sparse.csr_matrix(
+            (np.ones(len(linhas)), (linhas, np.arange(len(linhas)))),
+            shape=(len(self.ids_membros), len(linhas))
+        )
+        self.notas = (self.notas + selecao @ delta).tocsr()
+        self.notas.eliminate_zeros()
+
+        # Mudam as similaridades entre os livros das linhas alteradas e, pela
+        # norma, as de quem divide leitores com um livro cuja coluna mudou
+        alterados = np.unique(delta.indices)
+        atingidos = np.union1d(
+            np.union1d(antigas.indices, novas.indices),
+            self.gram[:, alterados].tocoo().row if len(alterados) else []
+        ).astype(np.int64)
+        self._recalcular_vizinhos(atingidos)
+
+        self.marca = max(marca for _, marca in eventos)
+        return len(membros)
+
+    def recomendar(self, notas_membro, emprestados, excluidos, quantidade):
+        """Retorna [(id_livro, pontuacao)] a partir das listas de vizinhos.
+
+        notas_membro: {id_livro: nota} do membro; emprestados: livros que ele
+        pegou emprestado; excluidos: livros que não podem ser recomendados.
+        """
+        sementes = {}
+        for id_livro in emprestados:
+            if id_livro in self.indice_livro:
+                sementes[self.indice_livro[id_livro]] = PESO_EMPRESTIMO
+        for id_livro, nota in notas_membro.items():
+            if id_livro in self.indice_livro:
+                sementes[self.indice_livro[id_livro]] = nota - NOTA_NEUTRA
+        if not sementes:
+            return []
+
+        colunas = np.fromiter(sementes.keys(), dtype=np.int64)
+        pesos_sementes = np.fromiter(sementes.values(), dtype=np.float64)
+        vizinhos = self.vizinhos[colunas]
+        similaridades = self.pesos[colunas].astype(np.float64)
+        validos = vizinhos >= 0
+        indices = vizinhos[validos]
+        # astype: sem nenhum vizinho o bincount vazio volta como inteiro
+        soma = np.bincount(
+            indices, weights=(similaridades * pesos_sementes[:, None])[validos], minlength=len(self.ids_livros)
+        ).astype(np.float64)
+        normalizacao = np.bincount(
+            indices, weights=similaridades[validos], minlength=len(self.ids_livros)
+        ).astype(np.float64)
+        pontuacoes = np.divide(soma, normalizacao + SUAVIZACAO, out=np.zeros_like(soma), where=normalizacao > 0)
+
+        excluidos_colunas = [self.indice_livro[l] for l in excluidos if l in self.indice_livro]
+        pontuacoes[excluidos_colunas] = 0
+        candidatos = np.flatnonzero(pontuacoes > 0)
+        if len(candidatos) > quantidade:
+            candidatos = candidatos[np.argpartition(-pontuacoes[candidatos], quantidade)[:quantidade]]
+        candidatos = candidatos[np.argsort(-pontuacoes[candidatos])]
+        return [(int(self.ids_livros[c]), float(pontuacoes[c])) for c in candidatos]
+
+    def salvar(self, caminho):
+        # Temporário único no mesmo diretório: cada processo roda a tarefa periódica e dois
+        # salvando juntos não podem escrever no mesmo arquivo antes do os.replace
+        arquivo = tempfile.NamedTemporaryFile(
+            dir=os.path.dirname(caminho), prefix=os.path.basename(caminho) + '.', suffix='.tmp', delete=False
+        )
+        try:
+            with arquivo:
+                np.savez(
+                    arquivo,
+                    ids_membros=self.ids_membros, ids_livros=self.ids_livros,
+                    notas_data=self.notas.data, notas_indices=self.notas.indices, notas_indptr=self.notas.indptr,
+                    gram_data=self.gram.data, gram_indices=self.gram.indices, gram_indptr=self.gram.indptr,
+                    vizinhos=self.vizinhos, pesos=self.pesos, marca=np.array(self.marca)
+                )
+            os.replace(arquivo.name, caminho)
+        except BaseException:
+            os.unlink(arquivo.name)
+            raise
+
+    @classmethod
+    def carregar(cls, caminho):
+        with np.load(caminho, allow_pickle=False) as dados:
+            membros, livros = len(dados['ids_membros']), len(dados['ids_livros'])
+            return cls(
+                dados['ids_membros'], dados['ids_livros'],
+                sparse.csr_matrix(
+                    (dados['notas_data'], dados['notas_indices'], dados['notas_indptr']), shape=(membros, livros)
+                ),
+                sparse.csr_matrix(
+                    (dados['gram_data'], dados['gram_indices'], dados['gram_indptr']), shape=(livros, livros)
+                ),
+                dados['vizinhos'].copy(), dados['pesos'].copy(), int(dados['marca'])
+            )
+
+
+_modelo = None
+_trava = threading.Lock()
+
+
+def caminho_modelo():
+    return os.path.join(current_app.instance_path, ARQUIVO_MODELO)
+
+
+def obter_modelo():
+    """Modelo do processo, carregado do disco na primeira chamada e sincronizado a cada uso.
+
+    Nunca treina dentro da requisição: enquanto a tarefa salvar_recomendacoes ou
+    `flask treinar-recomendacoes` não gravou um modelo, retorna None.
+    """
+    global _modelo
+    with _trava:
+        if _modelo is None:
+            caminho = caminho_modelo()
+            if not os.path.exists(caminho):
+                return None
+            _modelo = ModeloRecomendacao.carregar(caminho)
+        _modelo.sincronizar()
+        return _modelo
+
+
+def treinar_e_salvar():
+    """Retreina do zero, grava em instance/ e troca o modelo do processo."""
+    global _modelo
+    modelo = ModeloRecomendacao.treinar()
+    os.makedirs(current_app.instance_path, exist_ok=True)
+    modelo.salvar(caminho_modelo())
+    with _trava:
+        _modelo = modelo
+    return modelo
+
+
+def salvar_modelo():
+    """Tarefa periódica: grava o modelo já sincronizado, para o próximo boot aplicar menos eventos.
+
+    Se ainda não há modelo gravado, treina um (fora da requisição, na thread do agendador).
+    """
+    modelo = obter_modelo()
+    if modelo is None:
+        treinar_e_salvar()
+        return
+    os.makedirs(current_app.instance_path, exist_ok=True)
+    with _trava:
+        modelo.salvar(caminho_modelo())
+
+
+def idade_permitida(idade_recomendada, idade_membro):
+    """Livros para todas as idades sempre; "10+" só se o membro tiver ao menos 10 anos."""
+    if not idade_recomendada or idade_recomendada == 'Todas':
+        return True
+    try:
+        return int(idade_recomendada.rstrip('+')) <= idade_membro
+    except ValueError:
+        return True
+
+
+def recomendar_para_membro(membro, limit=10):
+    """Livros recomendados ao membro: [(Livro, pontuacao, motivo)].
+
+    Sem histórico suficiente (membro novo), ou antes de existir um modelo
+    treinado, completa com os livros mais bem avaliados, com motivo 'populares'.
+    """
+    notas = dict(db.session.execute(
+        db.select(Avaliacao.id_livro, Avaliacao.nota).where(Avaliacao.id_membro == membro.id_membro)
+    ).all())
+    emprestados = set(db.session.execute(
+        db.select(Emprestimo.id_livro).where(
+            Emprestimo.id_membro == membro.id_membro, Emprestimo.tipo_emprestimo == 'interno'
+        )
+    ).scalars())
+
+    vistos = set(notas) | emprestados
+    crianca = membro.tipo == 'criança' or (membro.idade is not None and membro.idade < 18)
+
+    def permitido(livro):
+        return not crianca or idade_permitida(livro.idade_recomendada, membro.idade or 0)
+
+    resultado = []
+    modelo = obter_modelo()
+    sugestoes = modelo.recomendar(notas, emprestados, vistos, MAXIMO_CANDIDATOS) if modelo else []
+    # Carrega os livros em blocos só até completar o limite (o filtro de idade
+    # pode descartar parte de cada bloco)
+    bloco = max(2 * limit, 20)
+    for inicio in range(0, len(sugestoes), bloco):
+        parte = sugestoes[inicio:inicio + bloco]
+        livros = {
+            livro.id_livro: livro
+            for livro in Livro.query.filter(Livro.id_livro.in_([id_livro for id_livro, _ in parte]))
+        }
+        for id_livro, pontuacao in parte:
+            livro = livros.get(id_livro)
+            if livro is not None and permitido(livro):
+                resultado.append((livro, round(pontuacao, 4), 'leitores_parecidos'))
+                if len(resultado) == limit:
+                    return resultado
+
+    # Completa com os mais bem avaliados (agregados de Livro, sem varrer avaliações)
+    ja_incluidos = vistos | {livro.id_livro for livro, _, _ in resultado}
+    populares = Livro.query.filter(Livro.total_avaliacoes > 0).order_by(
+        (Livro.soma_notas * 1.0 / Livro.total_avaliacoes).desc(), Livro.total_avaliacoes.desc()
+    ).limit(MAXIMO_CANDIDATOS)
+    for livro in populares:
+        if livro.id_livro not in ja_incluidos and permitido(livro):
+            resultado.append((livro, None, 'populares'))
+            if len(resultado) == limit:
+                break
+    return resultado
@@ -0,0 +1,399 @@
+"""Índice de livros parecidos por conteúdo (TF-IDF sobre título, autor, gênero e sinopse).
+
+O índice é gravado em instance/similares/ como arquivos .npy e aberto com
+np.load(mmap_mode='r'): todos os processos do servidor compartilham as mesmas
+páginas do arquivo em vez de cada um montar sua cópia.
+
+    termos.npy      vocabulário ordenado (busca com searchsorted)
+    idf.npy         peso IDF de cada termo
+    ids.npy         id_livro de cada linha, ordenado
+    x_*.npy         matriz TF-IDF livros x termos em CSC: para cada termo, os livros
+                    que o contêm e o peso (linhas normalizadas)
+    vizinhos.npy    K vizinhos mais parecidos de cada livro (id_livro, -1 = vazio)
+    pesos.npy       similaridade de cosseno de cada vizinho
+
+Os arquivos não mudam entre reconstruções. Criar ou alterar o texto de um
+livro grava a nova lista de vizinhos dele, e das listas em que ele passou a
+entrar, em VizinhancaLivro, que tem prioridade sobre o disco na consulta.
+
+O índice nunca é montado dentro de uma requisição: quem o constrói é
+`flask reindexar-similares` ou a tarefa periódica manter_similares, que também
+o reconstrói quando a camada passa de LIMITE_CAMADA_SIMILARES livros.
+"""
+import heapq
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+import unicodedata
+from collections import Counter
+from datetime import datetime
+
+import numpy as np
+from scipy import sparse
+from flask import current_app
+
+from app import db
+from models.livro import Livro
+from models.similar import VizinhancaLivro, ARQUIVO_COBERTURA, DIRETORIO_INDICE
+
+VIZINHOS_POR_LIVRO = 20
+LINHAS_POR_BLOCO = 1000
+
+# Quantas vezes cada campo conta: autor e gênero dizem mais que uma palavra da sinopse
+PESOS_CAMPOS = {'titulo': 2, 'autor': 3, 'genero': 3, 'subgenero': 2, 'sinopse': 1}
+
+PALAVRAS_VAZIAS = frozenset('''
+    a ao aos as ate com como da das de dela dele deles do dos e ela elas ele eles em entre era
+    essa esse esta este eu foi ha isso isto ja la lhe mais mas me mesmo meu minha muito na nas
+    nao nem no nos o os ou para pela pelas pelo pelos por qual quando que quem se sem ser seu
+    sua suas seus so sobre tambem te tem um uma umas uns voce vai sao foram tinha ter
+'''.split())
+
+PALAVRA = re.compile(r'[a-z0-9]+')
+
+
+def sem_acentos(texto):
+    return unicodedata.normalize('NFKD', texto).encode('ascii', 'ignore').decode('ascii')
+
+
+def radical(palavra):
+    """Stemmer leve para português: plural, advérbio em -mente e vogal temática final.
+
+    Junta "meninas", "menina" e "menino" em "menin"; não tenta ser um RSLP completo.
+    """
+    if len(palavra) <= 3:
+        return palavra
+    if palavra.endswith('s'):
+        for sufixo, troca in (('coes', 'cao'), ('oes', 'ao'), ('aes', 'ao'), ('ais', 'al'),
+                              ('eis', 'el'), ('ois', 'ol'), ('ns', 'm'), ('res', 'r')):
+            if palavra.endswith(sufixo):
+                palavra = palavra[:-len(sufixo)] + troca
+                break
+        else:
+            if not palavra.endswith(('ss', 'us', 'is')):
+                palavra = palavra[:-1]
+    if palavra.endswith('mente') and len(palavra) > 7:
+        palavra = palavra[:-5]
+    if len(palavra) > 4 and palavra[-1] in 'aeo':
+        palavra = palavra[:-1]
+    return palavra
+
+
+def termos_do_livro(livro):
+    """Lista de termos (com repetição) de um livro; aceita objeto Livro ou linha com os mesmos atributos."""
+    termos = []
+    for campo, peso in PESOS_CAMPOS.items():
+        texto = getattr(livro, campo, None)
+        if not texto:
+            continue
+        texto = sem_acentos(texto.lower())
+        if campo in ('autor', 'genero', 'subgenero'):
+            # Campos categóricos viram um termo só, prefixado para não colidir com a sinopse
+            termos += [f'{campo}:{texto.strip()}'] * peso
+            continue
+        palavras = [radical(p) for p in PALAVRA.findall(texto) if p not in PALAVRAS_VAZIAS and len(p) > 1]
+        termos += palavras * peso
+    return termos
+
+
+def _vetorizar(contagens, idf):
+    """TF sublinear x IDF, normalizado; contagens é {indice_termo: frequencia}."""
+    if not contagens:
+        return np.array([], dtype=np.int64), np.array([], dtype=np.float64)
+    indices = np.fromiter(contagens.keys(), dtype=np.int64)
+    pesos = (1 + np.log(np.fromiter(contagens.values(), dtype=np.float64))) * idf[indices]
+    norma = np.linalg.norm(pesos)
+    return indices, pesos / norma if norma > 0 else pesos
+
+
+def _top_k(colunas, valores, k):
+    if len(valores) > k:
+        melhores = np.argpartition(-valores, k)[:k]
+        colunas, valores = colunas[melhores], valores[melhores]
+    ordem = np.argsort(-valores)
+    return colunas[ordem], valores[ordem]
+
+
+def construir_indice(destino):
+    """Monta o índice do catálogo inteiro em `destino`. Retorna o número de livros."""
+    livros = db.session.execute(
+        db.select(Livro.id_livro, *(getattr(Livro, campo) for campo in PESOS_CAMPOS)).order_by(Livro.id_livro)
+    ).all()
+    documentos = [Counter(termos_do_livro(livro)) for livro in livros]
+    termos = np.array(sorted({termo for documento in documentos for termo in documento}), dtype=str)
+    indice_termo = {termo: i for i, termo in enumerate(termos)}
+
+    frequencia_documentos = np.zeros(len(termos))
+    for documento in documentos:
+        frequencia_documentos[[indice_termo[t] for t in documento]] += 1
+    idf = np.log((1 + len(livros)) / (1 + frequencia_documentos)) + 1
+
+    linhas, colunas, valores = [], [], []
+    for linha, documento in enumerate(documentos):
+        indices, pesos = _vetorizar({indice_termo[t]: n for t, n in documento.items()}, idf)
+        linhas.append(np.full(len(indices), linha))
+        colunas.append(indices)
+        valores.append(pesos)
+    matriz = sparse.csr_matrix(
+        (np.concatenate(valores or [[]]), (np.concatenate(linhas or [[]]).astype(np.int64),
+                                           np.concatenate(colunas or [[]]).astype(np.int64))),
+        shape=(len(livros), len(termos))
+    )
+
+    ids = np.array([livro.id_livro for livro in livros], dtype=np.int64)
+    vizinhos = np.full((len(livros), VIZINHOS_POR_LIVRO), -1, dtype=np.int64)
+    similaridades = np.zeros((len(livros), VIZINHOS_POR_LIVRO), dtype=np.float32)
+    transposta = matriz.T.tocsc()
+    # Em blocos, para o produto X·Xᵀ nunca ficar inteiro na memória
+    for inicio in range(0, len(livros), LINHAS_POR_BLOCO):
+        bloco = (matriz[inicio:inicio + LINHAS_POR_BLOCO] @ transposta).tocsr()
+        for posicao in range(bloco.shape[0]):
+            linha = inicio + posicao
+            fatia = slice(bloco.indptr[posicao], bloco.indptr[posicao + 1])
+            cols, vals = bloco.indices[fatia], bloco.data[fatia]
+            mantidos = (cols != linha) & (vals > 1e-9)
+            cols, vals = _top_k(cols[mantidos], vals[mantidos], VIZINHOS_POR_LIVRO)
+            vizinhos[linha, :len(cols)] = ids[cols]
+            similaridades[linha, :len(cols)] = vals
+
+    por_termo = matriz.tocsc()
+    os.makedirs(destino, exist_ok=True)
+    for nome, valor in (
+        ('termos', termos), ('idf', idf), ('ids', ids),
+        ('x_data', por_termo.data), ('x_indices', por_termo.indices), ('x_indptr', por_termo.indptr),
+        ('vizinhos', vizinhos), ('pesos', similaridades)
+    ):
+        np.save(os.path.join(destino, f'{nome}.npy'), valor)
+    with open(os.path.join(destino, ARQUIVO_COBERTURA), 'w', encoding='utf-8') as arquivo:
+        json.dump({'maior_id': int(ids[-1]) if len(ids) else 0}, arquivo)
+    return len(livros)
+
+
+class IndiceSimilares:
+    """Visão somente leitura dos arquivos do índice, mapeados em memória."""
+
+    def __init__(self, diretorio):
+        carregar = lambda nome: np.load(os.path.join(diretorio, f'{nome}.npy'), mmap_mode='r')  # noqa: E731
+        self.diretorio = diretorio
+        self.versao = os.stat(os.path.join(diretorio, 'ids.npy')).st_mtime_ns
+        self.termos = carregar('termos')
+        self.idf = carregar('idf')
+        self.ids = carregar('ids')
+        self.vizinhos = carregar('vizinhos')
+        self.pesos = carregar('pesos')
+        self.x_data = carregar('x_data')
+        self.x_indices = carregar('x_indices')
+        self.x_indptr = carregar('x_indptr')
+
+    def linha(self, id_livro):
+        posicao = int(np.searchsorted(self.ids, id_livro))
+        if posicao < len(self.ids) and self.ids[posicao] == id_livro:
+            return posicao
+        return None
+
+    def lista_base(self, id_livro):
+        posicao = self.linha(id_livro)
+        if posicao is None:
+            return []
+        return [
+            (int(v), float(p)) for v, p in zip(self.vizinhos[posicao], self.pesos[posicao]) if v >= 0
+        ]
+
+    def produto(self, indices, pesos):
+        """X·v: similaridade de um vetor com cada livro do índice, lendo só as colunas dos seus termos."""
+        linhas, valores = [], []
+        for termo, peso in zip(indices, pesos):
+            fatia = slice(self.x_indptr[termo], self.x_indptr[termo + 1])
+            linhas.append(self.x_indices[fatia])
+            valores.append(self.x_data[fatia] * peso)
+        if not linhas:
+            return np.array([], dtype=np.int64), np.array([])
+        linhas = np.concatenate(linhas)
+        somas = np.bincount(linhas, weights=np.concatenate(valores), minlength=len(self.ids))
+        tocados = np.unique(linhas)
+        return tocados, somas[tocados]
+
+    def vetor(self, livro):
+        """Vetor TF-IDF de um livro com o vocabulário e o IDF do índice; termos novos são ignorados."""
+        contagens = Counter(termos_do_livro(livro))
+        termos = np.array(list(contagens), dtype=str)
+        posicoes = np.searchsorted(self.termos, termos)
+        conhecidos = {}
+        for termo, posicao in zip(termos, posicoes):
+            if posicao < len(self.termos) and self.termos[posicao] == termo:
+                conhecidos[int(posicao)] = contagens[termo]
+        return _vetorizar(conhecidos, self.idf)
+
+
+_indice = None
+_trava = threading.Lock()
+
+
+def diretorio_indice():
+    return os.path.join(current_app.instance_path, DIRETORIO_INDICE)
+
+
+def obter_indice():
+    """Índice do processo, ou None se ainda não foi construído; reabre os arquivos se outro processo o reconstruiu."""
+    global _indice
+    diretorio = diretorio_indice()
+    marcador = os.path.join(diretorio, 'ids.npy')
+    with _trava:
+        if not os.path.exists(marcador):
+            return None
+        if _indice is None or _indice.diretorio != diretorio or _indice.versao != os.stat(marcador).st_mtime_ns:
+            _indice = IndiceSimilares(diretorio)
+        return _indice
+
+
+def reconstruir_indice():
+    """Reconstrói os arquivos do índice e descarta a camada de atualizações que ele já cobre."""
+    inicio = datetime.utcnow()
+    destino = diretorio_indice()
+    os.makedirs(current_app.instance_path, exist_ok=True)
+    # Diretórios únicos: cada processo roda a tarefa periódica, e duas reconstruções
+    # simultâneas não podem escrever ou renomear os arquivos uma da outra
+    temporario = tempfile.mkdtemp(dir=current_app.instance_path, prefix=DIRETORIO_INDICE + '.novo.')
+    antigo = temporario + '.antigo'
+    try:
+        total = construir_indice(temporario)
+        # Troca o diretório inteiro: quem já mapeou os arquivos antigos continua com eles
+        try:
+            os.replace(destino, antigo)
+        except FileNotFoundError:
+            pass
+        try:
+            os.replace(temporario, destino)
+        except OSError:
+            # Outro processo instalou o índice dele entre os dois renames; é tão novo quanto este
+            pass
+    finally:
+        shutil.rmtree(temporario, ignore_errors=True)
+        shutil.rmtree(antigo, ignore_errors=True)
+    db.session.execute(db.delete(VizinhancaLivro).where(VizinhancaLivro.atualizado_em <= inicio))
+    db.session.commit()
+    return total
+
+
+def lista_atual(indice, id_livro, camada=None):
+    """Vizinhos do livro: a camada de atualizações tem prioridade sobre o disco.
+
+    `camada` é {id_livro: lista} já carregada para os livros de interesse; sem ela
+    consulta a linha do livro. Sem índice em disco, só a camada responde.
+    """
+    if camada is not None:
+        if id_livro in camada:
+            return camada[id_livro]
+    else:
+        registro = db.session.get(VizinhancaLivro, id_livro)
+        if registro is not None:
+            return registro.lista()
+    return indice.lista_base(id_livro) if indice is not None else []
+
+
+def atualizar_livro(livro, novo=False):
+    """Recalcula os vizinhos de um livro criado (`novo`) ou com texto alterado, na transação corrente.
+
+    Compara o livro com o índice em disco e com os livros da camada de
+    atualizações, grava a lista dele e insere-o nas listas dos livros para os
+    quais ele passou a estar entre os VIZINHOS_POR_LIVRO mais parecidos (ou
+    deixou de estar, se o texto mudou). Sem índice construído, não faz nada:
+    a primeira construção já inclui o livro.
+
+    Da camada só lê os vetores dos livros novos (limitados pela reconstrução
+    quando a camada cresce) e as listas que podem mudar; as listas alteradas
+    são gravadas em uma única instrução. Um livro novo não está em nenhuma lista
+    do disco, então a busca por ele nos arquivos (O(livros·K)) fica de fora.
+    """
+    indice = obter_indice()
+    if indice is None:
+        return
+    indices, pesos = indice.vetor(livro)
+
+    # Similaridade com os livros do disco (X·v) e com os da camada (vetores em JSON)
+    linhas, valores = indice.produto(indices, pesos)
+    mantidos = valores > 1e-9
+    linha_propria = None if novo else indice.linha(livro.id_livro)
+    if linha_propria is not None:
+        mantidos &= linhas != linha_propria
+    linhas, valores = linhas[mantidos], valores[mantidos]
+    similaridades = dict(zip(indice.ids[linhas].tolist(), valores.tolist()))
+
+    # Ids de toda a camada (só a chave) e os vetores dos livros novos ou com texto alterado
+    vetores = {}
+    na_camada = set()
+    for id_outro, vetor in db.session.execute(db.select(VizinhancaLivro.id_livro, VizinhancaLivro.vetor)):
+        na_camada.add(id_outro)
+        if vetor and id_outro != livro.id_livro:
+            vetores[id_outro] = vetor
+    proprio = dict(zip(indices.tolist(), pesos.tolist()))
+    for id_outro, vetor in vetores.items():
+        outro = {int(k): v for k, v in json.loads(vetor).items()}
+        similaridade = sum(peso * outro.get(termo, 0.0) for termo, peso in proprio.items())
+        if similaridade > 1e-9:
+            similaridades[id_outro] = similaridade
+
+    melhores = heapq.nlargest(VIZINHOS_POR_LIVRO, similaridades.items(), key=lambda item: item[1])
+    VizinhancaLivro.gravar(
+        livro.id_livro, [[i, round(s, 6)] for i, s in melhores],
+        {str(termo): round(peso, 6) for termo, peso in proprio.items()}
+    )
+
+    # Listas de outros livros que passam a incluir este livro ou que já o incluíam.
+    # Para as listas do disco o filtro é vetorizado sobre os arquivos mapeados; da
+    # camada entram os livros parecidos com este e as listas que já o contêm
+    entram = linhas[valores > indice.pesos[linhas, -1]]
+    candidatos = set(indice.ids[entram].tolist())
+    if not novo:
+        ja_incluiam = np.flatnonzero((indice.vizinhos == livro.id_livro).any(axis=1))
+        candidatos |= set(indice.ids[ja_incluiam].tolist())
+    candidatos |= na_camada.intersection(similaridades)
+    candidatos.discard(livro.id_livro)
+    camada = VizinhancaLivro.listas(na_camada.intersection(candidatos), contendo=livro.id_livro)
+    candidatos |= set(camada)
+
+    alteradas = {}
+    for id_outro in candidatos:
+        lista = lista_atual(indice, id_outro, camada)
+        ja_estava = any(i == livro.id_livro for i, _ in lista)
+        similaridade = similaridades.get(id_outro, 0.0)
+        minimo = lista[-1][1] if len(lista) >= VIZINHOS_POR_LIVRO else 0.0
+        if not ja_estava and similaridade <= minimo:
+            continue
+        nova = [(i, s) for i, s in lista if i != livro.id_livro]
+        if similaridade > 0:
+            nova.append((livro.id_livro, round(similaridade, 6)))
+        nova = sorted(nova, key=lambda item: -item[1])[:VIZINHOS_POR_LIVRO]
+        alteradas[id_outro] = [list(par) for par in nova]
+    VizinhancaLivro.gravar_listas(alteradas)
+
+
+def incluir_livros(ids):
+    """Põe na camada, na transação corrente, livros inseridos em lote (importação).
+
+    Se o lote levaria a camada além de LIMITE_CAMADA_SIMILARES, não calcula nada:
+    manter_similares vê os livros fora do índice e o reconstrói na próxima rodada.
+    """
+    indice = obter_indice()
+    if indice is None or not ids:
+        return
+    na_camada = db.session.scalar(db.select(db.func.count()).select_from(VizinhancaLivro))
+    if na_camada + len(ids) > current_app.config['LIMITE_CAMADA_SIMILARES']:
+        return
+    for livro in Livro.query.filter(Livro.id_livro.in_(ids)).order_by(Livro.id_livro):
+        atualizar_livro(livro, novo=True)
+
+
+def similares(id_livro, limit=10):
+    """Livros parecidos com o livro informado: [(Livro, similaridade)].
+
+    Sem índice construído responde só com a camada de atualizações (ou vazio).
+    """
+    lista = lista_atual(obter_indice(), id_livro)[:limit * 2]
+    if not lista:
+        return []
+    livros = {l.id_livro: l for l in Livro.query.filter(Livro.id_livro.in_([i for i, _ in lista]))}
+    return [(livros[i], s) for i, s in lista if i in livros][:limit]
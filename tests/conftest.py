@@ -0,0 +1,53 @@
+import logging
+
+import pytest
+
+from app import create_app
+from benchmarks.gerador import gerar
+from utils.instrumentacao import contar_requisicao
+
+
+def criar_app(diretorio, **config):
+    """App com um banco sintético (preset mínimo) em `diretorio`, como nos benchmarks."""
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{diretorio / "teste.db"}',
+        'AGENDADOR_ATIVO': False,
+        # Sem o cache a contagem é a da rota, não a de um acerto no cache
+        'CACHE_RESPOSTAS_BYTES': 0,
+        'SQLITE_SYNCHRONOUS': 'OFF',
+        **config,
+    })
+    app.instance_path = str(diretorio / 'instance')
+    app.logger.setLevel(logging.ERROR)
+    gerar(app, 'minimo', saida=lambda linha: None)
+    with app.app_context():
+        # Como no deploy: as rotas não montam o índice nem treinam o modelo
+        from services.recomendacao import treinar_e_salvar
+        from services.similares import reconstruir_indice
+        reconstruir_indice()
+        treinar_e_salvar()
+    return app
+
+
+@pytest.fixture(scope='session')
+def app(tmp_path_factory):
+    """App compartilhado pelos testes que só leem; quem grava usa app_isolado."""
+    return criar_app(tmp_path_factory.mktemp('biblioteca'))
+
+
+@pytest.fixture
+def app_isolado(tmp_path):
+    """App com banco próprio, descartado ao fim do teste."""
+    return criar_app(tmp_path)
+
+
+@pytest.fixture
+def cliente(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def consultas_por_requisicao(cliente):
+    """Função que faz um GET e devolve quantas instruções SQL a rota executou."""
+    return lambda caminho: contar_requisicao(cliente, caminho)
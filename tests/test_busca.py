@@ -0,0 +1,35 @@
+def _criar_livro(cliente, **campos):
+    resposta = cliente.post('/api/livros', json={'autor': 'Autora de Teste', **campos})
+    assert resposta.status_code == 201
+    return resposta.get_json()['id_livro']
+
+
+def _buscar(cliente, texto):
+    resposta = cliente.get('/api/livros/busca', query_string={'q': texto})
+    assert resposta.status_code == 200
+    return resposta.get_json()
+
+
+def test_busca_ignora_acentos_e_ordena_titulo_antes_da_sinopse(app_isolado):
+    cliente = app_isolado.test_client()
+    na_sinopse = _criar_livro(cliente, titulo='Crônicas do interior',
+                              sinopse='Uma família e sua zabumbância de todo domingo.')
+    no_titulo = _criar_livro(cliente, titulo='A Zabumbância')
+
+    resultados = _buscar(cliente, 'ZABUMBANCIA')
+    assert [livro['id_livro'] for livro in resultados] == [no_titulo, na_sinopse]
+    assert resultados[0]['relevancia'] > resultados[1]['relevancia']
+    assert '<mark>zabumbância</mark>' in resultados[1]['trecho']
+
+    # Prefixo e várias palavras (AND)
+    assert [livro['id_livro'] for livro in _buscar(cliente, 'zabumb cronicas')] == [na_sinopse]
+
+
+def test_trecho_escapa_o_html_do_texto(app_isolado):
+    cliente = app_isolado.test_client()
+    _criar_livro(cliente, titulo='Livro comum',
+                 sinopse='<img src=x onerror=alert(1)> quixotesco & "aspas"')
+
+    trecho, = [livro['trecho'] for livro in _buscar(cliente, 'quixotesco')]
+    assert '<img' not in trecho
+    assert trecho == '&lt;img src=x onerror=alert(1)&gt; <mark>quixotesco</mark> &amp; &quot;aspas&quot;'
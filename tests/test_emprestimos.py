@@ -0,0 +1,110 @@
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import db
+from models.emprestimo import Emprestimo
+from models.livro import Livro
+from models.membro import Membro
+from models.pontos import LancamentoPontos
+
+
+def _livro_disponivel(app):
+    with app.app_context():
+        return db.session.execute(
+            db.select(Livro.id_livro).where(Livro.disponivel == True).order_by(Livro.id_livro)  # noqa: E712
+        ).scalars().first()
+
+
+def _emprestimo_vencido_ha(app, cliente, atraso):
+    """Cria um empréstimo interno e move o prazo para `atraso` atrás."""
+    resposta = cliente.post('/api/emprestimos', json={'id_livro': _livro_disponivel(app), 'id_membro': 1})
+    assert resposta.status_code == 201
+    id_emprestimo = resposta.get_json()['id_emprestimo']
+    with app.app_context():
+        db.session.execute(
+            db.update(Emprestimo).where(Emprestimo.id_emprestimo == id_emprestimo)
+            .values(data_prevista_devolucao=datetime.now() - atraso)
+        )
+        db.session.commit()
+    return id_emprestimo
+
+
+def _ids(cliente, status):
+    resposta = cliente.get(f'/api/emprestimos?status={status}')
+    assert resposta.status_code == 200
+    return {e['id_emprestimo']: e for e in resposta.get_json()}
+
+
+@pytest.mark.parametrize('atraso, atrasado, dias', [
+    (timedelta(hours=3), False, 0),
+    (timedelta(hours=25), True, 1),
+])
+def test_filtro_varredura_e_serializacao_usam_o_mesmo_corte(app_isolado, atraso, atrasado, dias):
+    cliente = app_isolado.test_client()
+    id_emprestimo = _emprestimo_vencido_ha(app_isolado, cliente, atraso)
+    status = 'atrasado' if atrasado else 'ativo'
+
+    atrasados, em_dia = _ids(cliente, 'atrasado'), _ids(cliente, 'ativo')
+    assert (id_emprestimo in atrasados) is atrasado
+    assert (id_emprestimo in em_dia) is not atrasado
+    listado = (atrasados if atrasado else em_dia)[id_emprestimo]
+    assert (listado['status'], listado['dias_atraso']) == (status, dias)
+
+    with app_isolado.app_context():
+        Emprestimo.marcar_atrasados()
+        assert db.session.get(Emprestimo, id_emprestimo).status == status
+
+
+def test_emprestimos_simultaneos_do_mesmo_livro_so_um_consegue(app_isolado):
+    id_livro = _livro_disponivel(app_isolado)
+    pedidos = 8
+    largada = threading.Barrier(pedidos)
+    respostas = []
+
+    def pedir(id_membro):
+        cliente = app_isolado.test_client()
+        largada.wait()
+        respostas.append(cliente.post('/api/emprestimos', json={'id_livro': id_livro, 'id_membro': id_membro}))
+
+    threads = [threading.Thread(target=pedir, args=(1 + i % 10,)) for i in range(pedidos)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    codigos = sorted(resposta.status_code for resposta in respostas)
+    assert codigos == [201] + [400] * (pedidos - 1)
+    with app_isolado.app_context():
+        assert db.session.get(Livro, id_livro).disponivel is False
+        abertos = db.session.scalar(
+            db.select(db.func.count()).select_from(Emprestimo)
+            .where(Emprestimo.id_livro == id_livro, Emprestimo.status != 'devolvido')
+        )
+        assert abertos == 1
+
+
+def test_segunda_devolucao_falha_e_nao_pontua_de_novo(app_isolado):
+    cliente = app_isolado.test_client()
+    resposta = cliente.post('/api/emprestimos', json={'id_livro': _livro_disponivel(app_isolado), 'id_membro': 1})
+    id_emprestimo = resposta.get_json()['id_emprestimo']
+
+    def pontos():
+        with app_isolado.app_context():
+            membro = db.session.get(Membro, 1)
+            lancados = db.session.scalar(
+                db.select(db.func.count()).select_from(LancamentoPontos)
+                .where(LancamentoPontos.id_referencia == id_emprestimo,
+                       LancamentoPontos.motivo.in_(['devolucao', 'devolucao_no_prazo']))
+            )
+            return membro.pontos_leitura, lancados
+
+    antes, _ = pontos()
+    assert cliente.put(f'/api/emprestimos/{id_emprestimo}/devolver').status_code == 200
+    depois, lancados = pontos()
+    assert depois > antes and lancados == 2
+
+    segunda = cliente.put(f'/api/emprestimos/{id_emprestimo}/devolver')
+    assert segunda.status_code == 400
+    assert pontos() == (depois, lancados)
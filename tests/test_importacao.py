@@ -0,0 +1,50 @@
+from app import db
+from models.livro import Livro
+from models.similar import VizinhancaLivro
+
+
+def _total_livros(app):
+    with app.app_context():
+        return db.session.scalar(db.select(db.func.count()).select_from(Livro))
+
+
+def _isbn_existente(app):
+    with app.app_context():
+        return db.session.execute(db.select(Livro.isbn).where(Livro.isbn.isnot(None)).limit(1)).scalar_one()
+
+
+def test_relatorio_lista_duplicados_e_invalidos(app_isolado):
+    cliente = app_isolado.test_client()
+    antes = _total_livros(app_isolado)
+    corpo = (
+        'isbn,titulo,autor,ano_publicacao\n'
+        '9991000000001,Primeiro livro,Autora Um,2001\n'       # linha 2: importada
+        f'{_isbn_existente(app_isolado)},Já cadastrado,Autor,\n'  # linha 3: ISBN do catálogo
+        '9991000000001,Repetido no arquivo,Autora Um,2002\n'  # linha 4: ISBN repetido no arquivo
+        ',Sem autor,,1999\n'                                  # linha 5: inválida
+        '9991000000002,Ano ruim,Autor Dois,mil\n'             # linha 6: inválida
+        ',Sem ISBN,Autor Três,\n'                             # linha 7: importada
+    )
+
+    resposta = cliente.post('/api/livros/import', data=corpo, content_type='text/csv')
+
+    assert resposta.status_code == 200
+    relatorio = resposta.get_json()
+    assert (relatorio['importados'], relatorio['duplicados'], relatorio['invalidos']) == (2, 2, 2)
+    assert [(erro['linha'], erro['erro']) for erro in relatorio['erros']] == [
+        (3, 'ISBN já cadastrado'),
+        (4, 'ISBN já cadastrado'),
+        (5, 'Título e autor são obrigatórios'),
+        (6, 'ano_publicacao deve ser um número inteiro'),
+    ]
+    assert relatorio['erros_omitidos'] == 0
+    assert _total_livros(app_isolado) == antes + 2
+    with app_isolado.app_context():
+        # Os livros importados entram na camada de similares na mesma transação
+        importado = db.session.execute(db.select(Livro.id_livro).where(Livro.isbn == '9991000000001')).scalar_one()
+        assert db.session.get(VizinhancaLivro, importado) is not None
+
+
+def test_formato_desconhecido_responde_400(cliente):
+    resposta = cliente.post('/api/livros/import', data='x', content_type='application/xml')
+    assert resposta.status_code == 400
@@ -0,0 +1,6 @@
+from utils.documentacao import diferencas_especificacao, gerar_especificacao
+
+
+def test_openapi_versionado_em_dia_com_as_rotas(app):
+    diferencas = diferencas_especificacao(gerar_especificacao(app), app.config['ARQUIVO_OPENAPI'])
+    assert not diferencas, 'openapi.json desatualizado; rode flask gerar-openapi\n' + ''.join(diferencas)
@@ -0,0 +1,16 @@
+import pytest
+
+from utils.instrumentacao import ORCAMENTO_CONSULTAS, caminho_orcamento, ids_orcamento
+
+
+@pytest.fixture(scope='module')
+def ids(app):
+    with app.app_context():
+        return ids_orcamento()
+
+
+@pytest.mark.parametrize('modelo, maximo', ORCAMENTO_CONSULTAS.items(), ids=list(ORCAMENTO_CONSULTAS))
+def test_rota_dentro_do_orcamento(modelo, maximo, ids, consultas_por_requisicao):
+    caminho = caminho_orcamento(modelo, ids)
+    assert caminho is not None, f'banco de teste sem dados para {modelo}'
+    assert consultas_por_requisicao(caminho) <= maximo
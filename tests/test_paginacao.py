@@ -0,0 +1,81 @@
+import base64
+import json
+
+import pytest
+
+
+def _cursor(valores):
+    return base64.urlsafe_b64encode(json.dumps(valores).encode()).decode().rstrip('=')
+
+
+def _percorrer(cliente, caminho, limit):
+    """Ids de todas as páginas seguindo X-Proximo-Cursor."""
+    ids, cursor = [], None
+    while True:
+        separador = '&' if '?' in caminho else '?'
+        url = f'{caminho}{separador}limit={limit}' + (f'&after={cursor}' if cursor else '')
+        resposta = cliente.get(url)
+        assert resposta.status_code == 200
+        pagina = resposta.get_json()
+        assert len(pagina) <= limit
+        ids.extend(pagina)
+        cursor = resposta.headers.get('X-Proximo-Cursor')
+        if not cursor:
+            return ids
+
+
+@pytest.mark.parametrize('caminho, chave', [
+    ('/api/livros', 'id_livro'),
+    ('/api/emprestimos', 'id_emprestimo'),
+    ('/api/emprestimos?status=devolvido', 'id_emprestimo'),
+    ('/api/wishlist', 'id_wishlist'),
+])
+def test_paginas_cobrem_a_listagem_inteira_na_mesma_ordem(cliente, caminho, chave):
+    completa = [item[chave] for item in cliente.get(caminho).get_json()]
+    paginas = [item[chave] for item in _percorrer(cliente, caminho, 37)]
+    assert paginas == completa
+
+
+@pytest.mark.parametrize('after', [
+    'não é base64!',
+    _cursor({'id': 1}),
+    _cursor([{}]),
+    _cursor([[1]]),
+    _cursor([True]),
+    _cursor(['1']),
+    _cursor([1, 2]),
+])
+def test_cursor_invalido_responde_400(cliente, after):
+    resposta = cliente.get(f'/api/livros?after={after}')
+    assert resposta.status_code == 400
+    assert resposta.get_json() == {'erro': 'Cursor inválido'}
+
+
+@pytest.mark.parametrize('after', [
+    _cursor([{}, 1]),
+    _cursor(['ontem', 1]),
+    _cursor([1, 1]),
+    _cursor(['2024-01-01T00:00:00', 'x']),
+])
+def test_cursor_com_tipo_errado_na_chave_de_data_responde_400(cliente, after):
+    assert cliente.get(f'/api/emprestimos?after={after}').status_code == 400
+
+
+def test_cursor_valido_montado_pelo_cliente(cliente):
+    resposta = cliente.get(f'/api/livros?limit=5&after={_cursor([10])}')
+    assert resposta.status_code == 200
+    assert [livro['id_livro'] for livro in resposta.get_json()] == [11, 12, 13, 14, 15]
+
+
+@pytest.mark.parametrize('limit', ['0', '-1', 'abc', '1.5'])
+def test_limit_invalido_responde_400(cliente, limit):
+    resposta = cliente.get(f'/api/livros?limit={limit}')
+    assert resposta.status_code == 400
+    assert 'limit' in resposta.get_json()['erro']
+
+
+def test_limit_acima_do_maximo_e_limitado(cliente):
+    from utils.paginacao import LIMITE_MAXIMO
+    resposta = cliente.get(f'/api/emprestimos?limit={LIMITE_MAXIMO + 1}')
+    assert resposta.status_code == 200
+    assert len(resposta.get_json()) == LIMITE_MAXIMO
@@ -0,0 +1,33 @@
+import pytest
+
+from utils.planos import tabela_varrida, verificar_planos
+
+
+@pytest.mark.parametrize('linha, tabela', [
+    ('SCAN livros', 'livros'),
+    ('SCAN TABLE livros', 'livros'),
+    ('SCAN TABLE livros AS l', 'livros'),
+    ('SCAN livros USING INDEX ix_livros_genero', None),
+    ('SCAN TABLE livros USING COVERING INDEX ix_livros_genero', None),
+    ('SCAN livros_busca VIRTUAL TABLE INDEX 0:M1', None),
+    ('SCAN CONSTANT ROW', None),
+    ('SEARCH livros USING INTEGER PRIMARY KEY (rowid=?)', None),
+])
+def test_tabela_varrida(linha, tabela):
+    assert tabela_varrida(linha) == tabela
+
+
+@pytest.mark.parametrize('linha, tabela', [
+    ('SCAN wishlist USING INDEX ix_wishlist_membro_prioridade_data', 'wishlist'),
+    ('SCAN livros_busca VIRTUAL TABLE INDEX 0:M1', None),
+    ('SEARCH wishlist USING INDEX ix_wishlist_prioridade_data (prioridade=?)', None),
+])
+def test_indice_percorrido_com_ordenacao_em_memoria_conta_como_varredura(linha, tabela):
+    assert tabela_varrida(linha, ordena_em_memoria=True) == tabela
+
+
+def test_consultas_das_rotas_usam_indice(app):
+    with app.app_context():
+        planos = verificar_planos()
+    varreduras = {nome: plano for nome, (plano, varridas) in planos.items() if varridas}
+    assert varreduras == {}, 'consultas com varredura completa de tabela'
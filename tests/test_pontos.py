@@ -0,0 +1,63 @@
+from app import db
+from models.livro import Livro
+from models.membro import Membro
+from models.pontos import LancamentoPontos
+
+
+def _novo_membro(app):
+    with app.app_context():
+        membro = Membro(nome='Membro de teste', email='pontos@teste.local', idade=30)
+        db.session.add(membro)
+        db.session.commit()
+        return membro.id_membro
+
+
+def _saldo(app, id_membro):
+    """(pontos_leitura, soma do livro-razão) do membro."""
+    with app.app_context():
+        soma = db.session.scalar(
+            db.select(db.func.coalesce(db.func.sum(LancamentoPontos.pontos), 0))
+            .where(LancamentoPontos.id_membro == id_membro)
+        )
+        return db.session.get(Membro, id_membro).pontos_leitura, soma
+
+
+def _livros_disponiveis(app, quantidade):
+    with app.app_context():
+        return db.session.execute(
+            db.select(Livro.id_livro).where(Livro.disponivel == True)  # noqa: E712
+            .order_by(Livro.id_livro).limit(quantidade)
+        ).scalars().all()
+
+
+def test_pontos_leitura_acompanha_o_livro_razao(app_isolado):
+    cliente = app_isolado.test_client()
+    id_membro = _novo_membro(app_isolado)
+    id_livro, = _livros_disponiveis(app_isolado, 1)
+
+    emprestimo = cliente.post('/api/emprestimos', json={'id_livro': id_livro, 'id_membro': id_membro}).get_json()
+    assert cliente.put(f'/api/emprestimos/{emprestimo["id_emprestimo"]}/devolver').status_code == 200
+    pontos, soma = _saldo(app_isolado, id_membro)
+    assert pontos == soma > 0
+
+    avaliacao = cliente.post('/api/avaliacoes', json={'id_livro': id_livro, 'id_membro': id_membro, 'nota': 4})
+    assert avaliacao.status_code == 201
+    assert _saldo(app_isolado, id_membro) == (pontos + 15, soma + 15)
+
+    assert cliente.delete(f'/api/avaliacoes/{avaliacao.get_json()["id_avaliacao"]}').status_code == 200
+    assert _saldo(app_isolado, id_membro) == (pontos, soma)
+
+
+def test_estorno_da_avaliacao_nao_deixa_o_total_negativo(app_isolado):
+    cliente = app_isolado.test_client()
+    id_membro = _novo_membro(app_isolado)
+    id_livro, = _livros_disponiveis(app_isolado, 1)
+
+    avaliacao = cliente.post('/api/avaliacoes', json={'id_livro': id_livro, 'id_membro': id_membro, 'nota': 5})
+    with app_isolado.app_context():
+        LancamentoPontos.lancar(id_membro, -10, 'ajuste')
+        db.session.commit()
+    assert _saldo(app_isolado, id_membro) == (5, 5)
+
+    assert cliente.delete(f'/api/avaliacoes/{avaliacao.get_json()["id_avaliacao"]}').status_code == 200
+    assert _saldo(app_isolado, id_membro) == (0, 0)
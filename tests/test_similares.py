@@ -0,0 +1,80 @@
+from app import db
+from models.livro import Livro
+from models.similar import VizinhancaLivro
+from services.similares import reconstruir_indice
+
+
+def _texto(app, id_livro):
+    with app.app_context():
+        livro = db.session.get(Livro, id_livro)
+        return {'titulo': livro.titulo, 'autor': livro.autor, 'genero': livro.genero or '',
+                'sinopse': (livro.sinopse or '').replace('"', '')}
+
+
+def _importar(cliente, texto, isbns):
+    """Importa cópias do texto de um livro: cada cópia é vizinha dele."""
+    linhas = [f'{isbn},"{texto["titulo"]}","{texto["autor"]}","{texto["genero"]}","{texto["sinopse"]}"'
+              for isbn in isbns]
+    corpo = 'isbn,titulo,autor,genero,sinopse\n' + '\n'.join(linhas) + '\n'
+    resposta = cliente.post('/api/livros/import', data=corpo, content_type='text/csv')
+    assert resposta.status_code == 200
+    return resposta.get_json()
+
+
+def _id_por_isbn(app, isbn):
+    with app.app_context():
+        return db.session.execute(db.select(Livro.id_livro).where(Livro.isbn == isbn)).scalar_one()
+
+
+def _na_camada(app, id_livro):
+    with app.app_context():
+        return db.session.get(VizinhancaLivro, id_livro) is not None
+
+
+def _precisa_reconstruir(app):
+    with app.app_context():
+        return VizinhancaLivro.precisa_reconstruir(app.instance_path, app.config['LIMITE_CAMADA_SIMILARES'])
+
+
+def _similares(cliente, id_livro):
+    resposta = cliente.get(f'/api/livros/{id_livro}/similares')
+    assert resposta.status_code == 200
+    return [item['id_livro'] for item in resposta.get_json()]
+
+
+def test_livro_importado_entra_na_camada(app_isolado):
+    cliente = app_isolado.test_client()
+    assert _importar(cliente, _texto(app_isolado, 1), ['9990000000001'])['importados'] == 1
+    importado = _id_por_isbn(app_isolado, '9990000000001')
+    assert _na_camada(app_isolado, importado)
+    assert not _precisa_reconstruir(app_isolado)
+    assert 1 in _similares(cliente, importado)
+
+
+def test_importacao_acima_do_limite_da_camada_pede_reconstrucao(app_isolado):
+    app_isolado.config['LIMITE_CAMADA_SIMILARES'] = 1
+    cliente = app_isolado.test_client()
+    assert _importar(cliente, _texto(app_isolado, 1), ['9990000000002', '9990000000003'])['importados'] == 2
+    importado = _id_por_isbn(app_isolado, '9990000000002')
+    assert not _na_camada(app_isolado, importado)
+    assert _precisa_reconstruir(app_isolado)
+
+    with app_isolado.app_context():
+        reconstruir_indice()
+    assert not _precisa_reconstruir(app_isolado)
+    assert 1 in _similares(cliente, importado)
+
+
+def test_livro_comprado_da_wishlist_entra_na_camada(app_isolado):
+    cliente = app_isolado.test_client()
+    texto = _texto(app_isolado, 1)
+    resposta = cliente.post('/api/wishlist', json={
+        'id_membro': 1, 'titulo_desejado': texto['titulo'], 'autor_desejado': texto['autor']
+    })
+    assert resposta.status_code == 201
+    resposta = cliente.post(f'/api/wishlist/{resposta.get_json()["id_wishlist"]}/comprar',
+                            json={'genero': texto['genero']})
+    assert resposta.status_code == 200
+    id_livro = resposta.get_json()['livro']['id_livro']
+    assert _na_camada(app_isolado, id_livro)
+    assert 1 in _similares(cliente, id_livro)
@@ -0,0 +1,101 @@
+import os
+
+from flask import current_app
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session
+
+# Perfil padrão do SQLite para servir com vários workers: WAL deixa leitores
+# rodarem em paralelo com o escritor, e busy_timeout faz quem encontra o banco
+# travado esperar em vez de falhar com "database is locked"
+PERFIL_SQLITE = {
+    'SQLITE_JOURNAL_MODE': 'WAL',
+    'SQLITE_SYNCHRONOUS': 'NORMAL',
+    'SQLITE_BUSY_TIMEOUT_MS': 5000,
+    'SQLITE_CACHE_SIZE_KB': 20000,
+    'SQLITE_MMAP_BYTES': 256 * 1024 * 1024,
+    'SQLITE_TEMP_STORE': 'MEMORY',
+}
+
+
+def configurar_perfil(app):
+    """Preenche a configuração do banco (pragmas e pool) a partir do ambiente.
+
+    Deve ser chamada antes de db.init_app, pois define SQLALCHEMY_ENGINE_OPTIONS.
+    """
+    for chave, padrao in PERFIL_SQLITE.items():
+        valor = os.environ.get(chave, padrao)
+        app.config.setdefault(chave, type(padrao)(valor))
+
+    app.config.setdefault('BANCO_LEITURA_SEPARADA', os.environ.get('BANCO_LEITURA_SEPARADA', '1') == '1')
+
+    opcoes = app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', {})
+    opcoes.setdefault('pool_size', int(os.environ.get('BANCO_POOL_SIZE', 5)))
+    opcoes.setdefault('max_overflow', int(os.environ.get('BANCO_POOL_MAX_OVERFLOW', 10)))
+    opcoes.setdefault('pool_timeout', int(os.environ.get('BANCO_POOL_TIMEOUT', 30)))
+    opcoes.setdefault('pool_pre_ping', True)
+    if app.config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite'):
+        # O timeout do driver cobre o BEGIN; o busy_timeout abaixo cobre o resto
+        conexao = opcoes.setdefault('connect_args', {})
+        conexao.setdefault('timeout', app.config['SQLITE_BUSY_TIMEOUT_MS'] / 1000)
+        conexao.setdefault('check_same_thread', False)
+
+
+def _pragmas(config, somente_leitura=False):
+    pragmas = [
+        f"PRAGMA busy_timeout = {int(config['SQLITE_BUSY_TIMEOUT_MS'])}",
+        # Valor negativo: tamanho em KiB em vez de número de páginas
+        f"PRAGMA cache_size = -{int(config['SQLITE_CACHE_SIZE_KB'])}",
+        f"PRAGMA mmap_size = {int(config['SQLITE_MMAP_BYTES'])}",
+        f"PRAGMA temp_store = {config['SQLITE_TEMP_STORE']}",
+    ]
+    if somente_leitura:
+        pragmas.append('PRAGMA query_only = ON')
+    else:
+        pragmas += [
+            f"PRAGMA journal_mode = {config['SQLITE_JOURNAL_MODE']}",
+            f"PRAGMA synchronous = {config['SQLITE_SYNCHRONOUS']}",
+        ]
+    return pragmas
+
+
+def _registrar_pragmas(engine, pragmas):
+    @event.listens_for(engine, 'connect')
+    def aplicar_pragmas(conexao_dbapi, registro):
+        cursor = conexao_dbapi.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
+
+
+def init_banco(app, db):
+    """Aplica os pragmas no engine principal e cria o engine somente leitura.
+
+    O engine de leitura abre o mesmo arquivo com mode=ro: não disputa o pool
+    com as escritas e não consegue gravar por engano. Use-o para leituras
+    longas (exportação, relatórios) via sessao_leitura().
+    """
+    with app.app_context():
+        engine = db.engine
+        if engine.dialect.name != 'sqlite':
+            return
+        _registrar_pragmas(engine, _pragmas(app.config))
+
+        caminho = engine.url.database
+        if not app.config['BANCO_LEITURA_SEPARADA'] or not caminho or caminho == ':memory:':
+            return
+
+        leitura = create_engine(
+            f'sqlite:///file:{caminho}?mode=ro&uri=true', **app.config['SQLALCHEMY_ENGINE_OPTIONS']
+        )
+        _registrar_pragmas(leitura, _pragmas(app.config, somente_leitura=True))
+        app.extensions['banco_leitura'] = leitura
+
+
+def sessao_leitura():
+    """Sessão no engine somente leitura (ou no principal, se não houver um separado).
+
+    Use como context manager: `with sessao_leitura() as sessao: ...`
+    """
+    from app import db
+    engine = current_app.extensions.get('banco_leitura') or db.engine
+    return Session(bind=engine)
@@ -0,0 +1,134 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import date
+from functools import wraps
+
+from flask import current_app, make_response, request
+from urllib.parse import urlencode
+
+from models.cache_versao import CacheVersao
+
+# Cabeçalhos da resposta original que precisam ser devolvidos junto com o corpo em cache
+CABECALHOS_PRESERVADOS = ('X-Proximo-Cursor',)
+
+
+class CacheRespostas:
+    """LRU em memória de respostas GET já renderizadas, limitado por bytes.
+
+    Cada entrada guarda as versões das tags (recursos) de que depende. As
+    versões ficam no banco (tabela cache_versoes) e são incrementadas na
+    mesma transação das escritas, então uma entrada é descartada assim que
+    qualquer processo altera um dos recursos, sem depender de TTL.
+    """
+
+    def __init__(self, limite_bytes=32 * 1024 * 1024):
+        self.limite_bytes = limite_bytes
+        self.total_bytes = 0
+        self._entradas = OrderedDict()
+        self._trava = threading.Lock()
+
+    def obter(self, chave, versoes):
+        with self._trava:
+            entrada = self._entradas.get(chave)
+            if entrada is None:
+                return None
+            if any(versoes.get(tag) != versao for tag, versao in entrada['versoes'].items()):
+                self._remover(chave)
+                return None
+            self._entradas.move_to_end(chave)
+            return entrada
+
+    def armazenar(self, chave, entrada):
+        tamanho = len(entrada['corpo']) + len(chave)
+        if tamanho > self.limite_bytes:
+            return
+        entrada['tamanho'] = tamanho
+        with self._trava:
+            if chave in self._entradas:
+                self._remover(chave)
+            self._entradas[chave] = entrada
+            self.total_bytes += tamanho
+            while self.total_bytes > self.limite_bytes:
+                self._remover(next(iter(self._entradas)))
+
+    def limpar(self):
+        with self._trava:
+            self._entradas.clear()
+            self.total_bytes = 0
+
+    def _remover(self, chave):
+        entrada = self._entradas.pop(chave)
+        self.total_bytes -= entrada['tamanho']
+
+
+def _chave_requisicao(por_dia):
+    # Normaliza a ordem dos parâmetros para que ?a=1&b=2 e ?b=2&a=1 compartilhem a entrada
+    chave = request.path + '?' + urlencode(sorted(request.args.items(multi=True)))
+    if por_dia:
+        chave += '#' + date.today().isoformat()
+    return chave
+
+
+def _responder(entrada):
+    resposta = make_response(entrada['corpo'], 200)
+    resposta.mimetype = entrada['mimetype']
+    for nome, valor in entrada['cabecalhos'].items():
+        resposta.headers[nome] = valor
+    resposta.set_etag(entrada['etag'])
+    resposta.headers['Cache-Control'] = 'no-cache'
+    return resposta.make_conditional(request)
+
+
+def cache_resposta(*tags, por_dia=False):
+    """Cacheia a resposta de uma rota GET e responde If-None-Match com 304.
+
+    `tags` são os recursos cujos dados aparecem na resposta; qualquer escrita
+    que chame invalidar_cache() com uma delas invalida a entrada. Use
+    por_dia=True quando o corpo tem campos que mudam com a data (ex.: dias_atraso).
+    """
+    def decorador(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            cache = current_app.extensions.get('cache_respostas')
+            if cache is None or request.method != 'GET':
+                return view(*args, **kwargs)
+
+            chave = _chave_requisicao(por_dia)
+            versoes = CacheVersao.atuais()
+            entrada = cache.obter(chave, versoes)
+            if entrada is not None:
+                return _responder(entrada)
+
+            resposta = make_response(view(*args, **kwargs))
+            if resposta.status_code != 200 or resposta.is_streamed:
+                return resposta
+
+            corpo = resposta.get_data()
+            entrada = {
+                'corpo': corpo,
+                'mimetype': resposta.mimetype,
+                'cabecalhos': {n: resposta.headers[n] for n in CABECALHOS_PRESERVADOS if n in resposta.headers},
+                'etag': hashlib.sha256(corpo).hexdigest()[:32],
+                # Versões lidas antes de executar a rota: uma escrita concorrente invalida a entrada
+                'versoes': {tag: versoes.get(tag) for tag in tags}
+            }
+            cache.armazenar(chave, entrada)
+            return _responder(entrada)
+        return wrapper
+    return decorador
+
+
+def invalidar_cache(*tags):
+    """Marca os recursos como alterados; chame antes do commit da escrita."""
+    CacheVersao.incrementar(*tags)
+
+
+def init_cache(app):
+    # As linhas de versão são necessárias mesmo com o cache desligado: as escritas as incrementam.
+    # Em produção quem as cria é a migração 0009, sem escrita no banco a cada boot
+    if not app.config['MODO_PRODUCAO']:
+        with app.app_context():
+            CacheVersao.garantir_tags()
+    if app.config['CACHE_RESPOSTAS_BYTES'] > 0:
+        app.extensions['cache_respostas'] = CacheRespostas(app.config['CACHE_RESPOSTAS_BYTES'])
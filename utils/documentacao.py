@@ -0,0 +1,84 @@
+import difflib
+import hashlib
+import importlib.util
+import json
+import os
+
+
+def swag_from(especificacao):
+    """Anota a rota com a especificação OpenAPI (dict), sem envolver a função.
+
+    Guarda o dicionário no mesmo atributo que o swag_from do Flasgger
+    (`specs_dict`), então o Flasgger monta a especificação igual; a
+    diferença é que importar as rotas não importa o Flasgger (nem jsonschema
+    e yaml), que fica fora do boot em produção.
+    """
+    def decorador(funcao):
+        funcao.specs_dict = especificacao
+        return funcao
+    return decorador
+
+
+def gerar_especificacao(app):
+    """Monta a especificação completa com o Flasgger (só no build / flask gerar-openapi)."""
+    from flasgger import Swagger
+
+    swagger = getattr(app, 'swag', None) or Swagger(app)
+    with app.test_request_context():
+        # Ida e volta pelo JSON: troca defaultdicts e tuplas pelos tipos do arquivo
+        return json.loads(json.dumps(swagger.get_apispecs()))
+
+
+def serializar_especificacao(especificacao):
+    # Chaves ordenadas e indentação fixa: o arquivo versionado só muda quando a especificação muda
+    return json.dumps(especificacao, ensure_ascii=False, indent=2, sort_keys=True) + '\n'
+
+
+def salvar_especificacao(especificacao, caminho):
+    diretorio = os.path.dirname(os.path.abspath(caminho))
+    os.makedirs(diretorio, exist_ok=True)
+    temporario = caminho + '.tmp'
+    with open(temporario, 'w', encoding='utf-8') as arquivo:
+        arquivo.write(serializar_especificacao(especificacao))
+    os.replace(temporario, caminho)
+
+
+def diferencas_especificacao(especificacao, caminho):
+    """Linhas do diff entre o arquivo gravado e a especificação atual dos decoradores (vazio = em dia)."""
+    atual = serializar_especificacao(especificacao).splitlines(keepends=True)
+    if not os.path.exists(caminho):
+        return [f'{caminho} não existe\n']
+    with open(caminho, encoding='utf-8') as arquivo:
+        gravado = arquivo.read().splitlines(keepends=True)
+    return list(difflib.unified_diff(gravado, atual, fromfile=caminho, tofile='decoradores @swag_from'))
+
+
+def carregar_especificacao(caminho):
+    """Lê o arquivo gerado no build uma única vez; o ETag é o hash do conteúdo."""
+    if not os.path.exists(caminho):
+        return None
+    with open(caminho, 'rb') as arquivo:
+        corpo = arquivo.read()
+    return {'corpo': corpo, 'etag': hashlib.sha256(corpo).hexdigest()[:32]}
+
+
+def diretorio_swagger_ui():
+    """Arquivos estáticos do Swagger UI que acompanham o Flasgger, sem importar o pacote."""
+    pacote = importlib.util.find_spec('flasgger')
+    if pacote is None or not pacote.submodule_search_locations:
+        return None
+    return os.path.join(list(pacote.submodule_search_locations)[0], 'ui3', 'static')
+
+
+def init_documentacao(app):
+    """Swagger em desenvolvimento; em produção, especificação gerada no build e UI sob demanda."""
+    if not app.config['MODO_PRODUCAO']:
+        from flasgger import Swagger
+        Swagger(app)
+        return
+    from routes.documentacao import documentacao_bp
+    especificacao = carregar_especificacao(app.config['ARQUIVO_OPENAPI'])
+    if especificacao is None:
+        app.logger.warning('%s não encontrado: rode flask gerar-openapi no build', app.config['ARQUIVO_OPENAPI'])
+    app.extensions['openapi'] = especificacao
+    app.register_blueprint(documentacao_bp)
@@ -0,0 +1,255 @@
+import re
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from flask import current_app, g, request
+from sqlalchemy import event
+
+# Coletor da requisição (ou do bloco contar_consultas) em andamento neste contexto
+_coletor_atual = ContextVar('coletor_sql', default=None)
+
+# Listas de parâmetros de IN e literais numéricos não mudam a "forma" da instrução
+_LISTA_PARAMETROS = re.compile(r'\(\?(?:,\s*\?)*\)')
+_NUMEROS = re.compile(r'\b\d+\b')
+_ESPACOS = re.compile(r'\s+')
+
+TAMANHO_SQL_EXIBIDO = 300
+
+
+def forma_instrucao(sql):
+    """Normaliza a instrução para agrupar execuções repetidas da mesma consulta."""
+    sql = _ESPACOS.sub(' ', sql).strip()
+    sql = _LISTA_PARAMETROS.sub('(?)', sql)
+    return _NUMEROS.sub('N', sql)
+
+
+class ColetorSQL:
+    """Instruções executadas em um trecho (requisição ou bloco de teste).
+
+    Coletores aninhados repassam o registro ao de fora: um contar_consultas()
+    em volta de uma chamada do test client também vê as consultas da rota.
+    """
+
+    def __init__(self, pai=None):
+        self.pai = pai
+        self.consultas = []  # (sql, duracao_segundos)
+
+    def registrar(self, sql, duracao):
+        self.consultas.append((sql, duracao))
+        if self.pai is not None:
+            self.pai.registrar(sql, duracao)
+
+    @property
+    def total(self):
+        return len(self.consultas)
+
+    @property
+    def tempo_total(self):
+        return sum(duracao for _, duracao in self.consultas)
+
+    def mais_lentas(self, quantidade=3):
+        return sorted(self.consultas, key=lambda c: c[1], reverse=True)[:quantidade]
+
+    def repetidas(self, limite):
+        """{forma: execuções} das formas executadas ao menos `limite` vezes (suspeita de N+1)."""
+        contagem = Counter(forma_instrucao(sql) for sql, _ in self.consultas)
+        return {forma: vezes for forma, vezes in contagem.most_common() if vezes >= limite}
+
+
+@contextmanager
+def contar_consultas():
+    """Conta as instruções SQL executadas dentro do bloco, inclusive as das rotas chamadas.
+
+    Para testes e benchmarks:
+
+        with contar_consultas() as coletor:
+            cliente.get('/api/emprestimos')
+        assert coletor.total <= 3
+    """
+    coletor = ColetorSQL(pai=_coletor_atual.get())
+    token = _coletor_atual.set(coletor)
+    try:
+        yield coletor
+    finally:
+        _coletor_atual.reset(token)
+
+
+def _registrar_eventos(engine):
+    @event.listens_for(engine, 'before_cursor_execute')
+    def antes(conexao, cursor, sql, parametros, contexto, executemany):
+        if _coletor_atual.get() is not None:
+            conexao.info['inicio_instrucao'] = time.perf_counter()
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def depois(conexao, cursor, sql, parametros, contexto, executemany):
+        coletor = _coletor_atual.get()
+        inicio = conexao.info.pop('inicio_instrucao', None)
+        if coletor is not None and inicio is not None:
+            coletor.registrar(sql, time.perf_counter() - inicio)
+
+
+class Instrumentacao:
+    """Resumo das últimas requisições do processo, servido por /api/debug/consultas."""
+
+    def __init__(self, limite_repeticoes, tamanho_historico):
+        self.limite_repeticoes = limite_repeticoes
+        self.historico = deque(maxlen=tamanho_historico)
+        self._trava = threading.Lock()
+
+    def iniciar(self):
+        g.coletor_sql = ColetorSQL(pai=_coletor_atual.get())
+        g.token_coletor_sql = _coletor_atual.set(g.coletor_sql)
+
+    def finalizar(self, resposta):
+        coletor = g.get('coletor_sql')
+        if coletor is None:
+            return resposta
+        lentas = coletor.mais_lentas()
+        repetidas = coletor.repetidas(self.limite_repeticoes)
+
+        descricao = '1 consulta' if coletor.total == 1 else f'{coletor.total} consultas'
+        metricas = [f'db;dur={coletor.tempo_total * 1000:.2f};desc="{descricao}"']
+        if lentas:
+            metricas.append(f'db-lenta;dur={lentas[0][1] * 1000:.2f}')
+        resposta.headers.add('Server-Timing', ', '.join(metricas))
+        if repetidas:
+            resposta.headers['X-Consultas-Repetidas'] = str(max(repetidas.values()))
+            for forma, vezes in repetidas.items():
+                current_app.logger.warning(
+                    'Possível N+1 em %s %s: %d× %s', request.method, request.path, vezes,
+                    forma[:TAMANHO_SQL_EXIBIDO]
+                )
+
+        with self._trava:
+            self.historico.append({
+                'metodo': request.method,
+                'caminho': request.full_path.rstrip('?'),
+                'status': resposta.status_code,
+                'endpoint': request.endpoint,
+                'consultas': coletor.total,
+                'tempo_db_ms': round(coletor.tempo_total * 1000, 2),
+                'mais_lentas': [
+                    {'sql': sql[:TAMANHO_SQL_EXIBIDO], 'ms': round(duracao * 1000, 2)} for sql, duracao in lentas
+                ],
+                'suspeitas_n_mais_1': [
+                    {'forma': forma[:TAMANHO_SQL_EXIBIDO], 'execucoes': vezes} for forma, vezes in repetidas.items()
+                ]
+            })
+        return resposta
+
+    def encerrar(self, erro=None):
+        token = g.pop('token_coletor_sql', None)
+        if token is not None:
+            _coletor_atual.reset(token)
+
+    def recentes(self, apenas_suspeitas=False):
+        with self._trava:
+            itens = list(reversed(self.historico))
+        if apenas_suspeitas:
+            itens = [item for item in itens if item['suspeitas_n_mais_1']]
+        return itens
+
+
+def init_instrumentacao(app, db):
+    """Registra os eventos de SQL nos engines e, se ligado, o resumo por requisição.
+
+    Os eventos só medem quando há um coletor ativo (requisição instrumentada ou
+    contar_consultas), então ficam registrados mesmo com a instrumentação desligada.
+    """
+    with app.app_context():
+        _registrar_eventos(db.engine)
+    if 'banco_leitura' in app.extensions:
+        _registrar_eventos(app.extensions['banco_leitura'])
+
+    if not app.config['INSTRUMENTACAO_SQL']:
+        return
+    instrumentacao = Instrumentacao(
+        app.config['LIMITE_CONSULTAS_REPETIDAS'], app.config['HISTORICO_CONSULTAS']
+    )
+    app.extensions['instrumentacao'] = instrumentacao
+    app.before_request(instrumentacao.iniciar)
+    app.after_request(instrumentacao.finalizar)
+    app.teardown_request(instrumentacao.encerrar)
+
+
+# Máximo de instruções SQL por requisição (medido com o cache de respostas desligado e
+# estruturas em memória já aquecidas). Não depende do número de linhas: uma rota que
+# passar a fazer uma consulta por item estoura o orçamento assim que houver dados.
+ORCAMENTO_CONSULTAS = {
+    '/api/livros': 1,
+    '/api/livros/busca?q=a': 2,
+    '/api/livros/facetas': 1,
+    '/api/livros/{livro}': 1,
+    '/api/livros/{livro}/similares': 3,
+    '/api/membros': 1,
+    '/api/membros/{membro}/recomendacoes': 5,
+    '/api/membros/{membro}/pontos': 4,
+    '/api/membros/{membro}/ranking': 2,
+    '/api/ranking': 2,
+    '/api/emprestimos': 1,
+    '/api/emprestimos/membro/{membro}': 1,
+    '/api/avaliacoes/livro/{livro}': 1,
+    '/api/avaliacoes/membro/{membro}': 1,
+    '/api/avaliacoes/{avaliacao}': 3,
+    '/api/wishlist': 1,
+    '/api/wishlist/{wishlist}': 3,
+    '/api/tags': 1,
+    '/api/estatisticas': 1,
+}
+
+
+def ids_orcamento():
+    """Primeiros ids de cada recurso no banco, usados nos caminhos do orçamento (None se vazio)."""
+    from app import db
+    from models.avaliacao import Avaliacao
+    from models.livro import Livro
+    from models.membro import Membro
+    from models.wishlist import Wishlist
+
+    return {
+        'livro': db.session.execute(db.select(db.func.min(Livro.id_livro))).scalar(),
+        'membro': db.session.execute(db.select(db.func.min(Membro.id_membro))).scalar(),
+        'avaliacao': db.session.execute(db.select(db.func.min(Avaliacao.id_avaliacao))).scalar(),
+        'wishlist': db.session.execute(db.select(db.func.min(Wishlist.id_wishlist))).scalar(),
+    }
+
+
+def caminho_orcamento(modelo, ids):
+    """Caminho do modelo de ORCAMENTO_CONSULTAS com os ids, ou None se falta dado para algum deles."""
+    if any(f'{{{nome}}}' in modelo and valor is None for nome, valor in ids.items()):
+        return None
+    return modelo.format(**ids)
+
+
+def contar_requisicao(cliente, caminho):
+    """Instruções SQL de um GET ao caminho, depois de uma chamada que aquece ranking, modelo etc."""
+    cliente.get(caminho)
+    with contar_consultas() as coletor:
+        cliente.get(caminho)
+    return coletor.total
+
+
+def verificar_orcamento(app):
+    """Chama cada rota do orçamento com os primeiros ids do banco e conta as instruções.
+
+    Retorna {caminho: (consultas, maximo)}; rotas sem dados para o id ficam de fora.
+    """
+    with app.app_context():
+        ids = ids_orcamento()
+
+    # Sem o cache a contagem é a da rota, não a de um acerto no cache
+    cache = app.extensions.pop('cache_respostas', None)
+    try:
+        cliente = app.test_client()
+        resultado = {}
+        for modelo, maximo in ORCAMENTO_CONSULTAS.items():
+            caminho = caminho_orcamento(modelo, ids)
+            if caminho is not None:
+                resultado[caminho] = (contar_requisicao(cliente, caminho), maximo)
+        return resultado
+    finally:
+        if cache is not None:
+            app.extensions['cache_respostas'] = cache
@@ -0,0 +1,170 @@
+import base64
+import json
+from datetime import datetime
+
+from flask import jsonify, request
+from sqlalchemy import and_, or_, tuple_, DateTime
+
+LIMITE_MAXIMO = 500
+
+
+class CursorInvalido(ValueError):
+    pass
+
+
+class LimiteInvalido(CursorInvalido):
+    # Subclasse para as rotas responderem 400 no mesmo except do cursor inválido
+    pass
+
+
+def _codificar_cursor(valores):
+    bruto = json.dumps([v.isoformat() if isinstance(v, datetime) else v for v in valores])
+    return base64.urlsafe_b64encode(bruto.encode()).decode().rstrip('=')
+
+
+def _converter_valor(valor, tipo):
+    """Valor do cursor no tipo Python da chave de ordenação, ou CursorInvalido.
+
+    O cursor vem do cliente: um objeto ou lista no lugar de um escalar chegaria
+    ao SQLite como parâmetro inválido (500) em vez de 400.
+    """
+    if valor is None:
+        return None
+    if isinstance(tipo, DateTime):
+        if isinstance(valor, str):
+            try:
+                return datetime.fromisoformat(valor)
+            except ValueError:
+                pass
+        raise CursorInvalido('Cursor inválido')
+    try:
+        esperado = tipo.python_type
+    except NotImplementedError:
+        esperado = None
+    if esperado is int:
+        valido = isinstance(valor, int) and not isinstance(valor, bool)
+    elif esperado is str:
+        valido = isinstance(valor, str)
+    else:
+        valido = isinstance(valor, (int, float, str)) and not isinstance(valor, bool)
+    if not valido:
+        raise CursorInvalido('Cursor inválido')
+    return valor
+
+
+def _decodificar_cursor(cursor, ordenacao):
+    try:
+        preenchimento = '=' * (-len(cursor) % 4)
+        valores = json.loads(base64.urlsafe_b64decode(cursor + preenchimento))
+    except (ValueError, TypeError):
+        raise CursorInvalido('Cursor inválido')
+
+    if not isinstance(valores, list) or len(valores) != len(ordenacao):
+        raise CursorInvalido('Cursor inválido')
+
+    return [_converter_valor(valor, expressao.type) for valor, (expressao, _) in zip(valores, ordenacao)]
+
+
+def _filtro_apos(ordenacao, valores):
+    """Monta o predicado "linhas depois do cursor" para a ordenação informada.
+
+    Quando todas as chaves têm a mesma direção usa comparação de tuplas,
+    que o SQLite resolve com um único seek no índice. Com direções mistas
+    cai na forma expandida (a > x) OR (a = x AND b < y) ...
+    """
+    direcoes = {direcao for _, direcao in ordenacao}
+    if len(direcoes) == 1:
+        expressoes = tuple_(*[e for e, _ in ordenacao])
+        if 'desc' in direcoes:
+            return expressoes < tuple_(*valores)
+        return expressoes > tuple_(*valores)
+
+    alternativas = []
+    for i, (expressao, direcao) in enumerate(ordenacao):
+        anteriores = [ordenacao[j][0] == valores[j] for j in range(i)]
+        comparacao = expressao < valores[i] if direcao == 'desc' else expressao > valores[i]
+        alternativas.append(and_(*anteriores, comparacao))
+    return or_(*alternativas)
+
+
+def ordenar(query, ordenacao):
+    """Aplica o ORDER BY da ordenação de paginar (também usado em utils/planos.py)."""
+    return query.order_by(*[e.desc() if d == 'desc' else e.asc() for e, d in ordenacao])
+
+
+def pagina_apos(query, ordenacao, valores):
+    """Filtra as linhas depois das chaves `valores`, como uma requisição com `after`."""
+    return query.filter(_filtro_apos(ordenacao, valores))
+
+
+def paginar(query, ordenacao):
+    """Aplica paginação por cursor (keyset) a uma query ordenada.
+
+    `ordenacao` é uma lista de pares (expressão, 'asc'|'desc') cuja última
+    chave deve ser única (normalmente a chave primária), garantindo uma
+    ordem total e estável mesmo com inserções concorrentes.
+
+    Parâmetros lidos da requisição: `limit` e `after`. Sem nenhum dos dois a
+    listagem é devolvida inteira, como antes.
+
+    Retorna (itens, proximo_cursor); proximo_cursor é None na última página.
+    """
+    limit = request.args.get('limit')
+    after = request.args.get('after')
+
+    if limit is not None:
+        try:
+            limit = int(limit)
+        except ValueError:
+            raise LimiteInvalido('limit deve ser um número inteiro')
+        if limit <= 0:
+            raise LimiteInvalido('limit deve ser maior que zero')
+
+    if after:
+        query = pagina_apos(query, ordenacao, _decodificar_cursor(after, ordenacao))
+
+    query = ordenar(query, ordenacao)
+
+    if limit is None and not after:
+        return query.all(), None
+
+    # Só com after (sem limit) a página tem o tamanho máximo
+    limit = LIMITE_MAXIMO if limit is None else min(limit, LIMITE_MAXIMO)
+
+    # Busca as chaves de ordenação junto com as entidades para montar o cursor
+    rotulos = [e.label(f'_chave_{i}') for i, (e, _) in enumerate(ordenacao)]
+    linhas = query.add_columns(*rotulos).limit(limit + 1).all()
+
+    proximo_cursor = None
+    if len(linhas) > limit:
+        linhas = linhas[:limit]
+        proximo_cursor = _codificar_cursor(list(linhas[-1][1:]))
+
+    return [linha[0] for linha in linhas], proximo_cursor
+
+
+def resposta_paginada(itens, proximo_cursor):
+    """Serializa a página mantendo o corpo como lista; o cursor vai no cabeçalho X-Proximo-Cursor."""
+    resposta = jsonify(itens)
+    if proximo_cursor:
+        resposta.headers['X-Proximo-Cursor'] = proximo_cursor
+    return resposta
+
+
+# Parâmetros de query documentados no Swagger de toda listagem paginada
+PARAMETROS_PAGINACAO = [
+    {
+        'name': 'limit',
+        'in': 'query',
+        'type': 'integer',
+        'required': False,
+        'description': f'Tamanho da página (máximo {LIMITE_MAXIMO}). Sem limit/after a lista vem completa'
+    },
+    {
+        'name': 'after',
+        'in': 'query',
+        'type': 'string',
+        'required': False,
+        'description': 'Cursor opaco da página anterior (cabeçalho X-Proximo-Cursor)'
+    }
+]
@@ -0,0 +1,161 @@
+import re
+from datetime import datetime
+
+from app import db
+from models.avaliacao import Avaliacao
+from models.emprestimo import Emprestimo
+from models.livro import Livro
+from models.pontos import LancamentoPontos
+from models.tag import AvaliacaoTag
+from models.wishlist import Wishlist
+from utils.paginacao import ordenar, pagina_apos
+from utils.projecao import preparar_consulta
+
+# "SCAN tabela" sem índice (USING INDEX, ou o índice próprio de uma tabela virtual como
+# a FTS5) é leitura da tabela inteira. Versões antigas do SQLite escrevem "SCAN TABLE
+# tabela"; o resto da linha pode trazer um sufixo
+VARREDURA = re.compile(r'^SCAN (?:TABLE )?(\w+)')
+USANDO_INDICE = re.compile(r'\bUSING (?:COVERING )?INDEX\b|\bVIRTUAL TABLE INDEX\b')
+# Percorrer um índice só evita ler tudo quando ele já entrega a ordem e o LIMIT
+# interrompe a leitura; com a ordenação feita à parte o índice é lido inteiro
+ORDENACAO_EM_MEMORIA = 'USE TEMP B-TREE FOR ORDER BY'
+
+
+def tabela_varrida(linha, ordena_em_memoria=False):
+    """Nome da tabela lida por inteiro nesta linha do plano, ou None.
+
+    Com `ordena_em_memoria` (o plano tem ORDENACAO_EM_MEMORIA), percorrer um
+    índice comum também conta como varredura; o de tabela virtual não.
+    """
+    encontrada = VARREDURA.match(linha)
+    if encontrada is None or linha.startswith('SCAN CONSTANT ROW'):
+        return None
+    indice = USANDO_INDICE.search(linha)
+    if indice and (not ordena_em_memoria or indice.group(0) == 'VIRTUAL TABLE INDEX'):
+        return None
+    return encontrada.group(1)
+
+
+PAGINA = 50
+
+
+def _valores_de_cursor(ordenacao, agora):
+    """Chaves de um cursor qualquer para a ordenação (o plano não depende do valor)."""
+    return [agora if isinstance(expressao.type, db.DateTime) else 1 for expressao, _ in ordenacao]
+
+
+def _listagem(nome, query, modelo, ordenacao, agora):
+    """Primeira página e página seguinte (com `after`) de uma listagem, como em paginar().
+
+    A consulta chega já filtrada pelos mesmos helpers da rota. Com `modelo`
+    passa por preparar_consulta, como nas rotas que a usam, para que os JOINs
+    dos nomes de membro/livro também sejam verificados.
+    """
+    if modelo is not None:
+        query = preparar_consulta(query, modelo)
+    seguinte = pagina_apos(query, ordenacao, _valores_de_cursor(ordenacao, agora))
+    return {
+        nome: ordenar(query, ordenacao).limit(PAGINA + 1).statement,
+        f'{nome} (after)': ordenar(seguinte, ordenacao).limit(PAGINA + 1).statement,
+    }
+
+
+def _consultas():
+    """Formas das consultas feitas pelas rotas.
+
+    As listagens usam os filtros (filtrar_*) e as ordenações (ORDENACAO_*) das
+    próprias rotas: mudar uma rota muda a consulta verificada aqui. Listagens
+    sem filtro ficam de fora: percorrem a tabela na ordem da chave e param no
+    limite da página.
+
+    Ao criar uma rota ou um filtro novo, inclua aqui a combinação de parâmetros
+    correspondente para que a verificação cubra o novo caminho de acesso.
+    """
+    from routes.avaliacoes import ORDENACAO_AVALIACOES
+    from routes.emprestimos import ORDENACAO_EMPRESTIMOS, filtrar_emprestimos
+    from routes.livros import ORDENACAO_LIVROS, filtrar_livros
+    from routes.membros import ORDENACAO_LANCAMENTOS
+    from routes.wishlist import ORDENACAO_WISHLIST, filtrar_wishlist
+
+    agora = datetime.now()
+    consultas = {}
+    for parametros in ({'status': 'devolvido', 'tipo': 'interno'}, {'status': 'atrasado'}, {'status': 'ativo'}):
+        consultas.update(_listagem(
+            'listar_emprestimos?' + '&'.join(f'{k}={v}' for k, v in parametros.items()),
+            filtrar_emprestimos(Emprestimo.query, parametros, agora), Emprestimo, ORDENACAO_EMPRESTIMOS, agora
+        ))
+    consultas.update(_listagem(
+        'listar_emprestimos_membro', Emprestimo.query.filter_by(id_membro=1),
+        Emprestimo, ORDENACAO_EMPRESTIMOS, agora
+    ))
+    consultas.update(_listagem(
+        'listar_avaliacoes_livro', Avaliacao.query.filter_by(id_livro=1), Avaliacao, ORDENACAO_AVALIACOES, agora
+    ))
+    consultas.update(_listagem(
+        'listar_avaliacoes_membro', Avaliacao.query.filter_by(id_membro=1), Avaliacao, ORDENACAO_AVALIACOES, agora
+    ))
+    for parametros in ({'id_membro': '1'}, {'prioridade': 'alta'}, {'id_membro': '1', 'prioridade': 'alta'}):
+        consultas.update(_listagem(
+            'listar_wishlist?' + '&'.join(f'{k}={v}' for k, v in parametros.items()),
+            filtrar_wishlist(Wishlist.query, parametros), Wishlist, ORDENACAO_WISHLIST, agora
+        ))
+    for parametros in ({'genero': 'Romance', 'disponivel': 'true'}, {'tag': 'aventura'}):
+        consultas.update(_listagem(
+            'listar_livros?' + '&'.join(f'{k}={v}' for k, v in parametros.items()),
+            filtrar_livros(Livro.query, parametros), Livro, ORDENACAO_LIVROS, agora
+        ))
+    do_membro = LancamentoPontos.query.filter_by(id_membro=1)
+    consultas.update(_listagem('extrato_pontos', do_membro, None, ORDENACAO_LANCAMENTOS, agora))
+    consultas.update(_listagem(
+        'extrato_pontos?desde', do_membro.filter(LancamentoPontos.data_lancamento >= agora),
+        None, ORDENACAO_LANCAMENTOS, agora
+    ))
+
+    consultas.update({
+        'marcar_atrasados': db.update(Emprestimo)
+            .where(Emprestimo.filtro_vencido(agora))
+            .values(status='atrasado'),
+        'criar_avaliacao (duplicada)': db.select(Avaliacao)
+            .where(Avaliacao.id_membro == 1, Avaliacao.id_livro == 1)
+            .limit(1),
+        'criar_livro (isbn duplicado)': db.select(Livro)
+            .where(Livro.isbn == '9788535914849')
+            .limit(1),
+        'facetas_livros': db.select(
+                Livro.genero, Livro.subgenero, Livro.idioma, Livro.idade_recomendada,
+                Livro.estado_conservacao, Livro.disponivel, Livro.classicos_familia, db.func.count()
+            ).group_by(
+                Livro.genero, Livro.subgenero, Livro.idioma, Livro.idade_recomendada,
+                Livro.estado_conservacao, Livro.disponivel, Livro.classicos_familia
+            ),
+        'atualizar_avaliacao (tags)': db.delete(AvaliacaoTag)
+            .where(AvaliacaoTag.id_avaliacao == 1),
+        'ranking (quadro de semana/mes)': db.select(LancamentoPontos.id_membro, LancamentoPontos.pontos)
+            .where(LancamentoPontos.data_lancamento >= agora, LancamentoPontos.id_lancamento <= 1000),
+        'ranking (lancamentos novos)': db.select(LancamentoPontos.id_membro, LancamentoPontos.pontos)
+            .where(LancamentoPontos.id_lancamento > 1000),
+    })
+    return consultas
+
+
+def explicar(instrucao):
+    """Retorna as linhas de detalhe do EXPLAIN QUERY PLAN da instrução."""
+    # Valores literais: o plano escolhido pelo SQLite é o mesmo com parâmetros
+    compilada = instrucao.compile(dialect=db.engine.dialect, compile_kwargs={'literal_binds': True})
+    linhas = db.session.connection().exec_driver_sql('EXPLAIN QUERY PLAN ' + str(compilada)).all()
+    return [linha[-1] for linha in linhas]
+
+
+def verificar_planos():
+    """Executa EXPLAIN QUERY PLAN para cada consulta das rotas.
+
+    Retorna {nome: (plano, tabelas_varridas)}; tabelas_varridas vazio significa
+    que a consulta usa índice em todas as tabelas.
+    """
+    resultado = {}
+    for nome, instrucao in _consultas().items():
+        plano = explicar(instrucao)
+        ordena_em_memoria = ORDENACAO_EM_MEMORIA in plano
+        varridas = [tabela for tabela in (tabela_varrida(linha, ordena_em_memoria) for linha in plano) if tabela]
+        resultado[nome] = (plano, varridas)
+    return resultado
@@ -0,0 +1,123 @@
+from operator import attrgetter
+
+from flask import request
+from sqlalchemy.orm import joinedload, load_only
+
+
+class CampoInvalido(ValueError):
+    pass
+
+
+# Construtores das entradas de Model.CAMPOS:
+# {campo: (função que calcula o valor, colunas lidas, {relacionamento: colunas lidas nele})}
+
+def coluna(nome):
+    return attrgetter(nome), (nome,), {}
+
+
+def data_iso(nome):
+    def valor(objeto):
+        data = getattr(objeto, nome)
+        return data.isoformat() if data else None
+    return valor, (nome,), {}
+
+
+def calculado(funcao, *colunas, relacoes=None):
+    return funcao, colunas, relacoes or {}
+
+
+def relacionado(relacao, nome, chave):
+    """Coluna de um relacionamento muitos-para-um (ex.: membro.nome), lida pela chave estrangeira."""
+    def valor(objeto):
+        alvo = getattr(objeto, relacao)
+        return getattr(alvo, nome) if alvo else None
+    return valor, (chave,), {relacao: (nome,)}
+
+
+def serializar(objeto, campos=None):
+    """Monta o dicionário de to_dict só com os campos pedidos (todos se campos for None).
+
+    Campos calculados que ficaram de fora não são avaliados.
+    """
+    return {
+        nome: valor(objeto)
+        for nome, (valor, _, _) in objeto.CAMPOS.items()
+        if campos is None or nome in campos
+    }
+
+
+def ler_campos(modelo, extras=()):
+    """Lê ?fields=a,b,c da requisição.
+
+    Retorna None quando o parâmetro não foi informado (resposta completa) ou o
+    conjunto de campos pedidos. `extras` são campos que a rota acrescenta ao
+    to_dict (ex.: relevancia) e também podem ser pedidos.
+    """
+    bruto = request.args.get('fields')
+    if not bruto:
+        return None
+    campos = {campo.strip() for campo in bruto.split(',') if campo.strip()}
+    desconhecidos = campos - set(modelo.CAMPOS) - set(extras)
+    if desconhecidos:
+        raise CampoInvalido(
+            f'Campos desconhecidos: {", ".join(sorted(desconhecidos))}. '
+            f'Disponíveis: {", ".join([*modelo.CAMPOS, *extras])}'
+        )
+    return campos
+
+
+def colunas_necessarias(modelo, campos):
+    """Atributos de coluna que precisam ser lidos para montar os campos pedidos."""
+    nomes = {chave.key for chave in modelo.__mapper__.primary_key}
+    for campo in campos:
+        if campo in modelo.CAMPOS:
+            nomes.update(modelo.CAMPOS[campo][1])
+    return [getattr(modelo, nome) for nome in sorted(nomes)]
+
+
+def relacoes_necessarias(modelo, campos):
+    """{relacionamento: colunas} que os campos pedidos leem (todos os campos se campos for None)."""
+    relacoes = {}
+    for campo, (_, _, usadas) in modelo.CAMPOS.items():
+        if campos is None or campo in campos:
+            for relacao, colunas in usadas.items():
+                relacoes.setdefault(relacao, set()).update(colunas)
+    return relacoes
+
+
+def preparar_consulta(query, modelo, campos=None):
+    """Monta a consulta de uma listagem a partir dos campos que serão serializados.
+
+    - Só as colunas usadas pelos campos pedidos são lidas (load_only); as
+      demais ficam adiadas.
+    - Os relacionamentos lidos pelos campos (ex.: membro.nome) vêm no mesmo
+      SELECT por JOIN, só com as colunas usadas: o número de consultas não
+      cresce com o número de linhas.
+    """
+    opcoes = []
+    if campos is not None:
+        opcoes.append(load_only(*colunas_necessarias(modelo, campos)))
+    for relacao, colunas in relacoes_necessarias(modelo, campos).items():
+        alvo = getattr(modelo, relacao)
+        opcoes.append(joinedload(alvo).load_only(
+            *[getattr(alvo.property.mapper.class_, nome) for nome in sorted(colunas)]
+        ))
+    return query.options(*opcoes) if opcoes else query
+
+
+def filtrar_extras(item, campos):
+    """Remove de um dicionário já montado (to_dict + extras da rota) o que não foi pedido."""
+    if campos is None:
+        return item
+    return {chave: valor for chave, valor in item.items() if chave in campos}
+
+
+# Parâmetro de query documentado no Swagger das listagens
+PARAMETRO_CAMPOS = {
+    'name': 'fields',
+    'in': 'query',
+    'type': 'string',
+    'required': False,
+    'description': 'Campos a retornar, separados por vírgula (ex.: id_livro,titulo,autor,capa_url,status). '
+                   'Colunas não pedidas não são lidas do banco'
+}
@@ -0,0 +1,153 @@
+from flask import jsonify, request
+
+# Tipos JSON do Swagger 2.0. bool é subclasse de int em Python, por isso é excluído à parte
+TIPOS = {
+    'string': (str,),
+    'integer': (int,),
+    'number': (int, float),
+    'boolean': (bool,),
+    'object': (dict,),
+    'array': (list,),
+}
+NOMES_TIPOS = {
+    'string': 'texto',
+    'integer': 'um número inteiro',
+    'number': 'um número',
+    'boolean': 'verdadeiro ou falso',
+    'object': 'um objeto JSON',
+    'array': 'uma lista',
+}
+
+
+def _compilar_valor(campo, esquema):
+    """Função que devolve a mensagem de erro do valor (ou None) para um campo do esquema.
+
+    As checagens que o esquema não declara nem entram na função: cada validador
+    faz só as comparações do seu campo.
+    """
+    checagens = []
+
+    tipo = esquema.get('type')
+    if tipo in TIPOS:
+        classes = TIPOS[tipo]
+        aceita_bool = tipo == 'boolean'
+        mensagem_tipo = f'{campo} deve ser {NOMES_TIPOS[tipo]}'
+
+        def checar_tipo(valor):
+            if not isinstance(valor, classes) or (isinstance(valor, bool) and not aceita_bool):
+                return mensagem_tipo
+        checagens.append(checar_tipo)
+
+    if 'enum' in esquema:
+        opcoes = frozenset(esquema['enum'])
+        mensagem_enum = f'{campo} deve ser um de: {", ".join(map(str, esquema["enum"]))}'
+        checagens.append(lambda valor: None if valor in opcoes else mensagem_enum)
+
+    minimo, maximo = esquema.get('minimum'), esquema.get('maximum')
+    if minimo is not None and maximo is not None:
+        mensagem_faixa = f'{campo} deve estar entre {minimo} e {maximo}'
+        checagens.append(lambda valor: None if minimo <= valor <= maximo else mensagem_faixa)
+    elif minimo is not None:
+        mensagem_minimo = f'{campo} deve ser no mínimo {minimo}'
+        checagens.append(lambda valor: None if valor >= minimo else mensagem_minimo)
+    elif maximo is not None:
+        mensagem_maximo = f'{campo} deve ser no máximo {maximo}'
+        checagens.append(lambda valor: None if valor <= maximo else mensagem_maximo)
+
+    if esquema.get('minLength'):
+        tamanho_minimo = esquema['minLength']
+        mensagem_tamanho = f'{campo} não pode ser vazio' if tamanho_minimo == 1 else \
+            f'{campo} deve ter ao menos {tamanho_minimo} caracteres'
+        checagens.append(lambda valor: None if len(valor) >= tamanho_minimo else mensagem_tamanho)
+
+    if tipo == 'object' and 'properties' in esquema:
+        objeto = compilar_esquema(esquema, prefixo=f'{campo}.')
+        checagens.append(objeto)
+
+    def validar(valor):
+        # Em ordem: o tipo é checado antes das comparações que dependem dele
+        for checagem in checagens:
+            erro = checagem(valor)
+            if erro:
+                return erro
+        return None
+    return validar
+
+
+def compilar_esquema(esquema, prefixo=''):
+    """Compila o esquema de um objeto (properties/required) em uma função de validação.
+
+    Campos opcionais aceitam null (equivale a omitir), a não ser que o esquema
+    declare 'x-nullable': False, caso das colunas NOT NULL nos PUTs.
+    Campos fora de properties são ignorados, como antes.
+    """
+    obrigatorios = tuple(esquema.get('required', ()))
+    campos = [
+        (nome, _compilar_valor(prefixo + nome, propriedade), propriedade.get('x-nullable', True))
+        for nome, propriedade in esquema.get('properties', {}).items()
+    ]
+    mensagem_objeto = f'{prefixo.rstrip(".")} deve ser um objeto JSON' if prefixo else \
+        'O corpo da requisição deve ser um objeto JSON'
+
+    def validar(dados):
+        if not isinstance(dados, dict):
+            return mensagem_objeto
+        for nome in obrigatorios:
+            if dados.get(nome) is None:
+                return f'{prefixo}{nome} é obrigatório'
+        for nome, validar_valor, aceita_nulo in campos:
+            valor = dados.get(nome)
+            if valor is None:
+                if nome in dados and not aceita_nulo:
+                    return f'{prefixo}{nome} não pode ser nulo'
+                continue
+            erro = validar_valor(valor)
+            if erro:
+                return erro
+        return None
+    return validar
+
+
+def compilar_validador(especificacao):
+    """Validador do corpo JSON declarado no @swag_from da rota, ou None se ela não recebe um objeto."""
+    for parametro in especificacao.get('parameters', ()):
+        esquema = parametro.get('schema', {})
+        if parametro.get('in') != 'body' or esquema.get('type') != 'object':
+            continue
+        validar_objeto = compilar_esquema(esquema)
+        obrigatorio = parametro.get('required', False)
+
+        def validar(dados):
+            if dados is None and not obrigatorio:
+                return None
+            return validar_objeto(dados)
+        return validar
+    return None
+
+
+def init_validacao(app):
+    """Compila no boot os validadores de todas as rotas e os roda antes do handler.
+
+    Chame depois de registrar os blueprints. Um corpo inválido volta 400 sem
+    chegar à rota, portanto sem nenhuma consulta ao banco.
+    """
+    validadores = {}
+    for endpoint, view in app.view_functions.items():
+        especificacao = getattr(view, 'specs_dict', None)
+        validador = compilar_validador(especificacao) if especificacao else None
+        if validador is not None:
+            validadores[endpoint] = validador
+    app.extensions['validadores'] = validadores
+
+    def validar_corpo():
+        validador = validadores.get(request.endpoint)
+        if validador is None:
+            return None
+        # silent=True: JSON malformado ou Content-Type errado vira None (400 abaixo, não 415/500).
+        # O resultado fica em cache, então o get_json() da rota não faz o parse de novo
+        erro = validador(request.get_json(silent=True))
+        if erro:
+            return jsonify({'erro': erro}), 400
+        return None
+
+    app.before_request(validar_corpo)